@@ -0,0 +1,138 @@
+r"""
+Rows/s of points.csv and orientations.csv imports with GemPy: the bulk
+parsers (SubSurface.parse_points_csv/parse_orientations_csv) and the row by
+row SubSurface.add calls they replaced. The latter take tens of ms per row,
+--per-row-rows keeps them to the first rows of the file.
+
+    python benchmarks/bench_csv_import.py [--rows 100000] [--surfaces 20]
+        [--per-row-rows 500]
+"""
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+
+from conceptual_modeler.app.batch import HeadlessApp
+from conceptual_modeler.app.modeler.subsurface import SubSurface, pole_vectors
+
+
+def model(surfaces):
+    subsurface = SubSurface(HeadlessApp(), figures=False)
+    subsurface.add("Stack", {"name": "Layers", "feature": "Erosion"}, dirtying=False)
+    for i in range(surfaces):
+        subsurface.add(
+            "Surface", {"name": f"formation_{i}", "stackname": "Layers"}, dirtying=False
+        )
+    return subsurface
+
+
+def csv_file(header, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(zip(*columns))
+    return buffer.getvalue().encode("utf-8")
+
+
+def points_csv(rows, surfaces, rng):
+    x, y, z = rng.uniform(0, 1000, (3, rows)).round(3)
+    formations = rng.choice([f"formation_{i}" for i in range(surfaces)], rows)
+    return csv_file(["X", "Y", "Z", "formation"], [x, y, z, formations])
+
+
+def orientations_csv(rows, surfaces, rng):
+    x, y, z = rng.uniform(0, 1000, (3, rows)).round(3)
+    dip = rng.uniform(0, 90, rows).round(2)
+    azimuth = rng.uniform(0, 360, rows).round(2)
+    polarity = np.ones(rows)
+    formations = rng.choice([f"formation_{i}" for i in range(surfaces)], rows)
+    return csv_file(
+        ["X", "Y", "Z", "azimuth", "dip", "polarity", "formation"],
+        [x, y, z, azimuth, dip, polarity, formations],
+    )
+
+
+def per_row_points(subsurface, content):
+    for row in csv.DictReader(content.decode("utf-8").splitlines(), delimiter=","):
+        data = {
+            "x": row["X"],
+            "y": row["Y"],
+            "z": row["Z"],
+            "surfacename": row["formation"],
+        }
+        subsurface.add("Point", data, dirtying=False)
+
+
+def per_row_orientations(subsurface, content):
+    for row in csv.DictReader(content.decode("utf-8").splitlines(), delimiter=","):
+        angles = [
+            np.array([float(row[name])]) for name in ["dip", "azimuth", "polarity"]
+        ]
+        gx, gy, gz = pole_vectors(*angles)[0]
+        data = {
+            "x": row["X"],
+            "y": row["Y"],
+            "z": row["Z"],
+            "gx": gx,
+            "gy": gy,
+            "gz": gz,
+            "surfacename": row["formation"],
+        }
+        subsurface.add("Orientation", data, dirtying=False)
+
+
+def head(content, rows):
+    return b"\n".join(content.split(b"\n")[: rows + 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--surfaces", type=int, default=20)
+    parser.add_argument("--per-row-rows", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    files = {
+        "points": (
+            points_csv(args.rows, args.surfaces, rng),
+            "parse_points_csv",
+            per_row_points,
+        ),
+        "orientations": (
+            orientations_csv(args.rows, args.surfaces, rng),
+            "parse_orientations_csv",
+            per_row_orientations,
+        ),
+    }
+
+    results = []
+    for name, (content, parse, per_row) in files.items():
+        runs = [
+            ("bulk", args.rows, lambda subsurface: getattr(subsurface, parse)(content)),
+            (
+                "per row",
+                args.per_row_rows,
+                lambda subsurface: per_row(
+                    subsurface, head(content, args.per_row_rows)
+                ),
+            ),
+        ]
+        for mode, rows, run in runs:
+            if not rows:
+                continue
+            subsurface = model(args.surfaces)
+            start = time.perf_counter()
+            run(subsurface)
+            elapsed = time.perf_counter() - start
+            results.append((name, mode, rows, elapsed))
+
+    print(f"{'file':>12} {'mode':>8} {'rows':>8} {'time (s)':>9} {'rows/s':>10}")
+    for name, mode, rows, elapsed in results:
+        print(f"{name:>12} {mode:>8} {rows:>8} {elapsed:>9.2f} {rows / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+r"""
+Wall time of an ensemble of point perturbed realizations for a growing number
+of worker processes.
+
+Every pool pays one interpolator compile per worker (from the persistent
+Theano compiledir after the first run), which is included in the wall time.
+"first" is the time to the first finished realization (worker start, compile
+and one realization), "realization" the mean time of a realization in its
+worker (perturbation, compute and npz), which grows when workers outnumber
+the cores.
+
+    python benchmarks/bench_ensemble_scaling.py [--model models/model-4.zip]
+        [--realizations 16] [--workers 1 2 4 8] [--profile fast_compile]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from conceptual_modeler.app.ensemble import run_ensemble, sweep
+from conceptual_modeler.app.modeler.interpolator import DEFAULT_PROFILE
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=ROOT / "models" / "model-4.zip")
+    parser.add_argument("--realizations", type=int, default=16)
+    parser.add_argument("--point-sigma", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--profile", default=DEFAULT_PROFILE)
+    args = parser.parse_args()
+
+    realizations = sweep(list(range(args.realizations)), args.point_sigma)
+    print(
+        f"{Path(args.model).name}, {len(realizations)} realizations, {os.cpu_count()} cores"
+    )
+    print(
+        f"{'workers':>8} {'wall (s)':>10} {'first (s)':>10} {'realization (s)':>16} "
+        f"{'per real. (s)':>14} {'speedup':>8} {'efficiency':>11}"
+    )
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as output:
+            start = time.perf_counter()
+            entries, first = [], None
+            for entry in run_ensemble(
+                args.model, realizations, output, workers, args.profile
+            ):
+                entries.append(entry)
+                if first is None:
+                    first = time.perf_counter() - start
+            wall = time.perf_counter() - start
+
+        failed = [entry for entry in entries if "error" in entry]
+        if failed:
+            print(
+                f"{workers:>8} {len(failed)} realizations failed: {failed[0]['error']}"
+            )
+            continue
+
+        # Relative to the first (smallest) pool
+        if baseline is None:
+            baseline = (wall, workers)
+        speedup = baseline[0] / wall
+        efficiency = speedup * baseline[1] / workers
+        realization = sum(entry["time"] for entry in entries) / len(entries)
+        print(
+            f"{workers:>8} {wall:>10.2f} {first:>10.2f} {realization:>16.2f} "
+            f"{wall / len(realizations):>14.2f} {speedup:>7.2f}x {efficiency:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
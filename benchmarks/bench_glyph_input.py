@@ -0,0 +1,103 @@
+r"""
+Build time of the surface points / orientations glyph input: the former
+per tuple vtkPoints, vertex cells and direction/magnitude arrays against the
+NumPy bulk path used by ViewView.add_surface_points/add_surface_orientations.
+
+    python benchmarks/bench_glyph_input.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vtkmodules.vtkCommonCore import vtkFloatArray, vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+
+from conceptual_modeler.app.modeler.visualization import (
+    surface_orientations_polydata,
+    surface_points_polydata,
+)
+
+
+def legacy_orientations_polydata(orientation_list):
+    points = vtkPoints()
+    vertices = vtkCellArray()
+    direction = vtkFloatArray()
+    direction.SetName("direction")
+    direction.SetNumberOfComponents(3)
+    direction.SetNumberOfTuples(len(orientation_list))
+    magnitude = vtkFloatArray()
+    magnitude.SetName("magnitude")
+    magnitude.SetNumberOfTuples(len(orientation_list))
+    for index, o in enumerate(orientation_list):
+        point_id = points.InsertNextPoint([o[0], o[1], o[2]])
+        vertices.InsertNextCell(1)
+        vertices.InsertCellPoint(point_id)
+        d = [o[3], o[4], o[5]]
+        direction.SetTuple(index, d)
+        magnitude.SetTuple1(index, pow(sum(v * v for v in d), 0.5))
+    polydata = vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetVerts(vertices)
+    polydata.GetPointData().AddArray(direction)
+    polydata.GetPointData().SetActiveVectors("direction")
+    polydata.GetPointData().AddArray(magnitude)
+    polydata.GetPointData().SetActiveScalars("magnitude")
+    return polydata
+
+
+def legacy_points_polydata(point_list):
+    points = vtkPoints()
+    vertices = vtkCellArray()
+    for p in point_list:
+        point_id = points.InsertNextPoint(p)
+        vertices.InsertNextCell(1)
+        vertices.InsertCellPoint(point_id)
+    polydata = vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetVerts(vertices)
+    return polydata
+
+
+def timed(fn, values, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        polydata = fn(values)
+    return polydata, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'input':>13} {'count':>8} {'per tuple (ms)':>15} {'bulk (ms)':>10} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        # Same layout as the [["X", "Y", "Z", "G_x", "G_y", "G_z"]].values arrays
+        values = rng.random((size, 6)) * 1000.0
+        for name, legacy, bulk, columns in [
+            ("points", legacy_points_polydata, surface_points_polydata, 3),
+            (
+                "orientations",
+                legacy_orientations_polydata,
+                surface_orientations_polydata,
+                6,
+            ),
+        ]:
+            data = np.ascontiguousarray(values[:, :columns])
+            reference, legacy_time = timed(legacy, data, args.repeat)
+            polydata, bulk_time = timed(bulk, data, args.repeat)
+            assert polydata.GetNumberOfPoints() == reference.GetNumberOfPoints()
+            assert polydata.GetNumberOfVerts() == reference.GetNumberOfVerts()
+            print(
+                f"{name:>13} {size:>8} {legacy_time:>15.1f} {bulk_time:>10.2f} "
+                f"{legacy_time / bulk_time:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+r"""
+Compile time, compute time and peak memory of the bundled models under each
+GemPy interpolator profile.
+
+Each (model, profile) pair runs in its own process so that Theano compiles
+from scratch (in a throw-away compiledir unless --warm) and the peak RSS is
+not polluted by previous runs.
+
+    python benchmarks/bench_interpolator_profiles.py [--models models/*.zip]
+        [--profiles fast_compile fast_run fast_run_float32] [--warm]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULT_PREFIX = "RESULT "
+
+
+def run_worker(model, profile):
+    from conceptual_modeler.app.batch import HeadlessApp
+    from conceptual_modeler.app.modeler.subsurface import SubSurface
+
+    subsurface = SubSurface(HeadlessApp(), profile=profile)
+    subsurface.parse_zip_file({"content": Path(model).read_bytes()})
+
+    start = time.perf_counter()
+    subsurface.compile_interpolator()
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subsurface.compute_geo_model()
+    compute_time = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result = {"compile": compile_time, "compute": compute_time, "peak_mb": peak}
+    print(f"{RESULT_PREFIX}{json.dumps(result)}")
+
+
+def run(model, profile, warm):
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as compiledir:
+        if not warm:
+            env["THEANO_FLAGS"] = f"base_compiledir={compiledir}"
+        process = subprocess.run(
+            [sys.executable, __file__, "--worker", str(model), profile],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    print(process.stderr[-2000:], file=sys.stderr)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--models", nargs="+", default=sorted(ROOT.glob("models/*.zip"))
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=["fast_compile", "fast_run", "fast_run_float32"],
+    )
+    parser.add_argument(
+        "--warm", action="store_true", help="Reuse the Theano compiledir"
+    )
+    parser.add_argument(
+        "--worker", nargs=2, metavar=("MODEL", "PROFILE"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    print(
+        f"{'model':>12} {'profile':>18} {'compile (s)':>12} {'compute (s)':>12} {'peak (MB)':>10}"
+    )
+    for model in args.models:
+        for profile in args.profiles:
+            result = run(model, profile, args.warm)
+            if result is None:
+                print(f"{Path(model).stem:>12} {profile:>18} {'failed':>12}")
+                continue
+            print(
+                f"{Path(model).stem:>12} {profile:>18} {result['compile']:>12.2f} "
+                f"{result['compute']:>12.2f} {result['peak_mb']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+r"""
+Compare the per-cell lithology transfer of VtkViewer.update_lithography with
+the NumPy bulk path.
+
+    python benchmarks/bench_lithology_transfer.py [--sizes 50 100 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vtkmodules.vtkCommonCore import vtkFloatArray
+
+from conceptual_modeler.app.modeler.vtk_utils import lithology_volume, to_vtk_array
+
+
+def legacy_transfer(litho, blank, resolution):
+    i_max, j_max, k_max = resolution
+    field = vtkFloatArray()
+    field.SetNumberOfTuples(litho.size)
+    lithography = litho.reshape(i_max, j_max, k_max)
+    blanking = blank.reshape(i_max, j_max, k_max)
+    index = 0
+    for k in range(k_max):
+        for j in range(j_max):
+            for i in range(i_max):
+                if blanking[i, j, k]:
+                    field.SetTuple1(index, -1)
+                else:
+                    field.SetTuple1(index, lithography[i, j, k])
+                index += 1
+    return field
+
+
+def bulk_transfer(litho, blank, resolution):
+    return to_vtk_array(lithology_volume(litho, blank, resolution), "litho")
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'grid':>10} {'legacy (s)':>12} {'bulk (ms)':>12} {'speedup':>10}")
+    for n in args.sizes:
+        resolution = (n, n, n)
+        rng = np.random.default_rng(0)
+        litho = rng.integers(1, 6, size=n * n * n).astype(np.float64)
+        blank = rng.random(n * n * n) > 0.8
+
+        bulk_time, bulk = timed(bulk_transfer, litho, blank, resolution)
+        if args.skip_legacy:
+            print(f"{n:>9}^3 {'-':>12} {bulk_time * 1e3:>12.2f} {'-':>10}")
+            continue
+
+        legacy_time, legacy = timed(legacy_transfer, litho, blank, resolution)
+        sample = range(0, litho.size, 997)
+        legacy_values = np.array([legacy.GetValue(i) for i in sample])
+        bulk_values = np.array([bulk.GetValue(i) for i in sample])
+        assert np.array_equal(legacy_values, bulk_values)
+        print(
+            f"{n:>9}^3 {legacy_time:>12.2f} {bulk_time * 1e3:>12.2f} "
+            f"{legacy_time / bulk_time:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
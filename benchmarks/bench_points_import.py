@@ -0,0 +1,147 @@
+r"""
+Model side cost of importing a points.csv: rows are added to the surfaces
+found by name, as SubSurface.parse_points_csv does, without the GemPy update.
+
+--linear swaps the stack/surface lookups back to the scans over the lists
+they replaced, for comparison. Memory is what the imported rows keep
+allocated (tracemalloc, measured in a separate run).
+
+    python benchmarks/bench_points_import.py [--rows 100000] [--stacks 5]
+        [--surfaces 20] [--linear]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+from conceptual_modeler.app.modeler.subsurface import (
+    AbstractSortedList,
+    StateManager,
+    Stacks,
+    Surfaces,
+)
+
+
+def first(items):
+    return next(iter(items), None)
+
+
+# Lookups as list scans
+LINEAR_LOOKUPS = {
+    (AbstractSortedList, "find_by_id"): lambda self, id: first(
+        item for item in self._data.values() if item.id == id
+    ),
+    (AbstractSortedList, "_position"): lambda self, id: self._ids.index(id),
+    (Surfaces, "find_by_name"): lambda self, name: first(
+        surface for surface in self._data.values() if surface.name == name
+    ),
+    (Stacks, "find_by_name"): lambda self, name: first(
+        stack for stack in self._data.values() if stack.name == name
+    ),
+    (Stacks, "find_surface_by_name"): lambda self, name: first(
+        surface
+        for stack in self._data.values()
+        for surface in [stack.surfaces.find_by_name(name)]
+        if surface
+    ),
+    (Stacks, "find_surface_by_id"): lambda self, id: first(
+        surface
+        for stack in self._data.values()
+        for surface in [stack.surfaces.find_by_id(id)]
+        if surface
+    ),
+}
+
+
+@contextlib.contextmanager
+def linear_lookups():
+    saved = {key: getattr(*key) for key in LINEAR_LOOKUPS}
+    try:
+        for (klass, name), method in LINEAR_LOOKUPS.items():
+            setattr(klass, name, method)
+        yield
+    finally:
+        for (klass, name), method in saved.items():
+            setattr(klass, name, method)
+
+
+def model(stacks, surfaces):
+    state = StateManager()
+    names = []
+    for i in range(stacks):
+        state.add("Stack", {"name": f"stack_{i}", "feature": "Erosion"})
+        for j in range(surfaces):
+            names.append(f"formation_{i}_{j}")
+            state.add("Surface", {"name": names[-1], "stackname": f"stack_{i}"})
+    return state, names
+
+
+def points_csv(rows, names):
+    rng = np.random.default_rng(0)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["X", "Y", "Z", "formation"])
+    formations = rng.choice(names, rows)
+    for (x, y, z), formation in zip(rng.uniform(0, 1000, (rows, 3)), formations):
+        writer.writerow([f"{x:.3f}", f"{y:.3f}", f"{z:.3f}", formation])
+    return buffer.getvalue().encode("utf-8")
+
+
+def import_points(state, content):
+    for row in csv.DictReader(content.decode("utf-8").splitlines(), delimiter=","):
+        state.add(
+            "Point",
+            {
+                "x": row["X"],
+                "y": row["Y"],
+                "z": row["Z"],
+                "surfacename": row["formation"],
+            },
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--stacks", type=int, default=5)
+    parser.add_argument("--surfaces", type=int, default=20, help="Surfaces per stack")
+    parser.add_argument(
+        "--linear", action="store_true", help="Also time the list scans"
+    )
+    args = parser.parse_args()
+
+    state, names = model(args.stacks, args.surfaces)
+    content = points_csv(args.rows, names)
+
+    modes = [("indexed", contextlib.nullcontext)]
+    if args.linear:
+        modes.insert(0, ("linear", linear_lookups))
+
+    print(
+        f"{'lookups':>8} {'rows':>8} {'time (s)':>9} {'rows/s':>10} {'bytes/row':>10}"
+    )
+    for mode, context in modes:
+        state, _ = model(args.stacks, args.surfaces)
+        with context():
+            start = time.perf_counter()
+            import_points(state, content)
+            elapsed = time.perf_counter() - start
+
+            state, _ = model(args.stacks, args.surfaces)
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            import_points(state, content)
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+        print(
+            f"{mode:>8} {args.rows:>8} {elapsed:>9.2f} {args.rows / elapsed:>10.0f}"
+            f" {retained / args.rows:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
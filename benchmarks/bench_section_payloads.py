@@ -0,0 +1,127 @@
+r"""
+Payload size and latency of a 2D section update: matplotlib figure
+serialization (trame.widgets.matplotlib.Figure, mpld3) versus server side
+rendered images (--sections image).
+
+The bundled models are computed with GemPy; --synthetic N uses a folded
+layer volume of N^3 cells instead, which does not need GemPy.
+
+    python benchmarks/bench_section_payloads.py [--models models/*.zip]
+        [--synthetic 100] [--formats png webp jpeg] [--quality 80]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+from trame.widgets.matplotlib import Figure
+
+from conceptual_modeler.app.modeler.sections import (
+    SectionRenderer,
+    SliceCache,
+    data_url,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+FIGSIZE = (5.6, 3.36)
+DPI = 192
+COLORS = ["#015482", "#9f0052", "#ffbe00", "#728f02", "#443988"]
+
+
+def model_sections(model):
+    from conceptual_modeler.app.batch import HeadlessApp
+    from conceptual_modeler.app.modeler.subsurface import SubSurface
+
+    subsurface = SubSurface(HeadlessApp())
+    subsurface.parse_zip_file({"content": Path(model).read_bytes()})
+    subsurface.compute_geo_model()
+    subsurface.update_sections()
+    return subsurface._sections
+
+
+def synthetic_sections(n, formations=5):
+    x, y, z = np.meshgrid(*(np.linspace(0.0, 1.0, n),) * 3, indexing="ij")
+    depth = z + 0.1 * np.sin(4.0 * np.pi * x) * np.cos(3.0 * np.pi * y)
+    labels = 1 + np.clip(np.floor(depth / 0.9 * formations), 0, formations - 1)
+    labels[depth > 0.9] = -1
+    colors = dict(zip(range(1, formations + 1), COLORS))
+    sections = {}
+    for direction in "xyz":
+        sections[direction] = SectionRenderer(direction, SliceCache())
+        sections[direction].set_model(labels, [0, 1000, 0, 1000, 0, 500], colors)
+    return sections
+
+
+def measure(fn, repeat):
+    sizes, times = [], []
+    for index in range(repeat):
+        start = time.perf_counter()
+        payload = fn(index)
+        times.append(time.perf_counter() - start)
+        sizes.append(len(payload))
+    return np.mean(sizes) / 1024, np.mean(times) * 1000
+
+
+def report(name, sections, formats, quality, repeat):
+    for direction, section in sections.items():
+
+        def figure_payload(index):
+            return json.dumps(
+                section.render_spec(Figure.to_data, [index], FIGSIZE, DPI)
+            )
+
+        rows = [("figure", *measure(figure_payload, repeat))]
+        # Second pass over the same slices is served by the slice cache
+        rows.append(("figure (cached)", *measure(figure_payload, repeat)))
+        for format in formats:
+
+            def image_payload(index):
+                return data_url(
+                    section.render_image([index], FIGSIZE, DPI, format, quality), format
+                )
+
+            rows.append((format, *measure(image_payload, repeat)))
+            # Second pass over the same slices is served by the slice cache
+            rows.append((f"{format} (cached)", *measure(image_payload, repeat)))
+
+        for mode, size, latency in rows:
+            print(
+                f"{name:>12} {direction:>4} {mode:>16} {size:>12.1f} {latency:>12.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--models", nargs="+", default=sorted(ROOT.glob("models/*.zip"))
+    )
+    parser.add_argument("--synthetic", type=int, help="Use a synthetic N^3 volume")
+    parser.add_argument("--formats", nargs="+", default=["png", "webp", "jpeg"])
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # sections imports pyplot, the backend can change until a figure exists
+    matplotlib.use("Agg")
+
+    print(
+        f"{'model':>12} {'dir':>4} {'mode':>16} {'payload (KB)':>12} {'latency (ms)':>12}"
+    )
+    if args.synthetic:
+        sections = synthetic_sections(args.synthetic)
+        report(f"{args.synthetic}^3", sections, args.formats, args.quality, args.repeat)
+        return
+
+    for model in args.models:
+        report(
+            Path(model).stem,
+            model_sections(model),
+            args.formats,
+            args.quality,
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+r"""
+Compare the per-formation vtkThreshold + vtkDataSetSurfaceFilter skins with
+the single-pass skin extraction used by VtkViewer.update_skin.
+
+    python benchmarks/bench_skin_extraction.py [--size 100] [--formations 5 10 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vtkmodules.vtkCommonDataModel import vtkImageData
+from vtkmodules.vtkFiltersCore import vtkThreshold
+from vtkmodules.vtkFiltersGeometry import vtkDataSetSurfaceFilter
+
+from conceptual_modeler.app.modeler.vtk_utils import skin_polydata, to_vtk_array
+
+
+def layered_volume(n, formations):
+    # Gently folded layers with the top ~10% of the volume blanked as air
+    x, y, z = np.meshgrid(*(np.linspace(0.0, 1.0, n),) * 3, indexing="ij")
+    depth = z + 0.1 * np.sin(4.0 * np.pi * x) * np.cos(3.0 * np.pi * y)
+    volume = 1.0 + np.clip(np.floor(depth / 0.9 * formations), 0, formations - 1)
+    volume[depth > 0.9] = -1.0
+    return volume
+
+
+def legacy_skins(image, formations):
+    skins = {}
+    for value in range(1, formations + 1):
+        threshold = vtkThreshold()
+        threshold.SetInputData(image)
+        threshold.ThresholdBetween(value - 0.5, value + 0.5)
+        surface = vtkDataSetSurfaceFilter()
+        surface.SetInputConnection(threshold.GetOutputPort())
+        surface.Update()
+        skins[value] = surface.GetOutput()
+    return skins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--formations", type=int, nargs="+", default=[5, 10, 20])
+    args = parser.parse_args()
+
+    n = args.size
+    print(f"{n}^3 grid")
+    print(
+        f"{'formations':>10} {'per formation (s)':>18} {'single pass (s)':>16} {'speedup':>8}"
+    )
+    for formations in args.formations:
+        volume = layered_volume(n, formations)
+        image = vtkImageData()
+        image.SetDimensions(n + 1, n + 1, n + 1)
+        image.GetCellData().SetScalars(
+            to_vtk_array(np.ravel(volume, order="F").astype(np.float32), "litho")
+        )
+
+        start = time.perf_counter()
+        legacy = legacy_skins(image, formations)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        skins = skin_polydata(volume, image.GetOrigin(), image.GetSpacing())
+        skin_time = time.perf_counter() - start
+
+        for value, skin in legacy.items():
+            cells = skins[value].GetNumberOfCells() if value in skins else 0
+            assert skin.GetNumberOfCells() == cells
+        print(
+            f"{formations:>10} {legacy_time:>18.3f} {skin_time:>16.3f} "
+            f"{legacy_time / skin_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
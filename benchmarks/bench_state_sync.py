@@ -0,0 +1,124 @@
+r"""
+Client state pushed per point edit on a surface with many points: whole
+lists (apps without patch_state), list patches and a single page of the list.
+
+Bytes are the JSON size of the values that changed (trame does not send the
+others) and of the patches, time includes the GemPy update of the edit.
+
+    python benchmarks/bench_state_sync.py [--points 10000] [--edits 50]
+        [--page-size 50]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from conceptual_modeler.app.modeler.subsurface import SubSurface, apply_patch
+
+
+class RecordingApp:
+    def __init__(self):
+        self.state = {}
+        self.bytes = 0
+        self.messages = 0
+
+    def push_state(self, key, value):
+        if key in self.state and self.state[key] == value:
+            return
+        self.state[key] = value
+        self.bytes += len(json.dumps({key: value}))
+        self.messages += 1
+
+
+class PatchingApp(RecordingApp):
+    def patch_state(self, key, ops):
+        self.state[key] = apply_patch(list(self.state[key]), ops)
+        self.bytes += len(json.dumps({"key": key, "ops": ops}))
+        self.messages += 1
+
+
+def model(app, points, page_size):
+    subsurface = SubSurface(app, figures=False)
+    subsurface.update_list_view("points", page_size=page_size)
+    subsurface.add("Stack", {"name": "Layers", "feature": "Erosion"})
+    stack = subsurface.state_handler.find_stack_by_name("Layers")
+    subsurface.select("Stack", stack.id)
+    subsurface.add("Surface", {"name": "layer", "stackid": stack.id})
+    subsurface.add("Surface", {"name": "other", "stackid": stack.id})
+    surface = subsurface.state_handler.find_surface_by_name("layer")
+    subsurface.select("Surface", surface.id)
+
+    rng = np.random.default_rng(0)
+    for x, y, z in rng.uniform(0, 100, (points, 3)):
+        subsurface.add(
+            "Point", {"x": x, "y": y, "z": z, "surfaceid": surface.id}, dirtying=False
+        )
+    subsurface.dirty_state("Point")
+    return subsurface, surface
+
+
+def measure(app, points, edits, page_size):
+    subsurface, surface = model(app, points, page_size)
+    other = subsurface.state_handler.find_surface_by_name("other")
+    results = {}
+
+    def run(name, edit):
+        app.bytes = app.messages = 0
+        start = time.perf_counter()
+        for index in range(edits):
+            edit(index)
+        elapsed = time.perf_counter() - start
+        results[name] = (
+            app.bytes / edits,
+            app.messages / edits,
+            elapsed / edits * 1000,
+        )
+
+    run(
+        "add",
+        lambda i: subsurface.add(
+            "Point", {"x": i, "y": i, "z": i, "surfaceid": surface.id}
+        ),
+    )
+    run("select", lambda i: subsurface.select("Point", surface.points.ids[i]))
+    run("remove", lambda i: subsurface.remove("Point", surface.points.ids[-1]))
+    # Back and forth from another surface
+    run(
+        "surface",
+        lambda i: [subsurface.select("Surface", id) for id in (other.id, surface.id)],
+    )
+    if page_size > 0:
+        run("page", lambda i: subsurface.update_list_view("points", page=i % 10 + 2))
+        run(
+            "filter",
+            lambda i: subsurface.update_list_view("points", filter=f"{i % 10}.5"),
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>8} {'edit':>8} {'bytes/edit':>12} {'msgs/edit':>10} {'ms/edit':>9}"
+    )
+    modes = [
+        ("full", RecordingApp(), -1),
+        ("patch", PatchingApp(), -1),
+        ("page", PatchingApp(), args.page_size),
+    ]
+    for mode, app, page_size in modes:
+        results = measure(app, args.points, args.edits, page_size)
+        for edit, (size, messages, latency) in results.items():
+            print(
+                f"{mode:>8} {edit:>8} {size:>12.0f} {messages:>10.1f} {latency:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+r"""
+Build time of the topography surface and contours: the former per point
+polydata + one vtkDelaunay2D per actor against the structured grid built
+from the raster in one NumPy step and shared by both actors.
+
+The per point path is skipped above --legacy-max points per side, it takes
+about 20 minutes on a 2000x2000 DEM.
+
+    python benchmarks/bench_topography.py [--sizes 200 2000] [--legacy-max 500]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vtkmodules.vtkCommonCore import vtkFloatArray, vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkContourFilter, vtkDelaunay2D
+
+from conceptual_modeler.app.modeler.vtk_utils import topography_grid
+
+
+def random_dem(n):
+    # Same layout as GemPy topographies: values_2d (nx, ny, 3) reshaped, y fastest
+    x, y = np.meshgrid(np.linspace(0, 1000, n), np.linspace(0, 1000, n), indexing="ij")
+    z = 400 + 50 * np.sin(x / 90.0) * np.cos(y / 130.0)
+    return np.dstack([x, y, z]).reshape(-1, 3)
+
+
+def legacy_triangulation(point_list):
+    points = vtkPoints()
+    vertices = vtkCellArray()
+    field = vtkFloatArray()
+    field.SetName("elevation")
+    field.SetNumberOfComponents(1)
+    for p in point_list:
+        field.InsertNextTuple([p[2]])
+        point_id = points.InsertNextPoint(p)
+        vertices.InsertNextCell(1)
+        vertices.InsertCellPoint(point_id)
+    polydata = vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetVerts(vertices)
+    polydata.GetPointData().AddArray(field)
+    polydata.GetPointData().SetActiveScalars("elevation")
+    delaunay = vtkDelaunay2D()
+    delaunay.SetInputData(polydata)
+    delaunay.Update()
+    return delaunay.GetOutput()
+
+
+def contours(dataset):
+    contour = vtkContourFilter()
+    contour.SetInputData(dataset)
+    contour.GenerateValues(10, dataset.GetPointData().GetArray("elevation").GetRange())
+    contour.Update()
+    return contour.GetOutput()
+
+
+def legacy(point_list):
+    # Surface and contours each triangulated their own copy of the points
+    legacy_triangulation(point_list)
+    return contours(legacy_triangulation(point_list))
+
+
+def structured(point_list):
+    return contours(topography_grid(point_list))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument("--legacy-max", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{'DEM':>10} {'per point + delaunay (s)':>25} {'structured (s)':>15} {'speedup':>8}"
+    )
+    for n in args.sizes:
+        values = random_dem(n)
+        start = time.perf_counter()
+        lines = structured(values)
+        structured_time = time.perf_counter() - start
+
+        if n > args.legacy_max:
+            print(f"{n:>4}x{n:<5} {'skipped':>25} {structured_time:>15.3f}")
+            continue
+        start = time.perf_counter()
+        reference = legacy(values)
+        legacy_time = time.perf_counter() - start
+        print(
+            f"{n:>4}x{n:<5} {legacy_time:>25.3f} {structured_time:>15.3f} "
+            f"{legacy_time / structured_time:>7.0f}x"
+            f"  ({reference.GetNumberOfCells()} vs {lines.GetNumberOfCells()} contour segments)"
+        )
+
+
+if __name__ == "__main__":
+    main()
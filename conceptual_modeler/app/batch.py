@@ -0,0 +1,137 @@
+r"""
+Headless batch compute of conceptual models
+
+Each model zip (same layout as the UI import: grid.csv, stacks.csv,
+surfaces.csv, points.csv, orientations.csv and an optional topography.zip)
+is loaded into a SubSurface without the trame server nor the matplotlib
+figures, computed, and its lithology written to <output>/<model name>/.
+
+    conceptual-modeler-batch models/*.zip --output results --format npz pfb
+"""
+import argparse
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import numpy as np
+
+from .modeler.export import write_simulation_grid
+from .modeler.interpolator import DEFAULT_PROFILE, INTERPOLATOR_PROFILES
+from .modeler.solution_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, SolutionCache
+from .modeler.subsurface import SubSurface
+
+FORMATS = ["npz", "pfb"]
+
+
+class HeadlessApp:
+    """Stand-in for ApplicationLogic, client state is not needed in batch"""
+
+    def push_state(self, key, value):
+        pass
+
+    def patch_state(self, key, ops):
+        pass
+
+
+def grid_spacing(subsurface):
+    grid = subsurface.state_handler.grid
+    extent, resolution = grid.extent, grid.resolution
+    return tuple((extent[2 * i + 1] - extent[2 * i]) / resolution[i] for i in range(3))
+
+
+def compute_model(model_file, output, formats, solution_cache=None, profile=None):
+    output = Path(output) / Path(model_file).stem
+    output.mkdir(parents=True, exist_ok=True)
+
+    subsurface = SubSurface(
+        HeadlessApp(), solution_cache, profile=profile, figures=False
+    )
+    if not subsurface.parse_zip_file({"content": Path(model_file).read_bytes()}):
+        raise ValueError(f"Bad model zip {model_file}")
+    subsurface.compute_geo_model()
+
+    litho = subsurface.lithology()
+    if litho is None:
+        raise ValueError("GemPy solution does not match the model grid")
+    grid = subsurface.state_handler.grid
+    written = []
+    if "npz" in formats:
+        np.savez_compressed(
+            output / "lithology.npz",
+            lithology=litho,
+            extent=np.asarray(grid.extent, dtype=np.float64),
+            resolution=np.asarray(grid.resolution),
+        )
+        written.append(output / "lithology.npz")
+    if "pfb" in formats:
+        written.extend(write_simulation_grid(litho, grid_spacing(subsurface), output))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("models", nargs="+", help="Model zip files")
+    parser.add_argument("-o", "--output", default=".", help="Output directory")
+    parser.add_argument(
+        "--format", dest="formats", nargs="+", choices=FORMATS, default=["npz"]
+    )
+    parser.add_argument(
+        "--interpolator-profile",
+        help=(
+            "GemPy interpolator profile: "
+            f"{', '.join(INTERPOLATOR_PROFILES)} or optimizer:dtype:output"
+        ),
+        default=DEFAULT_PROFILE,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory of the GemPy solution cache",
+        default=str(DEFAULT_CACHE_DIR),
+    )
+    parser.add_argument(
+        "--cache-size",
+        help="Size cap of the GemPy solution cache in MB (0 to disable)",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true", help="Stop at the first model that fails"
+    )
+    args = parser.parse_args(argv)
+
+    solution_cache = None
+    if args.cache_size > 0:
+        solution_cache = SolutionCache(args.cache_dir, args.cache_size << 20)
+
+    computed, failures = 0, 0
+    for model_file in args.models:
+        start = time.time()
+        try:
+            written = compute_model(
+                model_file,
+                args.output,
+                args.formats,
+                solution_cache=solution_cache,
+                profile=args.interpolator_profile,
+            )
+        except Exception:
+            failures += 1
+            print(f">>> BATCH: {model_file} failed", file=sys.stderr)
+            traceback.print_exc()
+            if args.fail_fast:
+                break
+            continue
+        computed += 1
+        elapsed = time.time() - start
+        outputs = ", ".join(str(path) for path in written)
+        print(f">>> BATCH: {model_file} computed in {elapsed:.2f}s -> {outputs}")
+
+    print(f">>> BATCH: {computed}/{len(args.models)} models computed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
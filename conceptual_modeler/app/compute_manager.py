@@ -0,0 +1,129 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from trame.app import asynchronous
+
+# Progress reported for each stage of a run
+PROGRESS = {
+    "idle": 0,
+    "queued": 0,
+    "running": 10,
+    "rendering": 80,
+    "done": 100,
+    "cancelled": 0,
+    "error": 0,
+}
+
+
+class ComputeManager:
+    def __init__(self, state, name, compute, on_done):
+        self._state = state
+        self._name = name
+        self._compute = compute
+        self._on_done = on_done
+        # GemPy models are not thread safe, keep a single worker
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._task = None
+        self._prepared = None
+        self._pending = False
+        self._generation = 0
+        # Model edits waiting for the worker to let go of the model
+        self._edits = []
+        self._state[f"{name}_status"] = "idle"
+        self._state[f"{name}_progress"] = PROGRESS["idle"]
+        self._state[f"{name}_time"] = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def busy(self):
+        """The worker is using the model (compute or prepare)"""
+        preparing = self._prepared is not None and not self._prepared.done()
+        return self.running or preparing
+
+    def _push(self, status, elapsed=None):
+        with self._state:
+            self._state[f"{self._name}_status"] = status
+            self._state[f"{self._name}_progress"] = PROGRESS[status]
+            if elapsed is not None:
+                self._state[f"{self._name}_time"] = round(elapsed, 2)
+
+    def request(self):
+        # Coalesce with the run in flight, repeated requests become one job
+        if self.running:
+            self._pending = True
+            self._push("queued")
+            return
+
+        self._task = asynchronous.create_task(self._run())
+
+    def prepare(self, fn):
+        # Runs on the compute worker, so it completes before any queued compute
+        loop = asyncio.get_event_loop()
+        self._prepared = self._executor.submit(fn)
+        self._prepared.add_done_callback(
+            lambda future: loop.call_soon_threadsafe(self._prepare_done)
+        )
+        return self._prepared
+
+    def _prepare_done(self):
+        # A run queued behind prepare applies the edits once it is done
+        if not self.running:
+            self._apply_edits()
+
+    def invalidate(self):
+        # The model changed, the result of the run in flight is stale
+        self._generation += 1
+
+    def edit(self, fn, *args, **kwargs):
+        """Apply a model edit on the loop, once the worker is done with the model
+
+        GemPy reads the model from the worker thread, so edits made during a
+        run are queued and applied in order right after it.
+        """
+        if self.busy or self._edits:
+            self._edits.append((fn, args, kwargs))
+            return
+        fn(*args, **kwargs)
+
+    def _apply_edits(self):
+        while self._edits:
+            fn, args, kwargs = self._edits.pop(0)
+            try:
+                with self._state:
+                    fn(*args, **kwargs)
+            except Exception as error:
+                print(f">>> COMPUTE: Deferred model edit failed with {error}")
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            self._pending = False
+            generation = self._generation
+            start = time.time()
+            self._push("running")
+            try:
+                await loop.run_in_executor(self._executor, self._compute)
+            except Exception as error:
+                self._apply_edits()
+                if generation == self._generation:
+                    print(f">>> COMPUTE: Failed with {error}")
+                    self._push("error", time.time() - start)
+                else:
+                    self._push("cancelled", time.time() - start)
+            else:
+                self._apply_edits()
+                if generation != self._generation:
+                    print(">>> COMPUTE: Model edited during compute, result dropped")
+                    self._push("cancelled", time.time() - start)
+                else:
+                    self._push("rendering")
+                    with self._state:
+                        self._on_done()
+                    self._push("done", time.time() - start)
+
+            if not self._pending:
+                break
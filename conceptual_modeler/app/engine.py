@@ -6,11 +6,25 @@ import time
 
 from pathlib import Path
 
+from trame.widgets.matplotlib import Figure
+
+from . import compute_manager as cm
 from . import pipeline_manager as pm
 from . import matplotlib_manager as mm
-
-from .modeler.subsurface import SubSurface
+from . import view_scheduler as vs
+
+from .modeler.interpolator import DEFAULT_PROFILE, INTERPOLATOR_PROFILES
+from .modeler.sections import (
+    DEFAULT_IMAGE_QUALITY,
+    DEFAULT_SLICE_CACHE_SIZE,
+    IMAGE_FORMATS,
+    SliceCache,
+    data_url,
+)
+from .modeler.solution_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, SolutionCache
+from .modeler.subsurface import PATCHED_LISTS, SubSurface, apply_patch, list_view_keys
 from .modeler.visualization import VtkViewer
+from .modeler.vtk_utils import DEFAULT_TOPOGRAPHY_MAX_POINTS
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -45,6 +59,8 @@ TOPOGRAPHY_CATEGORY = {"random": 0, "gdal": 1, "saved": 2}
 class ApplicationLogic:
     def __init__(self, server):
         self._server = server
+        # Set by the first compute request (or the warm start compile)
+        self._first_request_time = None
 
         # CLI
         self._server.cli.add_argument(
@@ -53,6 +69,106 @@ class ApplicationLogic:
             dest="data",
             default=None,
         )
+        self._server.cli.add_argument(
+            "--interpolator-profile",
+            help=(
+                "GemPy interpolator profile: "
+                f"{', '.join(INTERPOLATOR_PROFILES)} or optimizer:dtype:output"
+            ),
+            dest="interpolator_profile",
+            default=DEFAULT_PROFILE,
+        )
+        self._server.cli.add_argument(
+            "--cache-dir",
+            help="Directory of the GemPy solution cache",
+            dest="cache_dir",
+            default=str(DEFAULT_CACHE_DIR),
+        )
+        self._server.cli.add_argument(
+            "--cache-size",
+            help="Size cap of the GemPy solution cache in MB (0 to disable)",
+            dest="cache_size",
+            type=int,
+            default=DEFAULT_CACHE_SIZE,
+        )
+        self._server.cli.add_argument(
+            "--slice-cache-size",
+            help="Size cap of the rasterized 2D sections cache in MB",
+            dest="slice_cache_size",
+            type=int,
+            default=DEFAULT_SLICE_CACHE_SIZE,
+        )
+        self._server.cli.add_argument(
+            "--sections",
+            help=(
+                "2D sections as matplotlib figures, as server side rendered images "
+                "or only as slices of the 3D view (vtk)"
+            ),
+            dest="sections",
+            choices=["figure", "image", "vtk"],
+            default="figure",
+        )
+        self._server.cli.add_argument(
+            "--topography-max-points",
+            help="Vertex budget of the topography in the 3D view (GemPy keeps the full DEM)",
+            dest="topography_max_points",
+            type=int,
+            default=DEFAULT_TOPOGRAPHY_MAX_POINTS,
+        )
+        self._server.cli.add_argument(
+            "--glyphs",
+            help=(
+                "Surface points and orientations as one glyph actor per formation "
+                "or as a single actor shared by all formations"
+            ),
+            dest="glyphs",
+            choices=["per-formation", "shared"],
+            default="per-formation",
+        )
+        self._server.cli.add_argument(
+            "--section-format",
+            help="Image format of the 2D sections in image mode",
+            dest="section_format",
+            choices=list(IMAGE_FORMATS),
+            default="png",
+        )
+        self._server.cli.add_argument(
+            "--section-quality",
+            help="Quality (1-100) of the webp/jpeg 2D sections in image mode",
+            dest="section_quality",
+            type=int,
+            default=DEFAULT_IMAGE_QUALITY,
+        )
+        self._server.cli.add_argument(
+            "--view-debounce",
+            help="Delay in ms used to coalesce 2D view updates (0 to render immediately)",
+            dest="view_debounce",
+            type=int,
+            default=50,
+        )
+        self._server.cli.add_argument(
+            "--view-max-wait",
+            help="Longest delay in ms of a 2D view update while requests keep coming",
+            dest="view_max_wait",
+            type=int,
+            default=250,
+        )
+        self._server.cli.add_argument(
+            "--warm-start",
+            help="Compile the GemPy interpolator in the background once the server is ready",
+            dest="warm_start",
+            action="store_true",
+        )
+        args, _ = self._server.cli.parse_known_args()
+        self._sections = args.sections
+        self._section_format = args.section_format
+        self._section_quality = args.section_quality
+        # Last encoded image per direction, identical redraws are not pushed
+        self._section_images = {}
+        solution_cache = None
+        if args.cache_size > 0:
+            solution_cache = SolutionCache(args.cache_dir, args.cache_size << 20)
+
         # initialize state + controller
         state, ctrl = server.state, server.controller
 
@@ -74,16 +190,49 @@ class ApplicationLogic:
                 "VIEW_FIGX": False,
                 "VIEW_FIGY": False,
                 "VIEW_FIGZ": False,
+                "sections_mode": self._sections,
+                "x_section_image": "",
+                "y_section_image": "",
+                "z_section_image": "",
+                "time_to_first_compute": None,
+                "interpolator_compile_time": None,
+                "state_patch": None,
             }
         )
+        # Patched on the client (see patch_state), never sent back
+        self._state_patches = 0
+        state.client_only(*PATCHED_LISTS)
 
         self._x_fig = mm.MatplotlibManager(state, "x_figure_size")
         self._y_fig = mm.MatplotlibManager(state, "y_figure_size")
         self._z_fig = mm.MatplotlibManager(state, "z_figure_size")
 
         self._pipeline_manager = pm.PipelineManager(state, "pipeline_tree")
-        self._subsurface = SubSurface(self)
-        self._viz = VtkViewer(self, self._subsurface)
+        self._subsurface = SubSurface(
+            self,
+            solution_cache,
+            profile=args.interpolator_profile,
+            figures=self._sections != "vtk",
+            slice_cache=SliceCache(args.slice_cache_size << 20),
+            topography_max_points=args.topography_max_points,
+        )
+        self._viz = VtkViewer(
+            self,
+            self._subsurface,
+            sections_visible=self._sections == "vtk",
+            shared_glyphs=args.glyphs == "shared",
+            topography_max_points=args.topography_max_points,
+        )
+        self._view_scheduler = vs.ViewScheduler(
+            state, "view_metrics", args.view_debounce / 1000, args.view_max_wait / 1000
+        )
+        self._view_scheduler.register("x", self.update_viewX)
+        self._view_scheduler.register("y", self.update_viewY)
+        self._view_scheduler.register("z", self.update_viewZ)
+        self._view_scheduler.register("3d", self.update_view3D)
+        self._compute_manager = cm.ComputeManager(
+            state, "compute", self._subsurface.compute_geo_model, self.on_compute_done
+        )
 
         ctrl.on_pipeline_action = self.on_pipeline_action
         ctrl.pipeline_actives_change = self.pipeline_actives_change
@@ -96,12 +245,20 @@ class ApplicationLogic:
         ctrl.ss_remove = self.ss_remove
         ctrl.theme_mode = self.theme_mode
 
+        if args.warm_start:
+            ctrl.on_server_ready.add(self.warm_start)
+
         ctrl.compute_geo_model = self._subsurface.compute_geo_model
+        ctrl.request_compute = self.request_compute
+        ctrl.request_view = self._view_scheduler.request
+        ctrl.invalidate_compute = self._compute_manager.invalidate
+        ctrl.edit_model = self._compute_manager.edit
         ctrl.import_data = self._subsurface.import_data
         ctrl.parse_zip_file = self._subsurface.parse_zip_file
         ctrl.subsurface_update_grid = self._subsurface.update_grid
         ctrl.subsurface_update_topography = self._subsurface.update_topography
         ctrl.update_topography_file = self._subsurface.update_topography_file
+        ctrl.update_list_view = self._subsurface.update_list_view
 
         ctrl.compute = self._viz.compute
         ctrl.getRenderWindow = self._viz.getRenderWindow
@@ -115,6 +272,7 @@ class ApplicationLogic:
         ctrl.zfig_size = self._z_fig.size
         ctrl.update_zfig = self._viz.update_zfig
         ctrl.viz_update_grid = self._viz.update_grid
+        ctrl.viz_set_slices = self._viz.set_slices
         ctrl.viz_update_topography = self._viz.update_topography
         ctrl.save_simulation_grid = self._viz.save_simulation_grid
 
@@ -127,36 +285,111 @@ class ApplicationLogic:
             state.topography_category = TOPOGRAPHY_CATEGORY[value["category"]]
         state[key] = value
 
+    def patch_state(self, key, ops):
+        state = self._server.state
+        # Send pending values first, the patch applies on top of them
+        state.flush()
+        # Keep the server copy in sync without pushing it
+        state[key] = apply_patch(list(state[key]), ops)
+        state.clean(key)
+        self._state_patches += 1
+        state.state_patch = {"key": key, "ops": ops, "seq": self._state_patches}
+        state.flush()
+
+    def request_compute(self):
+        if self._first_request_time is None:
+            self._first_request_time = time.time()
+        self._compute_manager.request()
+
+    def warm_start(self, **kwargs):
+        print(">>> ENGINE: Warm start of the interpolator...")
+        if self._first_request_time is None:
+            self._first_request_time = time.time()
+        self._compute_manager.prepare(self._subsurface.compile_interpolator)
+
+    def on_compute_done(self):
+        print(">>> ENGINE: Compute done...")
+        state, ctrl = self._server.state, self._server.controller
+        # Runs on the loop for the current generation only, stale runs never
+        # reach the section figures
+        self._subsurface.update_sections()
+        if state.time_to_first_compute is None:
+            state.time_to_first_compute = round(
+                time.time() - self._first_request_time, 2
+            )
+            compile_time = self._subsurface.interpolator_compile_time
+            if compile_time is not None:
+                state.interpolator_compile_time = round(compile_time, 2)
+            logger.info(
+                f">>> ENGINE: Time to first compute {state.time_to_first_compute}s"
+            )
+        ctrl.compute(computing=True)
+        if (state.VIEW_3D):
+            ctrl.view_3D_update()
+        self._view_scheduler.request("x", "y", "z")
+
     def theme_mode(self, event):
         print(">>> ENGINE: Theme mode...")
         self._subsurface.set_theme_mode(event)
-        self.update_viewX()
-        self.update_viewY()
-        self.update_viewZ()
+        self._view_scheduler.request("x", "y", "z")
     
+    def update_section_image(self, direction, size, slice):
+        state = self._server.state
+        data = self._subsurface.section_image(
+            direction,
+            **size,
+            cell_number=[slice],
+            format=self._section_format,
+            quality=self._section_quality,
+        )
+        if self._section_images.get(direction) == data:
+            return
+        self._section_images[direction] = data
+        state[f"{direction}_section_image"] = data_url(data, self._section_format)
+
+    def section_spec(self, direction, size, slice):
+        return self._subsurface.section_spec(
+            direction, Figure.to_data, **size, cell_number=[slice]
+        )
+
     def update_viewX(self):
         print(">>> ENGINE: Update view x...")
         state, ctrl = self._server.state, self._server.controller
         if (state.VIEW_FIGX):
+            if self._sections == "image":
+                self.update_section_image("x", ctrl.xfig_size(), state.slice_x)
+                return
             ctrl.view_x_update(
-                figure=ctrl.update_xfig(**ctrl.xfig_size(), cell_number=[state.slice_x])
+                spec=self.section_spec("x", ctrl.xfig_size(), state.slice_x)
             )
 
     def update_viewY(self):
         print(">>> ENGINE: Update view y...")
         state, ctrl = self._server.state, self._server.controller
         if (state.VIEW_FIGY):
+            if self._sections == "image":
+                self.update_section_image("y", ctrl.yfig_size(), state.slice_y)
+                return
             ctrl.view_y_update(
-                figure=ctrl.update_yfig(**ctrl.yfig_size(), cell_number=[state.slice_y])
+                spec=self.section_spec("y", ctrl.yfig_size(), state.slice_y)
             )
 
     def update_viewZ(self):
         print(">>> ENGINE: Update view z...")
         state, ctrl = self._server.state, self._server.controller
         if (state.VIEW_FIGZ):
+            if self._sections == "image":
+                self.update_section_image("z", ctrl.zfig_size(), state.slice_z)
+                return
             ctrl.view_z_update(
-                figure=ctrl.update_zfig(**ctrl.zfig_size(), cell_number=[state.slice_z])
+                spec=self.section_spec("z", ctrl.zfig_size(), state.slice_z)
             )
+
+    def update_view3D(self):
+        print(">>> ENGINE: Update view 3D...")
+        state, ctrl = self._server.state, self._server.controller
+        if (state.VIEW_3D):
+            ctrl.view_3D_update()
   
     def get_pipeline(self, id):
         print(">>> ENGINE: Get pipeline...")
@@ -225,13 +458,15 @@ class ApplicationLogic:
 
     def ss_move(self, type, direction):
         print(">>> ENGINE: SS move...")
-        self._subsurface.move(type, direction)
+        self._compute_manager.invalidate()
+        self._compute_manager.edit(self._subsurface.move, type, direction)
 
     def ss_new(self, type, data):
         state = self._server.state
 
         print(">>> ENGINE: SS new...")
-        self._subsurface.add(type, data)
+        self._compute_manager.invalidate()
+        self._compute_manager.edit(self._subsurface.add, type, data)
         state[f"{type.lower()}New"] = DEFAULT_NEW[type]
 
     def ss_new_with_id(self, type, data, idname, id):
@@ -239,12 +474,14 @@ class ApplicationLogic:
 
         print(">>> ENGINE: SS new with id...")
         data[idname] = id
-        self._subsurface.add(type, data)
+        self._compute_manager.invalidate()
+        self._compute_manager.edit(self._subsurface.add, type, data)
         state[f"{type.lower()}New"] = DEFAULT_NEW[type]
 
     def ss_remove(self, type, id):
         print(">>> ENGINE: SS remove...")
-        self._subsurface.remove(type, id)
+        self._compute_manager.invalidate()
+        self._compute_manager.edit(self._subsurface.remove, type, id)
 
 # ---------------------------------------------------------
 # Server binding
@@ -257,21 +494,16 @@ def initialize(server):
     def compute(run, **kwargs):
         print(">>> ENGINE: Computing...")
         if run:
-            ctrl.compute_geo_model()
-            ctrl.compute(computing=True)
+            # GemPy runs in a worker, the views are refreshed once it is done
+            ctrl.request_compute()
             state.run = False
-            print("compute", ctrl.view_3D_update)
-            if (state.VIEW_3D):
-                ctrl.view_3D_update()
-            update_viewX()
-            update_viewY()
-            update_viewZ()
 
     @state.change("import_model_file")
     def import_model(import_model_file, **kwargs):
         print(">>> ENGINE: Importing model...")
         if import_model_file:
-            ctrl.parse_zip_file(import_model_file)
+            ctrl.invalidate_compute()
+            ctrl.edit_model(ctrl.parse_zip_file, import_model_file)
             state.import_state_alert = True
             state.import_state = False
             state.import_model_file = None
@@ -279,7 +511,8 @@ def initialize(server):
     @state.change("importFile")
     def import_file(importType, importFile, **kwargs):
         if importFile:
-            ctrl.import_data(importType, importFile)
+            ctrl.invalidate_compute()
+            ctrl.edit_model(ctrl.import_data, importType, importFile)
         state.importFile = None
 
     @state.change("demo_state")
@@ -290,7 +523,8 @@ def initialize(server):
         print(">>> ENGINE: Importing demonstration model...")
         if demo_state:
             demo_file = dict(content = Path(args.data).read_bytes(), _filter = ['content'])
-            ctrl.parse_zip_file(demo_file)
+            ctrl.invalidate_compute()
+            ctrl.edit_model(ctrl.parse_zip_file, demo_file)
             state.demo_state_alert = True
             state.demo_state = False
 
@@ -351,75 +585,77 @@ def initialize(server):
         state.slider_y_max = slider_y_max
         slider_z_max = resolution[2] - 1
         state.slider_z_max = slider_z_max
-        dirty_subsurface = ctrl.subsurface_update_grid(extent, resolution)
-        dirty_viz = ctrl.viz_update_grid()
-        if dirty_viz:
-            ctrl.compute(computing=False)
-            if (state.VIEW_3D):
-                ctrl.view_3D_update()
+
+        def apply_grid():
+            dirty_subsurface = ctrl.subsurface_update_grid(extent, resolution)
+            dirty_viz = ctrl.viz_update_grid()
+            if dirty_subsurface:
+                ctrl.invalidate_compute()
+            if dirty_viz:
+                ctrl.compute(computing=False)
+                if (state.VIEW_3D):
+                    ctrl.view_3D_update()
+
+        # Waits for a GemPy run in flight, see ComputeManager.edit
+        ctrl.edit_model(apply_grid)
 
     @state.change("topography")
     def update_topography(topography, **kwargs):
         print(">>> ENGINE: Update topography...")
         if topography["on"] == True:
-            ctrl.subsurface_update_topography(topography)
-            ctrl.viz_update_topography()
+
+            def apply_topography():
+                if ctrl.subsurface_update_topography(topography):
+                    ctrl.invalidate_compute()
+                ctrl.viz_update_topography()
+
+            # Waits for a GemPy run in flight, see ComputeManager.edit
+            ctrl.edit_model(apply_topography)
 
     @state.change("topography_file")
     def update_topography_file(topography_file, topography, **kwargs):
         print(">>> ENGINE: Update topography file...")
         if topography_file:
-            ctrl.update_topography_file(topography["category"], topography_file)
-            ctrl.viz_update_topography()
-        state.topography_file = None
+            ctrl.invalidate_compute()
 
-    @state.change("slice_x")
-    def update_slice_x(slice_x, **kwargs):
-        print(">>> ENGINE: Update slice x...")
-        if (state.VIEW_FIGX):
-            ctrl.view_x_update(
-                figure=ctrl.update_xfig(**ctrl.xfig_size(), cell_number=[slice_x])
-            )
+            def apply_topography_file():
+                ctrl.update_topography_file(topography["category"], topography_file)
+                ctrl.viz_update_topography()
 
-    @state.change("x_figure_size")
-    def update_viewX(**kwargs):
-        print(">>> ENGINE: Update view x...")
-        if (state.VIEW_FIGX):
-            ctrl.view_x_update(
-                figure=ctrl.update_xfig(**ctrl.xfig_size(), cell_number=[state.slice_x])
-            )
+            ctrl.edit_model(apply_topography_file)
+        state.topography_file = None
 
-    @state.change("slice_y")
-    def update_slice_y(slice_y, **kwargs):
-        print(">>> ENGINE: Update slice y...")
-        if (state.VIEW_FIGY):
-            ctrl.view_y_update(
-                figure=ctrl.update_yfig(**ctrl.yfig_size(), cell_number=[slice_y])
-            )
+    @state.change("slice_x", "x_figure_size")
+    def update_viewX(**kwargs):
+        # Slider drags and resizes come in bursts, only the latest is drawn
+        ctrl.request_view("x")
 
-    @state.change("y_figure_size")
+    @state.change("slice_y", "y_figure_size")
     def update_viewY(**kwargs):
-        print(">>> ENGINE: Update view y...")
-        if (state.VIEW_FIGY):
-            ctrl.view_y_update(
-                figure=ctrl.update_yfig(**ctrl.yfig_size(), cell_number=[state.slice_y])
-            )
+        # Slider drags and resizes come in bursts, only the latest is drawn
+        ctrl.request_view("y")
 
-    @state.change("slice_z")
-    def update_slice_z(slice_z, **kwargs):
-        print(">>> ENGINE: Update slice z...")
-        if (state.VIEW_FIGZ):
-            ctrl.view_z_update(
-                figure=ctrl.update_zfig(**ctrl.zfig_size(), cell_number=[slice_z])
-            )
-
-    @state.change("z_figure_size")
+    @state.change("slice_z", "z_figure_size")
     def update_viewZ(**kwargs):
-        print(">>> ENGINE: Update view z...")
-        if (state.VIEW_FIGZ):
-            ctrl.view_z_update(
-                figure=ctrl.update_zfig(**ctrl.zfig_size(), cell_number=[state.slice_z])
-            )
+        # Slider drags and resizes come in bursts, only the latest is drawn
+        ctrl.request_view("z")
+
+    @state.change("slice_x", "slice_y", "slice_z")
+    def update_slices(slice_x, slice_y, slice_z, **kwargs):
+        # Sections of the 3D view, no matplotlib involved
+        if ctrl.viz_set_slices(slice_x, slice_y, slice_z):
+            ctrl.request_view("3d")
+
+    def list_view_listener(name):
+        # pointsPage, pointsPageSize, ... of the points and orientations cards
+        keys = list_view_keys(name)
+
+        @state.change(*keys.values())
+        def update_list_view(**kwargs):
+            ctrl.update_list_view(name, **{field: kwargs[key] for field, key in keys.items()})
+
+    for name in PATCHED_LISTS:
+        list_view_listener(name)
 
     def protocols_ready(**initial_state):
         #logger.info(f">>> ENGINE(b): Server is ready {initial_state}")
@@ -0,0 +1,187 @@
+r"""
+Ensemble of realizations of one conceptual model
+
+The base model zip is perturbed by a parameter sweep (gaussian noise on the
+surface points and/or random topography seeds) and every realization is
+computed on a pool of processes. Each worker loads the base model and
+compiles its GemPy/Theano interpolator once, then only updates the perturbed
+inputs between realizations. Lithology volumes are written as they complete
+to <output>/realization_XXXX.npz and listed in <output>/manifest.jsonl.
+
+    conceptual-modeler-ensemble models/model-4.zip --output ensemble \
+        --point-seeds 0 1 2 3 --point-sigma 5 --topography-seeds 1515 42 --workers 4
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from .modeler.interpolator import DEFAULT_PROFILE, INTERPOLATOR_PROFILES
+
+# Per process model, set by _init_worker
+_worker = None
+
+
+def sweep(point_seeds=None, point_sigma=0.0, topography_seeds=None):
+    """List the realizations of a parameter sweep"""
+    realizations = []
+    combinations = itertools.product(point_seeds or [None], topography_seeds or [None])
+    for index, (point_seed, topography_seed) in enumerate(combinations):
+        realizations.append(
+            {
+                "index": index,
+                "point_seed": point_seed,
+                "point_sigma": point_sigma if point_seed is not None else 0.0,
+                "topography_seed": topography_seed,
+            }
+        )
+    return realizations
+
+
+class EnsembleWorker:
+    def __init__(self, model_bytes, profile=None):
+        # Imported here so that the parent process does not load GemPy
+        from .batch import HeadlessApp
+        from .modeler.subsurface import SubSurface
+
+        self.subsurface = SubSurface(HeadlessApp(), profile=profile, figures=False)
+        if not self.subsurface.parse_zip_file({"content": model_bytes}):
+            raise ValueError("Bad model zip")
+        self.subsurface.compile_interpolator()
+        surface_points = self.subsurface._geo_model._surface_points.df
+        self.point_index = surface_points.index.tolist()
+        self.point_coordinates = surface_points[["X", "Y", "Z"]].to_numpy(copy=True)
+
+    def perturb_points(self, seed, sigma):
+        coordinates = self.point_coordinates
+        if seed is not None and sigma > 0:
+            rng = np.random.default_rng(seed)
+            coordinates = coordinates + rng.normal(0.0, sigma, coordinates.shape)
+        self.subsurface._geo_model.modify_surface_points(
+            self.point_index,
+            X=coordinates[:, 0],
+            Y=coordinates[:, 1],
+            Z=coordinates[:, 2],
+        )
+
+    def set_topography_seed(self, seed):
+        topography = self.subsurface.state_handler.topography
+        if not topography.on or topography.category != "random":
+            raise ValueError("Topography seeds need a model with a random topography")
+        self.subsurface.update_topography(
+            {**topography.html, "seed": seed}, dirtying=False
+        )
+
+    def run(self, realization, output):
+        start = time.time()
+        self.perturb_points(realization["point_seed"], realization["point_sigma"])
+        if realization["topography_seed"] is not None:
+            self.set_topography_seed(realization["topography_seed"])
+        self.subsurface.compute_geo_model()
+
+        path = Path(output) / f"realization_{realization['index']:04d}.npz"
+        np.savez_compressed(path, lithology=self.subsurface.lithology())
+        return {
+            **realization,
+            "path": str(path),
+            "time": round(time.time() - start, 3),
+            "pid": os.getpid(),
+        }
+
+
+def _init_worker(model_bytes, profile):
+    global _worker
+    _worker = EnsembleWorker(model_bytes, profile)
+
+
+def _run_realization(realization, output):
+    return _worker.run(realization, output)
+
+
+def run_ensemble(model_file, realizations, output, workers=1, profile=None):
+    """Compute the realizations, yielding manifest entries as they complete"""
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    model_bytes = Path(model_file).read_bytes()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_bytes, profile),
+    ) as executor:
+        futures = {
+            executor.submit(_run_realization, realization, str(output)): realization
+            for realization in realizations
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:
+                yield {**futures[future], "error": repr(error)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("model", help="Base model zip file")
+    parser.add_argument("-o", "--output", default="ensemble", help="Output directory")
+    parser.add_argument(
+        "--point-seeds", type=int, nargs="+", help="Seeds of the point perturbations"
+    )
+    parser.add_argument(
+        "--point-sigma",
+        type=float,
+        default=0.0,
+        help="Standard deviation of the point perturbations",
+    )
+    parser.add_argument(
+        "--topography-seeds", type=int, nargs="+", help="Random topography seeds"
+    )
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--interpolator-profile",
+        help=(
+            "GemPy interpolator profile: "
+            f"{', '.join(INTERPOLATOR_PROFILES)} or optimizer:dtype:output"
+        ),
+        default=DEFAULT_PROFILE,
+    )
+    args = parser.parse_args(argv)
+
+    realizations = sweep(args.point_seeds, args.point_sigma, args.topography_seeds)
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    start = time.time()
+    failures = 0
+    with open(output / "manifest.jsonl", "w") as manifest:
+        for entry in run_ensemble(
+            args.model, realizations, output, args.workers, args.interpolator_profile
+        ):
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            if "error" in entry:
+                failures += 1
+                print(
+                    f">>> ENSEMBLE: Realization {entry['index']} failed: {entry['error']}"
+                )
+            else:
+                print(
+                    f">>> ENSEMBLE: Realization {entry['index']} done in {entry['time']}s"
+                )
+
+    print(
+        f">>> ENSEMBLE: {len(realizations) - failures}/{len(realizations)} realizations "
+        f"in {time.time() - start:.2f}s with {args.workers} workers"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
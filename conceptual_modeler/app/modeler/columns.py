@@ -0,0 +1,89 @@
+import numpy as np
+
+DEFAULT_CAPACITY = 16
+
+
+class ColumnStore:
+    """Growable float64 columns of rows keyed by an increasing int64 index
+
+    The rows are kept in insertion order in an (n, len(columns)) block, each
+    column is a strided view of it. The capacity doubles when full so appends
+    are amortized O(1), and values/index are views of the first n rows, shared
+    with the caller without a copy.
+    """
+
+    def __init__(self, columns, capacity=DEFAULT_CAPACITY):
+        self.columns = tuple(columns)
+        self._size = 0
+        self._values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+        self._index = np.empty(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        return self._values[: self._size]
+
+    @property
+    def index(self):
+        return self._index[: self._size]
+
+    def column(self, name):
+        return self._values[: self._size, self.columns.index(name)]
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._index.nbytes
+
+    def _reserve(self, size):
+        capacity = len(self._index)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity = max(capacity * 2, DEFAULT_CAPACITY)
+        values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+        index = np.empty(capacity, dtype=np.int64)
+        values[: self._size] = self.values
+        index[: self._size] = self.index
+        self._values, self._index = values, index
+
+    def append(self, index, row):
+        """Add a row, index must be above the ones already stored"""
+        if self._size and index <= self._index[self._size - 1]:
+            raise ValueError(f"Index {index} is not increasing")
+        self._reserve(self._size + 1)
+        self._values[self._size] = row
+        self._index[self._size] = index
+        self._size += 1
+
+    def extend(self, index, rows):
+        """Add rows at once, see append"""
+        index = np.asarray(index, dtype=np.int64)
+        if not len(index):
+            return
+        if np.any(np.diff(index) <= 0) or (
+            self._size and index[0] <= self._index[self._size - 1]
+        ):
+            raise ValueError("Indices are not increasing")
+        start, end = self._size, self._size + len(index)
+        self._reserve(end)
+        self._values[start:end] = rows
+        self._index[start:end] = index
+        self._size = end
+
+    def find(self, index):
+        """Row of index, None when it is not stored"""
+        row = int(np.searchsorted(self.index, index))
+        if row < self._size and self._index[row] == index:
+            return row
+        return None
+
+    def delete(self, row):
+        """Remove a row, the following ones move up to keep the order"""
+        self._values[row : self._size - 1] = self._values[row + 1 : self._size]
+        self._index[row : self._size - 1] = self._index[row + 1 : self._size]
+        self._size -= 1
+
+    def clear(self):
+        self._size = 0
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import numpy as np
+
+from parflow.tools.io import write_pfb
+
+
+def align_to_surface(litho):
+    """Move all layers up so that the surface aligns with the top of the domain
+
+    litho is an (nx, ny, nz) array of cell labels where air cells are -1.
+    Returns the shifted labels and the DEM (in cells) of the original surface.
+    """
+    dims = litho.shape
+    height = np.tile(np.arange(dims[2]).transpose(), (dims[0], dims[1], 1))
+    air2d = np.count_nonzero(litho == -1, axis=2)
+    air = np.tile(air2d.reshape(dims[0], dims[1], 1), (1, 1, dims[2]))
+    # shift height up so that the surface is at the top
+    height_top = np.mod(height - air, dims[2])
+    # shift litho so that the surface is at the top
+    xi, yi, _ = np.indices(dims)
+    litho_top = litho[xi, yi, height_top]
+    # compute DEM
+    dem = height_top[:, :, dims[2] - 1]
+    dem = dem - np.amin(dem)
+    return litho_top, dem
+
+
+def write_simulation_grid(litho, spacing, directory="."):
+    """Write the ParFlow grid.pfb and dem.pfb of an (nx, ny, nz) lithology"""
+    directory = Path(directory)
+    dx, dy, dz = spacing
+    litho_top, dem = align_to_surface(litho)
+
+    grid_file = directory / "grid.pfb"
+    write_pfb(
+        str(grid_file),
+        litho_top.astype(dtype=np.float64),
+        dx=dx,
+        dy=dy,
+        dz=dz,
+        z_first=False,
+    )
+    dem_file = directory / "dem.pfb"
+    write_pfb(
+        str(dem_file),
+        dem.reshape(dem.shape[0], dem.shape[1], 1).astype(dtype=np.float64),
+        dx=dx,
+        dy=dy,
+        dz=dz,
+        z_first=False,
+    )
+    return grid_file, dem_file
@@ -0,0 +1,64 @@
+r"""
+GemPy interpolator profiles
+
+A profile selects the Theano optimizer, the floating point type and the
+outputs of the interpolator graph. It is given either by name or as
+"optimizer:dtype:output+output", e.g. "fast_run:float32:geology".
+"""
+
+OPTIMIZERS = ["fast_compile", "fast_run"]
+DTYPES = ["float64", "float32"]
+OUTPUTS = ["geology", "gravity", "magnetics"]
+
+INTERPOLATOR_PROFILES = {
+    # Cheapest graph compile, slower interpolation
+    "fast_compile": {
+        "theano_optimizer": "fast_compile",
+        "dtype": "float64",
+        "output": ["geology"],
+    },
+    # Longer compile, faster interpolation on large grids
+    "fast_run": {
+        "theano_optimizer": "fast_run",
+        "dtype": "float64",
+        "output": ["geology"],
+    },
+    "fast_run_float32": {
+        "theano_optimizer": "fast_run",
+        "dtype": "float32",
+        "output": ["geology"],
+    },
+}
+
+DEFAULT_PROFILE = "fast_compile"
+
+
+def parse_profile(text=None):
+    """Return the set_interpolator keywords of a profile name or spec"""
+    text = text or DEFAULT_PROFILE
+    if text in INTERPOLATOR_PROFILES:
+        profile = INTERPOLATOR_PROFILES[text]
+        return {**profile, "output": list(profile["output"])}
+
+    parts = text.split(":")
+    if len(parts) != 3:
+        raise ValueError(
+            f"Unknown interpolator profile {text!r}, expected one of "
+            f"{', '.join(INTERPOLATOR_PROFILES)} or optimizer:dtype:output"
+        )
+    optimizer, dtype, output = parts
+    output = [name for name in output.split("+") if name]
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Unknown theano optimizer {optimizer!r}")
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown interpolator dtype {dtype!r}")
+    if not output or any(name not in OUTPUTS for name in output):
+        raise ValueError(f"Unknown interpolator output {'+'.join(output)!r}")
+    if "geology" not in output:
+        # Lithologies, sections and the solution cache all need the geology
+        raise ValueError(f"Interpolator output {'+'.join(output)!r} lacks geology")
+    return {"theano_optimizer": optimizer, "dtype": dtype, "output": output}
+
+
+def profile_name(profile):
+    return f"{profile['theano_optimizer']}:{profile['dtype']}:{'+'.join(profile['output'])}"
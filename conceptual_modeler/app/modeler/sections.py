@@ -0,0 +1,285 @@
+import base64
+import io
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+
+DIRECTIONS = "xyz"
+DEFAULT_FIGSIZE = (5.6, 3.36)
+DEFAULT_DPI = 192
+DEFAULT_SLICE_CACHE_SIZE = 64  # MB
+
+# Server side rendering of the sections (see SectionRenderer.render_image)
+IMAGE_FORMATS = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+DEFAULT_IMAGE_QUALITY = 80
+
+# Cache entries drawn from the figure, they depend on its size and style
+RENDERED_KINDS = ["png", "spec"]
+
+
+def color_table(colors):
+    """RGBA lookup table indexed by label + 1, blanked cells (-1) are transparent
+
+    colors maps the lithology ids of the GemPy surfaces to matplotlib colors.
+    """
+    size = max(colors, default=0) + 2
+    table = np.zeros((size, 4), dtype=np.uint8)
+    for label, color in colors.items():
+        table[label + 1] = np.round(np.multiply(to_rgba(color), 255))
+    return table
+
+
+def section_boundaries(labels, extent):
+    """Segments separating different labels of a 2D (nu, nv) section
+
+    extent is (umin, umax, vmin, vmax). Returns an (n, 2, 2) array of
+    segments following the cell edges, ready for a LineCollection.
+    """
+    nu, nv = labels.shape
+    u = np.linspace(extent[0], extent[1], nu + 1)
+    v = np.linspace(extent[2], extent[3], nv + 1)
+
+    # Edges between (i, j) and (i + 1, j) are vertical lines at u[i + 1]
+    i, j = np.nonzero(labels[1:, :] != labels[:-1, :])
+    vertical = np.stack(
+        [np.stack([u[i + 1], v[j]], axis=1), np.stack([u[i + 1], v[j + 1]], axis=1)],
+        axis=1,
+    )
+    # Edges between (i, j) and (i, j + 1) are horizontal lines at v[j + 1]
+    i, j = np.nonzero(labels[:, 1:] != labels[:, :-1])
+    horizontal = np.stack(
+        [np.stack([u[i], v[j + 1]], axis=1), np.stack([u[i + 1], v[j + 1]], axis=1)],
+        axis=1,
+    )
+    return np.concatenate([vertical, horizontal])
+
+
+def data_url(data, format="png"):
+    return f"data:{IMAGE_FORMATS[format]};base64,{base64.b64encode(data).decode()}"
+
+
+class SliceCache:
+    """LRU of rasterized sections bounded in bytes
+
+    Entries are keyed by (direction, kind, index, ...) where kind tells what
+    the entry depends on: "rgba" and "boundaries" only change with the model.
+    The RENDERED_KINDS, "png" for the encoded images (whatever their format)
+    and "spec" for the serialized matplotlib figures, also change with the
+    figure size and the theme; SectionRenderer drops them when either does.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_SLICE_CACHE_SIZE << 20):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Store value, nbytes defaults to the size of an array or bytes value"""
+        if nbytes is None:
+            nbytes = value.nbytes if isinstance(value, np.ndarray) else len(value)
+        if nbytes > self._max_bytes:
+            return value
+        self._drop(key)
+        self._entries[key] = (value, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self._max_bytes:
+            self._drop(next(iter(self._entries)))
+        return value
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def invalidate(self, direction=None, kinds=None):
+        for key in list(self._entries):
+            if (direction is None or key[0] == direction) and (
+                kinds is None or key[1] in kinds
+            ):
+                self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+
+class SectionRenderer:
+    """Persistent figure showing axis aligned sections of a lithology volume
+
+    The figure, its AxesImage and boundary LineCollection are created once;
+    moving through the sections only swaps their data.
+    """
+
+    def __init__(self, direction, cache=None):
+        self._direction = direction
+        self._axis = DIRECTIONS.index(direction)
+        self._cache = cache if cache is not None else SliceCache()
+        self._fig = None
+        self._ax = None
+        self._image = None
+        self._lines = None
+        self._size = None
+        self._layout = None
+        self._labels = None
+        self._table = color_table({})
+        self._extent = (0, 1, 0, 1)
+
+    @property
+    def figure(self):
+        return self._fig
+
+    def set_model(self, labels, extent, colors):
+        """labels is the (nx, ny, nz) lithology, -1 above the topography"""
+        self._labels = None if labels is None else np.rint(labels).astype(np.int32)
+        # Plane axes of the sections, as (umin, umax, vmin, vmax)
+        u, v = [axis for axis in range(3) if axis != self._axis]
+        self._extent = (
+            extent[2 * u],
+            extent[2 * u + 1],
+            extent[2 * v],
+            extent[2 * v + 1],
+        )
+        self._table = color_table(colors)
+        self._cache.invalidate(self._direction)
+
+    def reset(self):
+        """Drop the figure, it is re-created (with the current style) on render"""
+        if self._fig is not None:
+            plt.close(self._fig)
+        self._fig = None
+        self._size = None
+        self._layout = None
+        self._cache.invalidate(self._direction, kinds=RENDERED_KINDS)
+
+    def _create_figure(self, figsize, dpi):
+        self._fig, self._ax = plt.subplots(figsize=figsize, dpi=dpi, frameon=False)
+        self._image = self._ax.imshow(
+            np.zeros((1, 1, 4), dtype=np.uint8),
+            origin="lower",
+            aspect="auto",
+            interpolation="nearest",
+        )
+        self._lines = LineCollection([], colors="black", linewidths=0.5)
+        self._ax.add_collection(self._lines)
+        self._size = (tuple(figsize), dpi)
+
+    def index(self, cell_number=None):
+        """Clamp a gp.plot_2d style cell_number to a valid section index"""
+        if cell_number is None:
+            return self._labels.shape[self._axis] // 2
+        index = cell_number[0] if np.ndim(cell_number) else cell_number
+        return int(np.clip(index, 0, self._labels.shape[self._axis] - 1))
+
+    def section(self, index):
+        """Return the (nu, nv) labels of a section"""
+        return np.take(self._labels, index, axis=self._axis)
+
+    def rgba(self, index):
+        key = (self._direction, "rgba", index)
+        rgba = self._cache.get(key)
+        if rgba is None:
+            labels = self.section(index)
+            # imshow expects rows along v
+            rgba = self._table[np.clip(labels + 1, 0, len(self._table) - 1)]
+            rgba = self._cache.put(key, np.ascontiguousarray(rgba.transpose(1, 0, 2)))
+        return rgba
+
+    def boundaries(self, index):
+        key = (self._direction, "boundaries", index)
+        segments = self._cache.get(key)
+        if segments is None:
+            segments = self._cache.put(
+                key, section_boundaries(self.section(index), self._extent)
+            )
+        return segments
+
+    def _resize(self, figsize, dpi):
+        if self._fig is None:
+            self._create_figure(figsize, dpi)
+        elif self._size != (tuple(figsize), dpi):
+            self._fig.set_size_inches(figsize)
+            self._fig.set_dpi(dpi)
+            self._size = (tuple(figsize), dpi)
+            self._cache.invalidate(self._direction, kinds=RENDERED_KINDS)
+
+    def render_image(
+        self,
+        cell_number=None,
+        figsize=DEFAULT_FIGSIZE,
+        dpi=DEFAULT_DPI,
+        format="png",
+        quality=DEFAULT_IMAGE_QUALITY,
+    ):
+        """Return the encoded bytes of a section rendered server side"""
+        self._resize(figsize, dpi)
+        index = None if self._labels is None else self.index(cell_number)
+        key = (self._direction, "png", index, format, quality)
+        data = self._cache.get(key)
+        if data is None:
+            fig = self.render(cell_number, figsize, dpi)
+            buffer = io.BytesIO()
+            options = {} if format == "png" else {"pil_kwargs": {"quality": quality}}
+            fig.savefig(buffer, format=format, dpi=dpi, **options)
+            data = self._cache.put(key, buffer.getvalue())
+        return data
+
+    def render_spec(
+        self, serialize, cell_number=None, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI
+    ):
+        """Return serialize(figure) of a section, revisited sections are not redrawn
+
+        serialize turns the figure into what the client is sent, such as
+        trame's matplotlib.Figure.to_data, and must return JSON data.
+        """
+        self._resize(figsize, dpi)
+        index = None if self._labels is None else self.index(cell_number)
+        key = (self._direction, "spec", index)
+        spec = self._cache.get(key)
+        if spec is None:
+            spec = serialize(self.render(cell_number, figsize, dpi))
+            spec = self._cache.put(key, spec, nbytes=len(json.dumps(spec)))
+        return spec
+
+    def render(self, cell_number=None, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI):
+        self._resize(figsize, dpi)
+
+        if self._labels is None:
+            self._image.set_data(np.zeros((1, 1, 4), dtype=np.uint8))
+            self._lines.set_segments([])
+        else:
+            index = self.index(cell_number)
+            self._image.set_data(self.rgba(index))
+            self._lines.set_segments(self.boundaries(index))
+
+        # Only lay the figure out again when its size or the axes limits change
+        layout = (self._size, self._extent)
+        if self._layout != layout:
+            self._image.set_extent(self._extent)
+            self._ax.set_xlim(self._extent[0], self._extent[1])
+            self._ax.set_ylim(self._extent[2], self._extent[3])
+            self._fig.tight_layout(pad=0.001)
+            self._layout = layout
+        return self._fig
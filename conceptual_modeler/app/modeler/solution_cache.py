@@ -0,0 +1,112 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "conceptual-modeler" / "solutions"
+DEFAULT_CACHE_SIZE = 512  # MB
+
+
+def canonical_state(content):
+    """Drop the UI only keys (selection, point/orientation ids) of an exported
+    state so that two revisions describing the same model hash the same"""
+    if isinstance(content, dict):
+        return {
+            key: canonical_state(value)
+            for key, value in content.items()
+            if key != "selected" and not (key == "id" and "x" in content)
+        }
+    if isinstance(content, list):
+        return [canonical_state(item) for item in content]
+    return content
+
+
+class SolutionCache:
+    """Content addressed store of GemPy solutions
+
+    Every entry is a compressed .npz file named after the hash of the model it
+    was computed from. The directory is capped to max_bytes, the least
+    recently used entries (by mtime) are evicted first.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE << 20):
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def key(self, state, *arrays):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps(canonical_state(state), sort_keys=True).encode())
+        for array in arrays:
+            if array is None:
+                digest.update(b"none")
+                continue
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self._directory / f"{key}.npz"
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (OSError, ValueError) as error:
+            if path.exists():
+                print(
+                    f"Solution cache - Dropping unreadable entry {path.name}: {error}"
+                )
+                path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Refresh the entry for the LRU eviction
+        os.utime(path)
+        self.hits += 1
+        return arrays
+
+    def save(self, key, arrays):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        if buffer.tell() > self._max_bytes:
+            return False
+
+        # Write then rename so that a concurrent reader never sees a partial file
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(buffer.getbuffer())
+        os.replace(tmp_path, path)
+        self.evict()
+        return True
+
+    def evict(self):
+        entries = []
+        for path in self._directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for path in self._directory.glob("*.npz"):
+            path.unlink(missing_ok=True)
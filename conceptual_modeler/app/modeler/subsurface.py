@@ -1,9 +1,8 @@
 import time
-import os
 import io
 import zipfile
-from tempfile import NamedTemporaryFile
 import math
+import itertools
 from enum import Enum, unique
 from collections import defaultdict
 
@@ -12,16 +11,82 @@ from osgeo import gdal
 
 # import gempy as gp
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 plt.rcParams['toolbar'] = 'None'
+
+# Persistent Theano compiledir, set before gempy imports theano
+from . import theano_cache
+theano_cache.configure()
+
 import gempy as gp
 import json
 import csv
 
+from .columns import ColumnStore
+from .interpolator import parse_profile, profile_name
+from .sections import SectionRenderer, SliceCache
+from .vtk_utils import DEFAULT_TOPOGRAPHY_MAX_POINTS, lithology_volume
+
 # -----------------------------------------------------------------------------
 # Helper functions
 # -----------------------------------------------------------------------------
 
+# Solution arrays round-tripped through the solution cache
+SOLUTION_ARRAYS = [
+    "lith_block",
+    "fault_block",
+    "scalar_field_matrix",
+    "block_matrix",
+    "mask_matrix",
+    "values_matrix",
+    "scalar_field_at_surface_points",
+]
+
+# Client state keys of the sorted lists: (list, active id, active actions)
+CLIENT_LISTS = {
+    "Stack": ("stacks", "activeStackId", "activeStackActions"),
+    "Surface": ("surfaces", "activeSurfaceId", "activeSurfaceActions"),
+    "Point": ("points", "activePointId", "activePointActions"),
+    "Orientation": (
+        "orientations",
+        "activeOrientationId",
+        "activeOrientationActions",
+    ),
+}
+
+# Lists sent to the client as patches (see apply_patch), the stacks and
+# surfaces are small and their html changes along with the colors
+PATCHED_LISTS = {"points": "Point", "orientations": "Orientation"}
+
+# Visible window of the patched lists (see AbstractSortedList.window), the
+# state keys are the list name followed by the field suffix (pointsPage, ...)
+# and {name}Total holds the number of items left by the filter
+DEFAULT_PAGE_SIZE = 50
+LIST_VIEW_FIELDS = {
+    "page": "Page",
+    "page_size": "PageSize",
+    "sort": "Sort",
+    "sort_desc": "SortDesc",
+    "filter": "Filter",
+}
+
+CLIENT_STATE_KEYS = [
+    "features",
+    "grid",
+    *(key for keys in CLIENT_LISTS.values() for key in keys),
+    *(
+        f"{name}{suffix}"
+        for name in PATCHED_LISTS
+        for suffix in [*LIST_VIEW_FIELDS.values(), "Total"]
+    ),
+    "topography",
+]
+
+# Insert/remove operations kept per sorted list to patch the client with
+CHANGE_LOG_SIZE = 1024
+
+
 def areEqual(arr1, arr2, n, m):
  
     # If lengths of array are not
@@ -59,6 +124,122 @@ def areEqual(arr1, arr2, n, m):
     return True
 
 
+def dem_pixels(dataset, band, extent):
+    """Pixel centers of a DEM band (or overview) and the indices of those in extent"""
+    x0, dx, _, y0, _, dy = dataset.GetGeoTransform()
+    # Overviews cover the same area with larger pixels
+    dx *= dataset.RasterXSize / band.XSize
+    dy *= dataset.RasterYSize / band.YSize
+    x = x0 + dx * (np.arange(band.XSize) + 0.5)
+    y = y0 + dy * (np.arange(band.YSize) + 0.5)
+    columns = np.flatnonzero((x >= extent[0]) & (x <= extent[1]))
+    rows = np.flatnonzero((y >= extent[2]) & (y <= extent[3]))
+    return x[columns], y[rows], columns, rows
+
+def dem_window(dataset, band, extent):
+    """Samples of a DEM band (or overview) in extent
+
+    Returns an (ny, nx, 3) raster with x and y increasing, or None when the
+    DEM does not cover the extent with at least 2x2 samples.
+    """
+    x, y, columns, rows = dem_pixels(dataset, band, extent)
+    if columns.size < 2 or rows.size < 2:
+        return None
+    z = band.ReadAsArray(
+        int(columns[0]), int(rows[0]), int(columns.size), int(rows.size)
+    ).astype(np.float64)
+    xx, yy = np.meshgrid(x, y)
+    raster = np.dstack([xx, yy, z])
+    # North up rasters run with y decreasing
+    return raster[::-1] if y[-1] < y[0] else raster
+
+def dem_values(dataset, extent, path):
+    """GemPy's sampling of a DEM over the grid extent, without its temp files
+
+    Same steps as GemPy's LoadDEMGDAL: the DEM is cropped with gdal.Warp to
+    the grid extent (into path, a /vsimem/ file) when its west, south or north
+    edge differs, then sampled at its pixel centers. Returns the (nx, ny, 3)
+    values_2d of the GemPy topography.
+    """
+    x0, dx, _, y0, _, dy = dataset.GetGeoTransform()
+    # GemPy compares the grid to the DEM edges truncated to integers
+    edges = [int(x0), int(y0 + dy * dataset.RasterYSize), int(y0)]
+    if edges != [extent[0], extent[2], extent[3]]:
+        dataset = gdal.Warp(
+            path, dataset, outputBounds=[extent[0], extent[2], extent[1], extent[3]]
+        )
+        x0, dx, _, y0, _, dy = dataset.GetGeoTransform()
+    z = dataset.GetRasterBand(1).ReadAsArray().astype(np.float64)
+    x = x0 + dx * (np.arange(dataset.RasterXSize) + 0.5)
+    y = y0 + dy * (np.arange(dataset.RasterYSize) + 0.5)
+    xx, yy = np.meshgrid(x, y)
+    # Rows run north to south, GemPy flips them whatever the DEM orientation
+    return np.dstack([xx, yy, z]).transpose(1, 0, 2)[:, ::-1]
+
+def dem_overview(dataset, extent, max_points):
+    """Finest level of a DEM with at most max_points samples in extent
+
+    The full resolution band is used when it fits the budget, then its
+    overviews. Returns an (ny, nx, 3) raster, or None when no level is within
+    the budget.
+    """
+    band = dataset.GetRasterBand(1)
+    # Overviews are listed from the finest to the coarsest
+    levels = [band] + [band.GetOverview(i) for i in range(band.GetOverviewCount())]
+    for level in levels:
+        _, _, columns, rows = dem_pixels(dataset, level, extent)
+        if columns.size * rows.size <= max_points:
+            return dem_window(dataset, level, extent)
+    return None
+
+def apply_patch(items, ops):
+    """Apply list patches in place to the html of a sorted list
+
+    ops are {"op": "insert", "index", "item"}, {"op": "remove", "id"} or
+    {"op": "update", "id", "item"}, unknown ids are skipped.
+    """
+    for op in ops:
+        if op["op"] == "insert":
+            items.insert(op["index"], op["item"])
+            continue
+        for index, item in enumerate(items):
+            if item["id"] == op["id"]:
+                if op["op"] == "remove":
+                    del items[index]
+                else:
+                    items[index] = op["item"]
+                break
+    return items
+
+
+def list_view_keys(name):
+    """State keys of the view fields of a patched list"""
+    return {field: f"{name}{suffix}" for field, suffix in LIST_VIEW_FIELDS.items()}
+
+
+def read_csv_table(content):
+    """DataFrame of an uploaded csv, empty cells are kept as empty strings"""
+    try:
+        return pd.read_csv(io.BytesIO(content), dtype={"formation": str}, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def pole_vectors(dip, azimuth, polarity):
+    """(n, 3) GemPy pole vectors of orientations given by dip and azimuth in
+    degrees and polarity"""
+    diprad = dip * np.pi / 180.0
+    azimuthrad = azimuth * np.pi / 180.0
+    return np.stack(
+        [
+            np.sin(diprad) * np.sin(azimuthrad) * polarity + 1e-12,
+            np.sin(diprad) * np.cos(azimuthrad) * polarity + 1e-12,
+            np.cos(diprad) * polarity + 1e-12,
+        ],
+        axis=1,
+    )
+
+
 def take_order(item):
     return int(item["order"])
 
@@ -169,7 +350,15 @@ class AbstractSortedList:
         self._klass = klass
         self._ids = []
         self._data = {}
+        # Index of each id in _ids, the ones from _stale_from on are refreshed
+        # on lookup (see _position)
+        self._positions = {}
+        self._stale_from = 0
         self._active_id = None
+        # Changes since version _log_start, see changes_since
+        self._version = 0
+        self._log_start = 0
+        self._log = []
 
     def __getitem__(self, id):
         if id in self._data:
@@ -187,10 +376,53 @@ class AbstractSortedList:
         self._active_id = value
 
     def find_by_id(self, id):
-        for item in self._data.values():
-            if item.id == id:
-                return item
-        return
+        return self._data.get(id)
+
+    def _position(self, id):
+        """Index of id in _ids"""
+        if self._positions[id] >= self._stale_from:
+            for index in range(self._stale_from, len(self._ids)):
+                self._positions[self._ids[index]] = index
+            self._stale_from = len(self._ids)
+        return self._positions[id]
+
+    def _index(self, item):
+        """Add item to the lookups of subclasses"""
+
+    def _unindex(self, item):
+        """Remove item from the lookups of subclasses"""
+
+    @property
+    def version(self):
+        return self._version
+
+    def _changed(self, change=None):
+        """Log a change, None when it cannot be expressed as a patch"""
+        self._version += 1
+        if change is None or len(self._log) >= CHANGE_LOG_SIZE:
+            self._log = []
+            self._log_start = self._version
+        else:
+            self._log.append(change)
+
+    def changes_since(self, version):
+        """Patches (see apply_patch) from the html at version to the current one
+
+        None when the changes are no longer logged.
+        """
+        if version < self._log_start:
+            return None
+        ops = []
+        for op, value in self._log[version - self._log_start :]:
+            if op == "insert":
+                index, item = value
+                ops.append({"op": op, "index": index, "item": self._logged_html(item)})
+            else:
+                ops.append({"op": op, "id": value})
+        return ops
+
+    def _logged_html(self, item):
+        return {"id": item.id, **item.html}
 
     @property
     def ids(self):
@@ -201,8 +433,12 @@ class AbstractSortedList:
 
     @property
     def html(self):
+        return self._html_range(0, len(self))
+
+    def _html_range(self, start, end):
+        """html of the items from index start to end, the newest first"""
         results = []
-        for id in self._ids:
+        for id in self._ids[start:end]:
             item = self._data[id]
             out = {"id": id}
             out.update(item.html)
@@ -212,6 +448,39 @@ class AbstractSortedList:
 
         return results
 
+    def window(self, page=1, page_size=DEFAULT_PAGE_SIZE, sort=None, sort_desc=False, filter=""):
+        """Page of the html once filtered and sorted
+
+        filter keeps the items with a value containing the text, sort is an html
+        column and a page_size below 1 shows all the items. Returns the html of
+        the page, the number of items left by the filter and the page, clamped
+        to the last one.
+        """
+        rows = None
+        if filter or sort:
+            rows = self.html
+            if filter:
+                text = str(filter).lower()
+                rows = [
+                    row for row in rows
+                    if any(text in str(value).lower() for value in row.values())
+                ]
+            if sort and rows and sort in rows[0]:
+                rows.sort(key=lambda row: row[sort], reverse=bool(sort_desc))
+        total = len(self) if rows is None else len(rows)
+
+        if page_size < 1:
+            page, start, end = 1, 0, total
+        else:
+            page = min(max(page, 1), max(math.ceil(total / page_size), 1))
+            start = (page - 1) * page_size
+            end = min(start + page_size, total)
+
+        if rows is not None:
+            return rows[start:end], total, page
+        # html lists the newest first
+        return self._html_range(total - end, total - start), total, page
+
     def allowed_actions(self, id):
         actions = {
             "add": 1,
@@ -219,9 +488,9 @@ class AbstractSortedList:
             "up": 0,
             "down": 0,
         }
-        if id in self._data:
-            idx = self._ids.index(id)
-            last_idx = len(self._ids) - 1
+        if self.find_by_id(id) is not None:
+            idx = self._position(id)
+            last_idx = len(self) - 1
             actions["remove"] = 1
             actions["up"] = int(idx < last_idx)
             actions["down"] = int(idx > 0)
@@ -229,7 +498,42 @@ class AbstractSortedList:
         return actions
 
     def _append_new_id(self, id):
+        if self._stale_from == len(self._ids):
+            self._stale_from += 1
+        self._positions[id] = len(self._ids)
         self._ids.append(id)
+        self._index(self._data[id])
+        # html lists the newest first
+        self._changed(("insert", (0, self._data[id])))
+
+    def _insert_id(self, index, id):
+        self._ids.insert(index, id)
+        self._positions[id] = index
+        self._stale_from = min(self._stale_from, index)
+        self._index(self._data[id])
+        self._changed(("insert", (len(self._ids) - 1 - index, self._data[id])))
+
+    def _remove_id(self, id):
+        """Remove the item of id, returns it or None when there is none"""
+        item = self._data.pop(id, None)
+        if item is None:
+            return None
+        index = self._position(id)
+        del self._ids[index]
+        del self._positions[id]
+        self._stale_from = min(self._stale_from, index)
+        if self._active_id == id:
+            self._active_id = None
+        self._unindex(item)
+        self._changed(("remove", id))
+        return item
+
+    def _swap(self, index, other):
+        l = self._ids
+        l[index], l[other] = l[other], l[index]
+        self._positions[l[index]] = index
+        self._positions[l[other]] = other
+        self._changed()
 
     def add(self, **kwargs):
         if not self.allowed_actions(self._active_id).get("add", False):
@@ -244,10 +548,7 @@ class AbstractSortedList:
         if not self.allowed_actions(id).get("remove", False):
             return False
 
-        if self._data.pop(id, None):
-            self._ids.remove(id)
-            if self._active_id == id:
-                self._active_id = None
+        if self._remove_id(id):
             return True
 
         return False
@@ -256,10 +557,9 @@ class AbstractSortedList:
         if not self.allowed_actions(id).get("up", False):
             return False
 
-        l = self._ids
-        index = l.index(id)
-        if len(l) > index + 1:
-            l[index], l[index + 1] = l[index + 1], l[index]
+        index = self._position(id)
+        if len(self._ids) > index + 1:
+            self._swap(index, index + 1)
             return True
 
         return False
@@ -268,14 +568,22 @@ class AbstractSortedList:
         if not self.allowed_actions(id).get("down", False):
             return False
 
-        l = self._ids
-        index = l.index(id)
+        index = self._position(id)
         if index > 0:
-            l[index], l[index - 1] = l[index - 1], l[index]
+            self._swap(index, index - 1)
             return True
 
         return False
 
+    def _clear(self):
+        items = list(self._data.values())
+        self._ids = []
+        self._data = {}
+        self._positions = {}
+        self._stale_from = 0
+        for item in items:
+            self._unindex(item)
+
     def export_state(self, depth=-1):
         results = []
         for id in self._ids:
@@ -289,9 +597,9 @@ class AbstractSortedList:
         if not content:
             return
 
-        self._ids = []
-        self._data = {}
+        self._clear()
         self._active_id = None
+        self._changed()
         keep_active_id = None
         for item in content:
             new_obj = self.add(**item)
@@ -303,168 +611,285 @@ class AbstractSortedList:
             self._active_id = keep_active_id
 
 
-class Orientation:
-    id_generator = create_id_generator("Orientation")
-    index_generator = create_index_generator()
+class ColumnarSortedList(AbstractSortedList):
+    """Sorted list of rows held in a ColumnStore
 
-    def __init__(self, x, y, z, gx, gy, gz, parent=None, **kwargs):
-        self.id = next(Orientation.id_generator)
-        self.idx = next(Orientation.index_generator)
-        self.x = float(x)
-        self.y = float(y)
-        self.z = float(z)
-        self.poleVector = [float(gx), float(gy), float(gz)]
-        self.surface = parent
+    Only the values are stored, klass (see Row) is a view of a row created on
+    lookup and its id is klass.prefix followed by the row index. Rows keep the
+    order they were added in.
+    """
 
-    @property
-    def html(self):
-        return {
-            "id": self.id,
-            "x": self.x,
-            "y": self.y,
-            "z": self.z,
-            "gx": self.poleVector[0],
-            "gy": self.poleVector[1],
-            "gz": self.poleVector[2],
-            "surfacename": self.surface.name,
-        }
+    def __init__(self, klass, parent=None):
+        super().__init__(klass, parent)
+        self._store = ColumnStore(klass.columns)
 
-    def export_state(self, depth=-1):
-        return {
-            "id": self.id,
-            "x": self.x,
-            "y": self.y,
-            "z": self.z,
-            "poleVector": self.poleVector,
-        }
+    def __getitem__(self, id):
+        return self.find_by_id(id)
 
-    def get(self):
-        return [self.x, self.y, self.z, self.poleVector[0], self.poleVector[1], self.poleVector[2]]
+    def __len__(self):
+        return len(self._store)
 
-    def out(self):
-        print(self.id, self.x, self.y, self.z, self.poleVector)
+    def _idx(self, id):
+        """Row index of id, None for the ids of other lists"""
+        prefix, _, idx = str(id).rpartition("_")
+        if prefix != self._klass.prefix or not idx.isdigit():
+            return None
+        return int(idx)
 
-    def import_state(self, content):
-        self.x = content.get("x", self.x)
-        self.y = content.get("y", self.y)
-        self.z = content.get("z", self.z)
-        self.poleVector = content.get("poleVector", self.poleVector)
+    def find_by_id(self, id):
+        if self._position(id) is None:
+            return None
+        return self._klass(self, self._idx(id))
 
+    def _position(self, id):
+        idx = self._idx(id)
+        if idx is None:
+            return None
+        return self._store.find(idx)
 
-class Orientations(AbstractSortedList):
-    def __init__(self, parent):
-        super().__init__(Orientation, parent)
+    @property
+    def ids(self):
+        return [f"{self._klass.prefix}_{idx}" for idx in self._store.index.tolist()]
 
     @property
-    def orientation(self):
-        return self[self.selected_id]
+    def idx(self):
+        """Row indices, a view of the store"""
+        return self._store.index
+
+    def list(self):
+        """(n, len(klass.columns)) values of the rows, a view of the store"""
+        return self._store.values
+
+    def _logged_html(self, idx):
+        row = self._store.find(idx)
+        if row is None:
+            # Removed since, a later remove in the log drops it again
+            return {"id": f"{self._klass.prefix}_{idx}"}
+        return self._klass.html_row(idx, self._store.values[row].tolist(), self._parent)
+
+    def _html_range(self, start, end):
+        rows = zip(
+            self._store.index[start:end].tolist(),
+            self._store.values[start:end].tolist(),
+        )
+        results = [self._klass.html_row(idx, values, self._parent) for idx, values in rows]
+        results.reverse()
+        return results
 
     def allowed_actions(self, id):
         allowed = super().allowed_actions(id)
 
-        # Don't allow moving orientations
+        # Rows can't be moved
         allowed["down"] = 0
         allowed["up"] = 0
 
         return allowed
 
-    def list(self):
-        items = []
-        for orientation in self._data.values():
-            items.append(orientation.get())
-        return items
+    def add(self, **kwargs):
+        if not self.allowed_actions(self._active_id).get("add", False):
+            return False
+
+        idx = next(self._klass.index_generator)
+        self._store.append(idx, self._klass.row(**kwargs))
+        # html lists the newest first, the log keeps the index (see _logged_html)
+        self._changed(("insert", (0, idx)))
+        return self._klass(self, idx)
+
+    def extend(self, idx, rows):
+        """Add rows at once, idx (see Row.next_indices) must be increasing"""
+        self._store.extend(idx, rows)
+        self._changed()
 
     def remove(self, id):
+        """Remove the row of id, returns its index"""
         if not self.allowed_actions(id).get("remove", False):
             return
 
-        idx = self[id].idx
-        if self._data.pop(id, None):
-            self._ids.remove(id)
-            if self._active_id == id:
-                self._active_id = None
-            return idx
+        self._store.delete(self._position(id))
+        if self._active_id == id:
+            self._active_id = None
+        self._changed(("remove", id))
+        return self._idx(id)
 
-        return
+    def _clear(self):
+        self._store.clear()
 
+    def export_state(self, depth=-1):
+        results = []
+        for idx, values in zip(self._store.index.tolist(), self._store.values.tolist()):
+            results.append(self._klass.state_row(idx, values))
+            if results[-1]["id"] == self._active_id:
+                results[-1]["selected"] = 1
 
-class Point:
-    id_generator = create_id_generator("Point")
-    index_generator = create_index_generator()
+        return results
+
+
+def row_property(column):
+    """Value of a column of the row viewed by a Row"""
+
+    def getter(self):
+        return float(self._values()[column])
+
+    def setter(self, value):
+        self._values()[column] = float(value)
+
+    return property(getter, setter)
+
+
+class Row:
+    """View of a row of a ColumnarSortedList"""
+
+    __slots__ = ("_rows", "idx")
+    prefix = None
+    columns = ()
+
+    def __init__(self, rows, idx):
+        self._rows = rows
+        self.idx = idx
+
+    @classmethod
+    def next_indices(cls, count):
+        return np.fromiter(itertools.islice(cls.index_generator, count), np.int64, count)
+
+    @property
+    def id(self):
+        return f"{self.prefix}_{self.idx}"
+
+    @property
+    def surface(self):
+        return self._rows._parent
 
-    def __init__(self, x, y, z, parent=None, **kwargs):
-        self.id = next(Point.id_generator)
-        self.idx = next(Point.index_generator)
-        self.x = float(x)
-        self.y = float(y)
-        self.z = float(z)
-        self.surface = parent
+    def _values(self):
+        row = self._rows._store.find(self.idx)
+        if row is None:
+            raise KeyError(self.id)
+        return self._rows._store.values[row]
 
     @property
     def html(self):
+        return self.html_row(self.idx, self.get(), self.surface)
+
+    def export_state(self, depth=-1):
+        return self.state_row(self.idx, self.get())
+
+    def get(self):
+        return self._values().tolist()
+
+    def out(self):
+        print(self.id, *self.get())
+
+
+class Orientation(Row):
+    __slots__ = ()
+    prefix = "Orientation"
+    columns = ("X", "Y", "Z", "G_x", "G_y", "G_z")
+    index_generator = create_index_generator()
+
+    x = row_property(0)
+    y = row_property(1)
+    z = row_property(2)
+
+    @staticmethod
+    def row(x, y, z, gx, gy, gz, **kwargs):
+        return [float(x), float(y), float(z), float(gx), float(gy), float(gz)]
+
+    @classmethod
+    def html_row(cls, idx, values, surface):
+        x, y, z, gx, gy, gz = values
         return {
-            "id": self.id,
-            "x": self.x,
-            "y": self.y,
-            "z": self.z,
-            "surfacename": self.surface.name,
+            "id": f"{cls.prefix}_{idx}",
+            "x": x,
+            "y": y,
+            "z": z,
+            "gx": gx,
+            "gy": gy,
+            "gz": gz,
+            "surfacename": surface.name,
         }
 
-    def export_state(self, depth=-1):
+    @classmethod
+    def state_row(cls, idx, values):
+        x, y, z, *pole_vector = values
         return {
-            "id": self.id,
-            "x": self.x,
-            "y": self.y,
-            "z": self.z,
+            "id": f"{cls.prefix}_{idx}",
+            "x": x,
+            "y": y,
+            "z": z,
+            "poleVector": pole_vector,
         }
-    
-    def get(self):
-        return [self.x, self.y, self.z]
 
-    def out(self):
-        print(self.id, self.x, self.y, self.z)
+    @property
+    def poleVector(self):
+        return self._values()[3:].tolist()
+
+    @poleVector.setter
+    def poleVector(self, value):
+        self._values()[3:] = [float(v) for v in value]
 
     def import_state(self, content):
         self.x = content.get("x", self.x)
         self.y = content.get("y", self.y)
         self.z = content.get("z", self.z)
+        self.poleVector = content.get("poleVector", self.poleVector)
 
 
-class Points(AbstractSortedList):
+class Orientations(ColumnarSortedList):
     def __init__(self, parent):
-        super().__init__(Point, parent)
+        super().__init__(Orientation, parent)
 
     @property
-    def point(self):
+    def orientation(self):
         return self[self.selected_id]
 
-    def allowed_actions(self, id):
-        allowed = super().allowed_actions(id)
 
-        # Don't allow moving points
-        allowed["down"] = 0
-        allowed["up"] = 0
+class Point(Row):
+    __slots__ = ()
+    prefix = "Point"
+    columns = ("X", "Y", "Z")
+    index_generator = create_index_generator()
 
-        return allowed
-    
-    def list(self):
-        items = []
-        for point in self._data.values():
-            items.append(point.get())
-        return items
+    x = row_property(0)
+    y = row_property(1)
+    z = row_property(2)
 
-    def remove(self, id):
-        if not self.allowed_actions(id).get("remove", False):
-            return
+    @staticmethod
+    def row(x, y, z, **kwargs):
+        return [float(x), float(y), float(z)]
 
-        idx = self[id].idx
-        if self._data.pop(id, None):
-            self._ids.remove(id)
-            if self._active_id == id:
-                self._active_id = None
-            return idx
+    @classmethod
+    def html_row(cls, idx, values, surface):
+        x, y, z = values
+        return {
+            "id": f"{cls.prefix}_{idx}",
+            "x": x,
+            "y": y,
+            "z": z,
+            "surfacename": surface.name,
+        }
 
-        return
+    @classmethod
+    def state_row(cls, idx, values):
+        x, y, z = values
+        return {
+            "id": f"{cls.prefix}_{idx}",
+            "x": x,
+            "y": y,
+            "z": z,
+        }
+
+    def import_state(self, content):
+        self.x = content.get("x", self.x)
+        self.y = content.get("y", self.y)
+        self.z = content.get("z", self.z)
+
+
+class Points(ColumnarSortedList):
+    def __init__(self, parent):
+        super().__init__(Point, parent)
+
+    @property
+    def point(self):
+        return self[self.selected_id]
 
 
 class Surface:
@@ -518,6 +943,23 @@ class Surface:
 class Surfaces(AbstractSortedList):
     def __init__(self, parent):
         super().__init__(Surface, parent)
+        self._names = {}
+
+    def _index(self, surface):
+        # The first surface of a name is found, as with a scan
+        self._names.setdefault(surface.name, surface)
+        if self._parent.stacks is not None:
+            self._parent.stacks._index_surface(surface)
+
+    def _unindex(self, surface):
+        if self._names.get(surface.name) is surface:
+            del self._names[surface.name]
+            for other in self._data.values():
+                if other.name == surface.name:
+                    self._names[other.name] = other
+                    break
+        if self._parent.stacks is not None:
+            self._parent.stacks._unindex_surface(surface)
 
     @property
     def surface(self):
@@ -546,10 +988,7 @@ class Surfaces(AbstractSortedList):
         if not self.allowed_actions(id).get("remove", False):
             return
 
-        if self._data.pop(id, None):
-            self._ids.remove(id)
-            if self._active_id == id:
-                self._active_id = None
+        if self._remove_id(id):
             return id
 
         return
@@ -564,18 +1003,16 @@ class Surfaces(AbstractSortedList):
         return item
     
     def find_by_name(self, name):
-        for surface in self._data.values():
-            if surface.name == name:
-                return surface
-        return
+        return self._names.get(name)
 
 
 class Stack:
     id_generator = create_id_generator("Stack")
 
-    def __init__(self, name, feature=Feature.EROSION, **kwargs):
+    def __init__(self, name, feature=Feature.EROSION, parent=None, **kwargs):
         self.id = next(Stack.id_generator)
         self.name = name
+        self.stacks = parent
         self.surfaces = Surfaces(self)
 
         if isinstance(feature, Feature):
@@ -618,7 +1055,40 @@ class Stack:
 
 class Stacks(AbstractSortedList):
     def __init__(self):
-        super().__init__(Stack)
+        super().__init__(Stack, self)
+        self._names = {}
+        # Surfaces of all the stacks
+        self._surface_names = {}
+        self._surface_ids = {}
+
+    def _index(self, stack):
+        self._names.setdefault(stack.name, stack)
+        for surface in stack.surfaces._data.values():
+            self._index_surface(surface)
+
+    def _unindex(self, stack):
+        if self._names.get(stack.name) is stack:
+            del self._names[stack.name]
+            for other in self._data.values():
+                if other.name == stack.name:
+                    self._names[other.name] = other
+                    break
+        for surface in stack.surfaces._data.values():
+            self._unindex_surface(surface)
+
+    def _index_surface(self, surface):
+        self._surface_names.setdefault(surface.name, surface)
+        self._surface_ids[surface.id] = surface
+
+    def _unindex_surface(self, surface):
+        self._surface_ids.pop(surface.id, None)
+        if self._surface_names.get(surface.name) is surface:
+            del self._surface_names[surface.name]
+            for stack in self._data.values():
+                other = stack.surfaces.find_by_name(surface.name)
+                if other is not None:
+                    self._surface_names[other.name] = other
+                    break
 
     @property
     def stack(self):
@@ -628,7 +1098,7 @@ class Stacks(AbstractSortedList):
         allowed = super().allowed_actions(id)
 
         if id in self._data:
-            idx = self._ids.index(id)
+            idx = self._position(id)
             # Basement constraints
             allowed["down"] = idx > 1
             allowed["up"] &= idx > 0
@@ -667,47 +1137,31 @@ class Stacks(AbstractSortedList):
 
         stack = self._data[id]
         ids = stack.surfaces.ids
-        if self._data.pop(id, None):
-            self._ids.remove(id)
-            if self._active_id == id:
-                self._active_id = None
+        if self._remove_id(id):
             return ids
 
         return
 
     def find_by_name(self, name):
-        for stack in self._data.values():
-            if stack.name == name:
-                return stack
-        return
+        return self._names.get(name)
 
     def find_index(self, name):
-        for i in range(len(self._ids)):
-            stack = self._data[self._ids[i]]
-            if stack.name == name:
-                return i
-        return
+        stack = self._names.get(name)
+        if stack is not None:
+            return self._position(stack.id)
 
     def find_surface_by_name(self, name):
-        for stack in self._data.values():
-            surface = stack.surfaces.find_by_name(name)
-            if surface:
-                return surface
-        return
+        return self._surface_names.get(name)
 
     def find_surface_by_id(self, id):
-        for stack in self._data.values():
-            surface = stack.surfaces.find_by_id(id)
-            if surface:
-                return surface
-        return
+        return self._surface_ids.get(id)
 
     def _insert_new_id(self, name, id):
         index = self.find_index(name)
         if index:
-            self._ids.insert(index, id)
+            self._insert_id(index, id)
         else:
-            self._ids.append(id)
+            self._append_new_id(id)
 
     def insert(self, location_name, name, **kwargs):
         if not self.allowed_actions(self._active_id).get("add", False):
@@ -773,10 +1227,9 @@ class Stacks(AbstractSortedList):
         return
 
     def update_surface_color_by_id(self, id, color):
-        for stack in self._data.values():
-            surface = stack.surfaces.find_by_id(id)
-            if surface:
-                surface.color = color
+        surface = self._surface_ids.get(id)
+        if surface:
+            surface.color = color
 
 # -----------------------------------------------------------------------------
 # State Manager
@@ -788,6 +1241,16 @@ class StateManager:
         self.grid = Grid()
         self.stacks = Stacks()
         self.topography = Topography()
+        self.list_views = {
+            name: {
+                "page": 1,
+                "page_size": DEFAULT_PAGE_SIZE,
+                "sort": None,
+                "sort_desc": False,
+                "filter": "",
+            }
+            for name in PATCHED_LISTS
+        }
 
     def __getitem__(self, name):
         if name in self.__dict__:
@@ -795,64 +1258,77 @@ class StateManager:
 
     @property
     def client_state(self):
-        grid = self.grid.html
-        stacks_html = self.stacks.html
-        active_stack = self.stacks.stack
-        active_stack_id = None
-        stack_actions = {}
-        surfaces = None
-        surfaces_html = None
-        active_surface = None
-        active_surface_id = None
-        surface_actions = {}
-        points = None
-        points_html = None
-        active_point_id = None
-        point_actions = {}
-        orientations = None
-        orientations_html = None
-        active_orientation_id = None
-        orientation_actions = {}
-        topography = self.topography.html
-
-        if active_stack:
-            active_stack_id = active_stack.id
-            stack_actions = self.stacks.allowed_actions(active_stack_id)
-            surfaces = active_stack.surfaces
-
-        if surfaces:
-            surfaces_html = surfaces.html
-            active_surface_id = surfaces.selected_id
-            surface_actions = surfaces.allowed_actions(active_surface_id)
-            active_surface = surfaces.surface
-
-        if active_surface:
-            points = active_surface.points
-            active_point_id = points.selected_id
-            point_actions = points.allowed_actions(active_point_id)
-            points_html = points.html
-            orientations = active_surface.orientations
-            active_orientation_id = orientations.selected_id
-            orientation_actions = orientations.allowed_actions(active_orientation_id)
-            orientations_html = orientations.html
+        return {name: self.client_value(name) for name in CLIENT_STATE_KEYS}
 
-        return {
-            "features": [a.value for a in Feature],
-            "grid": grid,
-            "stacks": stacks_html,
-            "activeStackId": active_stack_id,
-            "activeStackActions": stack_actions,
-            "surfaces": surfaces_html,
-            "activeSurfaceId": active_surface_id,
-            "activeSurfaceActions": surface_actions,
-            "points": points_html,
-            "activePointActions": point_actions,
-            "activePointId": active_point_id,
-            "orientations": orientations_html,
-            "activeOrientationActions": orientation_actions,
-            "activeOrientationId": active_orientation_id,
-            "topography": topography,
-        }
+    def client_list(self, type):
+        """Sorted list of type shown in the client, None without a selection above it"""
+        if type == "Stack":
+            return self.stacks
+        active_stack = self.stacks.stack
+        if not active_stack or not active_stack.surfaces:
+            return None
+        if type == "Surface":
+            return active_stack.surfaces
+        active_surface = active_stack.surfaces.surface
+        if not active_surface:
+            return None
+        if type == "Point":
+            return active_surface.points
+        if type == "Orientation":
+            return active_surface.orientations
+
+    def client_value(self, name):
+        """Build a single key of client_state"""
+        if name == "features":
+            return [a.value for a in Feature]
+        if name == "grid":
+            return self.grid.html
+        if name == "topography":
+            return self.topography.html
+
+        for list_name, view in self.list_views.items():
+            if name == list_name:
+                return self.list_window(list_name)[0]
+            if name == f"{list_name}Total":
+                if self.list_windowed(list_name):
+                    return self.list_window(list_name)[1]
+                items = self.client_list(PATCHED_LISTS[list_name])
+                return 0 if items is None else len(items)
+            for field, key in list_view_keys(list_name).items():
+                if name == key:
+                    return view[field]
+
+        for type, (list_name, id_name, actions_name) in CLIENT_LISTS.items():
+            if name not in (list_name, id_name, actions_name):
+                continue
+            items = self.client_list(type)
+            if items is None:
+                return {} if name == actions_name else None
+            if name == list_name:
+                return items.html
+            active_id = items.selected_id
+            # Stacks have no actions without an active stack
+            if type == "Stack" and not items.stack:
+                return {} if name == actions_name else None
+            if name == id_name:
+                return active_id
+            return items.allowed_actions(active_id)
+
+    def list_windowed(self, name):
+        """Whether the client only shows a window of a patched list"""
+        view = self.list_views[name]
+        return view["page_size"] > 0 or bool(view["sort"]) or bool(view["filter"])
+
+    def list_window(self, name):
+        """html and total of the visible window of a patched list"""
+        items = self.client_list(PATCHED_LISTS[name])
+        if items is None:
+            return None, 0
+        if not self.list_windowed(name):
+            return items.html, len(items)
+        view = self.list_views[name]
+        html, total, view["page"] = items.window(**view)
+        return html, total
 
     def find_stack_by_name(self, name):
         return self.stacks.find_by_name(name)
@@ -940,6 +1416,28 @@ class StateManager:
                 if surface:
                     return surface.orientations.add(**data)
 
+    def add_rows(self, type, names, rows):
+        """Add Point or Orientation rows at once, names are their surface names
+
+        Rows of unknown surfaces are skipped like in add. Returns the surface
+        ids, indices and values of the rows added, in the order of rows.
+        """
+        klass = Point if type == "Point" else Orientation
+        names, codes = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        surfaces = [self.stacks.find_surface_by_name(name) for name in names]
+        known = np.array([surface is not None for surface in surfaces], dtype=bool)[codes]
+        codes, rows = codes[known], rows[known]
+
+        idx = klass.next_indices(len(rows))
+        for code, surface in enumerate(surfaces):
+            selected = codes == code
+            if surface is not None and selected.any():
+                items = surface.points if type == "Point" else surface.orientations
+                items.extend(idx[selected], rows[selected])
+
+        ids = np.array([surface.id if surface else "" for surface in surfaces], dtype=object)
+        return ids[codes], idx, rows
+
     def remove(self, type, id):
         if type == "Stack":
             return self.stacks.remove(id)
@@ -1010,17 +1508,34 @@ class StateManager:
 
 
 class SubSurface:
-    def __init__(self, app):
+    def __init__(
+        self,
+        app,
+        solution_cache=None,
+        profile=None,
+        figures=True,
+        slice_cache=None,
+        topography_max_points=DEFAULT_TOPOGRAPHY_MAX_POINTS,
+    ):
         self.app = app
+        self._solution_cache = solution_cache
+        self._interpolator_profile = parse_profile(profile)
         self._state_handler = StateManager()
         self._theme_mode = False
-        self._xp2d = None
-        self._yp2d = None
-        self._zp2d = None
-        
+        self._figures = figures
+        # Sorted list and version last pushed for each of PATCHED_LISTS
+        self._synced_lists = {}
+        self._slice_cache = slice_cache if slice_cache is not None else SliceCache()
+        self._sections = {
+            direction: SectionRenderer(direction, self._slice_cache) for direction in "xyz"
+        }
+
 
         # gempy model
         self._has_topography = False
+        # Overview of a GDAL topography within the vertex budget of the 3D view
+        self._topography_max_points = topography_max_points
+        self.topography_overview = None
         # Create GemPy Model
         self._geo_model = gp.create_model("conceptual_modeler")
         # Initialize Data
@@ -1030,11 +1545,14 @@ class SubSurface:
             extent=grid.extent,
             resolution=grid.resolution,
         )
-        # Initialize GemPy Interpolator
+        # Initialize GemPy Interpolator, the Theano graph is compiled on
+        # demand (see compile_interpolator)
+        self._interpolator_compiled = False
+        self.interpolator_compile_time = None
         gp.set_interpolator(
             self._geo_model,
-            output=["geology"],
-            theano_optimizer="fast_compile",
+            **self._interpolator_profile,
+            compile_theano=False,
         )
         # Add Basement Stack
         type = "Stack"
@@ -1047,10 +1565,12 @@ class SubSurface:
         # Set the basement Surface as the basement
         surfaces = gp.Surfaces(gp.Series(self._geo_model.faults))
         surfaces.set_basement()
-        # Initialize 2D Plots
-        self.create_xp2d()
-        self.create_yp2d()
-        self.create_zp2d()
+        # Initialize 2D Plots (not needed when running headless)
+        if figures:
+            self.update_sections()
+            self.update_xfig()
+            self.update_yfig()
+            self.update_zfig()
 
         # Append shared state in app
         print("*********")
@@ -1061,99 +1581,123 @@ class SubSurface:
     def set_theme_mode(self, event):
         self._theme_mode = event
         self.set_style()
+        # figures pick the style up when they are created
+        for section in self._sections.values():
+            section.reset()
 
     def set_style(self):
         if self._theme_mode:
             plt.style.use('dark_background')
         else:
             plt.style.use('default')
-    
-    def create_xp2d(self):
-        self._xp2d = gp.plot_2d(self._geo_model, figsize=(5.6, 3.36), dpi=192, frameon=False, legend=False, cell_number=[0], direction=['x'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._xp2d.fig.tight_layout(pad=0.001)
-
-    def create_yp2d(self): 
-        self._yp2d = gp.plot_2d(self._geo_model, figsize=(5.6, 3.36), dpi=192, frameon=False, legend=False, cell_number=[0], direction=['y'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._yp2d.fig.tight_layout(pad=0.001)
-
-    def create_zp2d(self):
-        self._zp2d = gp.plot_2d(self._geo_model, figsize=(5.6, 3.36), dpi=192, frameon=False, legend=False, cell_number=[0], direction=['z'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._zp2d.fig.tight_layout(pad=0.001)
+
+    def lithology(self):
+        """Computed lithology as an (nx, ny, nz) array, -1 above the topography"""
+        resolution = self._state_handler.grid.resolution
+        lith_block = self._geo_model.solutions.lith_block
+        if np.size(lith_block) != np.prod(resolution):
+            return None
+        values = lithology_volume(
+            lith_block, self._geo_model._grid.regular_grid.mask_topo, resolution
+        )
+        return values.reshape(resolution, order="F")
+
+    def update_sections(self):
+        if not self._figures:
+            return
+        surfaces_df = self._geo_model._surfaces.df
+        colors = dict(zip(surfaces_df.id.astype(int), surfaces_df.color))
+        labels = self.lithology()
+        for section in self._sections.values():
+            section.set_model(labels, self._state_handler.grid.extent, colors)
 
     def update_xfig(self, **kwargs):
-        plt.close(self._xp2d.fig)
-        self._xp2d = gp.plot_2d(self._geo_model, **kwargs, frameon=False, legend=False, direction=['x'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._xp2d.fig.tight_layout(pad=0.001)
-        return self._xp2d.fig
+        return self._sections["x"].render(**kwargs)
 
     def update_yfig(self, **kwargs):
-        plt.close(self._yp2d.fig)
-        self._yp2d = gp.plot_2d(self._geo_model, **kwargs, frameon=False, legend=False, direction=['y'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._yp2d.fig.tight_layout(pad=0.001)
-        return self._yp2d.fig
+        return self._sections["y"].render(**kwargs)
 
     def update_zfig(self, **kwargs):
-        plt.close(self._zp2d.fig)
-        self._zp2d = gp.plot_2d(self._geo_model, **kwargs, frameon=False, legend=False, direction=['z'], show_data=False, show=False)
-        plt.xlabel('')
-        plt.ylabel('')
-        plt.title('')
-        self._zp2d.fig.tight_layout(pad=0.001)
-        return self._zp2d.fig
+        return self._sections["z"].render(**kwargs)
+
+    def section_image(self, direction, **kwargs):
+        return self._sections[direction].render_image(**kwargs)
+
+    def section_spec(self, direction, serialize, **kwargs):
+        return self._sections[direction].render_spec(serialize, **kwargs)
 
     def dirty(self, *args):
-        state = self._state_handler.client_state
-        for name in args:
-            if name in state:
-                self.app.push_state(name, state[name])
+        """Push the given client state keys (all keys if none given)
+
+        Only the requested keys are built. Points and orientations are sent a
+        page at a time (see update_list_view), or as patches when they are all
+        shown, the app supports it (patch_state) and the client still shows
+        the list they were last pushed from.
+        """
+        for name in args or CLIENT_STATE_KEYS:
+            if name in PATCHED_LISTS:
+                self.dirty_list(name)
+            elif name in CLIENT_STATE_KEYS:
+                self.app.push_state(name, self._state_handler.client_value(name))
             else:
                 print(f"Unable to dirty missing key {name}")
 
-        # Push all if no args provided
-        if len(args) == 0:
-            for name in state:
-                self.app.push_state(name, state[name])
+    def dirty_list(self, name):
+        handler = self._state_handler
+        items = handler.client_list(PATCHED_LISTS[name])
+        view = handler.list_views[name]
+        page = view["page"]
+
+        if handler.list_windowed(name):
+            # Pages are small, they are pushed whole
+            html, total = handler.list_window(name)
+            self.app.push_state(name, html)
+            self._synced_lists.pop(name, None)
+        else:
+            total = 0 if items is None else len(items)
+            synced_items, synced_version = self._synced_lists.get(name, (None, None))
+            ops = None
+            if items is not None and items is synced_items and hasattr(self.app, "patch_state"):
+                ops = items.changes_since(synced_version)
+
+            # Large patches (imports) are cheaper as a whole list
+            if ops is None or len(ops) > len(items) // 2:
+                self.app.push_state(name, None if items is None else items.html)
+            elif ops:
+                self.app.patch_state(name, ops)
+            self._synced_lists[name] = (items, None if items is None else items.version)
+
+        self.app.push_state(f"{name}Total", total)
+        if view["page"] != page:
+            self.app.push_state(list_view_keys(name)["page"], view["page"])
+
+    def update_list_view(self, name, **kwargs):
+        """Change the page, page size, sort column or filter of a patched list"""
+        view = self._state_handler.list_views[name]
+        kwargs = {field: kwargs[field] for field in view if field in kwargs}
+        kwargs["page"] = int(kwargs.get("page") or 1)
+        kwargs["page_size"] = int(kwargs.get("page_size", view["page_size"]))
+        changed = {field for field, value in kwargs.items() if view[field] != value}
+        if not changed:
+            return
+        # A new page size, order or filter starts over from the first page
+        if "page" not in changed:
+            kwargs["page"] = 1
+        view.update(kwargs)
+        self.dirty(name, *list_view_keys(name).values())
 
     def dirty_state(self, type):
         """type@app: Stack, Surface, Point, Orientation"""
+        # Stack and surface changes cascade down to the lists below them
+        cascade = {
+            "Stack": ["Stack", "Surface", "Point", "Orientation"],
+            "Surface": ["Surface", "Point", "Orientation"],
+            "Point": ["Point"],
+            "Orientation": ["Orientation"],
+        }
         dirty_list = []
-        stack_state_list = ["stacks", "activeStackId", "activeStackActions"]
-        surface_state_list = ["surfaces", "activeSurfaceId", "activeSurfaceActions"]
-        point_state_list = ["points", "activePointId", "activePointActions"]
-        orientation_state_list = [
-            "orientations",
-            "activeOrientationId",
-            "activeOrientationActions",
-        ]
-
-        if type == "Stack":
-            dirty_list.extend(stack_state_list)
-            dirty_list.extend(surface_state_list)
-            dirty_list.extend(point_state_list)
-            dirty_list.extend(orientation_state_list)
-        elif type == "Surface":
-            dirty_list.extend(surface_state_list)
-            dirty_list.extend(point_state_list)
-            dirty_list.extend(orientation_state_list)
-        elif type == "Point":
-            dirty_list.extend(point_state_list)
-        elif type == "Orientation":
-            dirty_list.extend(orientation_state_list)
+        for dirty_type in cascade.get(type, []):
+            dirty_list.extend(CLIENT_LISTS[dirty_type])
 
         if len(dirty_list):
             self.dirty(*dirty_list)
@@ -1185,6 +1729,7 @@ class SubSurface:
                 extent=extent,
                 resolution=resolution,
             )
+            self.update_sections()
             if dirtying:
                 self.dirty("grid", "topography")
             return 1
@@ -1206,6 +1751,7 @@ class SubSurface:
             topography.ry = data["ry"]
             topography.on = data["on"]
             if topography.category == 'random':
+                self.topography_overview = None
                 np.random.seed(topography.seed)
                 print("GemPy - Topography Updated")
                 self._geo_model.set_topography(
@@ -1218,68 +1764,60 @@ class SubSurface:
                 self.dirty("topography")
             return 1
 
-    def update_topography_file(self, data_type, file_data, dirtying=True):
-        file_bytes = file_data.get("content")       
-        if data_type == "gdal":
-            tmp_file=NamedTemporaryFile(delete=False, suffix=".tif")
-            tmp_file.write(file_bytes)
-            tmp_file.close() 
-            self._geo_model.set_topography(
-                source='gdal', 
-                filepath=tmp_file.name
-            )
-            os.unlink(tmp_file.name)
-            if dirtying:
-                self.dirty("topography")
+    def load_topography(self, category, file_bytes):
+        """Set the GemPy topography from gdal/saved file bytes, without temp files"""
+        extent = self._geo_model._grid.regular_grid.extent
+        if category == "gdal":
+            # GDAL reads the bytes from its in-memory filesystem
+            path = f"/vsimem/topography_{id(self)}.tif"
+            cropped_path = f"/vsimem/topography_{id(self)}_cropped.tif"
+            gdal.FileFromMemBuffer(path, file_bytes)
+            try:
+                dataset = gdal.Open(path)
+                if dataset is None:
+                    print("Bad topography file")
+                    return 0
+                self._geo_model.set_topography(
+                    source='numpy',
+                    array=dem_values(dataset, extent, cropped_path)
+                )
+                self.topography_overview = dem_overview(
+                    dataset, extent, self._topography_max_points
+                )
+                dataset = None
+            finally:
+                gdal.Unlink(path)
+                gdal.Unlink(cropped_path)
             return 1
-        elif data_type == "saved":
-            tmp_file=NamedTemporaryFile(delete=False, suffix=".npy")
-            tmp_file.write(file_bytes)
-            tmp_file.close()
+        elif category == "saved":
+            # GemPy's Topography.save writes values_2d, an (nx, ny, 3) array
             self._geo_model.set_topography(
-                source='saved', 
-                filepath=tmp_file.name
+                source='numpy',
+                array=np.load(io.BytesIO(file_bytes))
             )
-            os.unlink(tmp_file.name)
-            if dirtying:
-                self.dirty("topography")
+            self.topography_overview = None
             return 1
         else:
             print("Bad topography date_type")
             return 0
 
-    def read_topography_file(self, category, file_bytes, dirtying=True):
-        topography = self._state_handler.topography
-        topography.category = category
-        if category == "gdal":
-            tmp_file=NamedTemporaryFile(delete=False, suffix=".tif")
-            tmp_file.write(file_bytes)
-            tmp_file.close() 
-            self._geo_model.set_topography(
-                source='gdal', 
-                filepath=tmp_file.name
-            )
-            os.unlink(tmp_file.name)
-            topography.on = True
+    def update_topography_file(self, data_type, file_data, dirtying=True):
+        file_bytes = file_data.get("content")       
+        if self.load_topography(data_type, file_bytes):
             if dirtying:
                 self.dirty("topography")
             return 1
-        elif category == "saved":
-            tmp_file=NamedTemporaryFile(delete=False, suffix=".npy")
-            tmp_file.write(file_bytes)
-            tmp_file.close()
-            self._geo_model.set_topography(
-                source='saved', 
-                filepath=tmp_file.name
-            )
-            os.unlink(tmp_file.name)
+        return 0
+
+    def read_topography_file(self, category, file_bytes, dirtying=True):
+        topography = self._state_handler.topography
+        topography.category = category
+        if self.load_topography(category, file_bytes):
             topography.on = True
             if dirtying:
                 self.dirty("topography")
             return 1
-        else:
-            print("Bad topography date_type")
-            return 0
+        return 0
            
     def add(self, type, data, dirtying=True):
         """type@html: Stack, Surface, Point, Orientation"""
@@ -1388,6 +1926,28 @@ class SubSurface:
         if dirtying:
             self.dirty_state("Point")
 
+    def add_points(self, surfaces, idx, values, dirtying=True):
+        """add_point for rows added at once (see StateManager.add_rows)"""
+        if len(idx):
+            table = pd.concat(
+                [
+                    self._geo_model._surface_points.df[["X", "Y", "Z", "surface"]],
+                    pd.DataFrame(values, index=idx, columns=["X", "Y", "Z"]).assign(
+                        surface=surfaces
+                    ),
+                ]
+            )
+            # GemPy replaces its surface points, they keep the point idx as index
+            self._geo_model.set_surface_points(table, update_surfaces=False)
+            # Sort them by surface and restore the nugget of add_surface_points
+            self._geo_model.modify_surface_points(
+                table.index.values,
+                surface=table["surface"].values,
+                smooth=np.full(len(table), 1e-6),
+            )
+        if dirtying:
+            self.dirty_state("Point")
+
     def remove_point(self, index):
         self._geo_model.delete_surface_points(index)
         self.dirty_state("Point")
@@ -1404,6 +1964,25 @@ class SubSurface:
         if dirtying:
             self.dirty_state("Orientation")
 
+    def add_orientations(self, surfaces, idx, values, dirtying=True):
+        """add_orientation for rows added at once (see StateManager.add_rows)"""
+        if len(idx):
+            columns = ["X", "Y", "Z", "G_x", "G_y", "G_z"]
+            table = pd.concat(
+                [
+                    self._geo_model._orientations.df[[*columns, "surface"]],
+                    pd.DataFrame(values, index=idx, columns=columns).assign(surface=surfaces),
+                ]
+            )
+            self._geo_model.set_orientations(table)
+            self._geo_model.modify_orientations(
+                table.index.values,
+                surface=table["surface"].values,
+                smooth=np.full(len(table), 0.01),
+            )
+        if dirtying:
+            self.dirty_state("Orientation")
+
     def remove_orientation(self, index):
         self._geo_model.delete_orientations(index)
         self.dirty_state("Orientation")
@@ -1422,9 +2001,88 @@ class SubSurface:
     # Geometry accessors
     # -----------------------------------------------------
 
+    def compile_interpolator(self):
+        if self._interpolator_compiled:
+            return 0
+        print(f"Gempy - Compile Interpolator ({profile_name(self._interpolator_profile)})")
+        start = time.time()
+        gp.set_interpolator(
+            self._geo_model,
+            **self._interpolator_profile,
+            compile_theano=True,
+        )
+        self._interpolator_compiled = True
+        self.interpolator_compile_time = time.time() - start
+        print(f"Gempy - Interpolator compiled in {self.interpolator_compile_time:.2f}s")
+        return 1
+
     def compute_geo_model(self):
+        key = None
+        if self._solution_cache:
+            key = self.solution_key()
+            arrays = self._solution_cache.load(key)
+            if arrays is not None:
+                print("Gempy - Solution Restored From Cache")
+                self.restore_solution(arrays)
+                return
+
+        self.compile_interpolator()
         print("Gempy - Compute Model")
         gp.compute_model(self._geo_model)
+        # Only cache the solution of the model the key was computed for
+        if key and self.solution_key() == key:
+            self._solution_cache.save(key, self.solution_arrays())
+
+    def solution_key(self):
+        topography = self._geo_model._grid.topography
+        return self._solution_cache.key(
+            {
+                "gempy": gp.__version__,
+                "interpolator": profile_name(self._interpolator_profile),
+                "model": self._state_handler.export_state(),
+            },
+            topography.values if topography is not None else None,
+        )
+
+    def solution_arrays(self):
+        solutions = self._geo_model.solutions
+        arrays = {}
+        for name in SOLUTION_ARRAYS:
+            value = getattr(solutions, name, None)
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                arrays[name] = value
+        mask_topo = self._geo_model._grid.regular_grid.mask_topo
+        if isinstance(mask_topo, np.ndarray) and mask_topo.size:
+            arrays["mask_topo"] = mask_topo
+        surfaces_df = self._geo_model._surfaces.df
+        for surface, vertices, edges in zip(
+            surfaces_df.surface, surfaces_df.vertices, surfaces_df.edges
+        ):
+            if isinstance(vertices, np.ndarray) and isinstance(edges, np.ndarray):
+                arrays[f"vertices_{surface}"] = vertices
+                arrays[f"edges_{surface}"] = edges
+        return arrays
+
+    def restore_solution(self, arrays):
+        solutions = self._geo_model.solutions
+        for name in SOLUTION_ARRAYS:
+            if name in arrays:
+                setattr(solutions, name, arrays[name])
+        if "mask_topo" in arrays:
+            self._geo_model._grid.regular_grid.mask_topo = arrays["mask_topo"]
+        # Same post-processing as gp.compute_model(sort_surfaces=True)
+        self._geo_model.set_surface_order_from_solution()
+
+        surfaces_df = self._geo_model._surfaces.df
+        vertices, edges = [], []
+        for index, surface in zip(surfaces_df.index, surfaces_df.surface):
+            if f"vertices_{surface}" in arrays:
+                surfaces_df.at[index, "vertices"] = arrays[f"vertices_{surface}"]
+                surfaces_df.at[index, "edges"] = arrays[f"edges_{surface}"]
+                vertices.append(arrays[f"vertices_{surface}"])
+                edges.append(arrays[f"edges_{surface}"])
+        solutions.vertices = vertices
+        solutions.edges = edges
 
     # -----------------------------------------------------
     # Import / Export data
@@ -1453,11 +2111,11 @@ class SubSurface:
                 self.dirty_state("Surface")
         elif data_type == "points.csv":
             point_data = self.parse_points_csv(file_bytes)
-            if point_data:
+            if point_data is not None:
                 self.dirty_state("Point")
         elif data_type == "orientations.csv":
             orientation_data = self.parse_orientations_csv(file_bytes)
-            if orientation_data:
+            if orientation_data is not None:
                 self.dirty_state("Orientation")
         elif data_type == "topography.zip":
             topography_data = self.parse_topography_zip(file_bytes)
@@ -1530,84 +2188,43 @@ class SubSurface:
         return surfaces
 
     def parse_points_csv(self, content):
-        points = csv.DictReader(content.decode("utf-8").splitlines(), delimiter=",")
-        for row in points:
-            if "X" in row and "Y" in row and "Z" in row and "formation" in row:
-                self.add(
-                    "Point",
-                    {
-                        "x": row["X"],
-                        "y": row["Y"],
-                        "z": row["Z"],
-                        "surfacename": row["formation"],
-                    },
-                    dirtying=False
-                )
-            else:
-                print("Bad points.csv file")
-                return
+        points = read_csv_table(content)
+        if not {"X", "Y", "Z", "formation"}.issubset(points.columns):
+            print("Bad points.csv file")
+            return
+        self.add_points(
+            *self._state_handler.add_rows(
+                "Point",
+                points["formation"].values,
+                points[["X", "Y", "Z"]].to_numpy(dtype=float),
+            ),
+            dirtying=False,
+        )
         return points
 
     def parse_orientations_csv(self, content):
-        orientations = csv.DictReader(
-            content.decode("utf-8").splitlines(), delimiter=","
-        )
-        for row in orientations:
-            if (
-                "X" in row
-                and "Y" in row
-                and "Z" in row
-                and "G_x" in row
-                and "G_y" in row
-                and "G_z" in row
-                and "formation" in row
-            ):
-                self.add(
-                    "Orientation",
-                    {
-                        "x": row["X"],
-                        "y": row["Y"],
-                        "z": row["Z"],
-                        "gx": row["G_x"],
-                        "gy": row["G_y"],
-                        "gz": row["G_z"],
-                        "surfacename": row["formation"],
-                    },
-                    dirtying=False
+        orientations = read_csv_table(content)
+        columns = set(orientations.columns)
+        if {"X", "Y", "Z", "G_x", "G_y", "G_z", "formation"}.issubset(columns):
+            poles = orientations[["G_x", "G_y", "G_z"]].to_numpy(dtype=float)
+        elif {"X", "Y", "Z", "dip", "azimuth", "polarity", "formation"}.issubset(columns):
+            poles = pole_vectors(
+                *(
+                    orientations[column].to_numpy(dtype=float)
+                    for column in ["dip", "azimuth", "polarity"]
                 )
-            elif (
-                "X" in row
-                and "Y" in row
-                and "Z" in row
-                and "dip" in row
-                and "azimuth" in row
-                and "polarity" in row
-                and "formation" in row
-            ):
-                dip = float(row["dip"])
-                azimuth = float(row["azimuth"])
-                polarity = float(row["polarity"])
-                diprad = dip * math.pi / 180.0
-                azimuthrad = azimuth * math.pi / 180.0
-                gx = math.sin(diprad) * math.sin(azimuthrad) * polarity + 1e-12
-                gy = math.sin(diprad) * math.cos(azimuthrad) * polarity + 1e-12
-                gz = math.cos(diprad) * polarity + 1e-12
-                self.add(
-                    "Orientation",
-                    {
-                        "x": row["X"],
-                        "y": row["Y"],
-                        "z": row["Z"],
-                        "gx": gx,
-                        "gy": gy,
-                        "gz": gz,
-                        "surfacename": row["formation"],
-                    },
-                    dirtying=False
-                )
-            else:
-                print("Bad orientations.csv file")
-                return
+            )
+        else:
+            print("Bad orientations.csv file")
+            return
+        self.add_orientations(
+            *self._state_handler.add_rows(
+                "Orientation",
+                orientations["formation"].values,
+                np.column_stack([orientations[["X", "Y", "Z"]].to_numpy(dtype=float), poles]),
+            ),
+            dirtying=False,
+        )
         return orientations
 
     def parse_topography_zip(self, content):
@@ -1677,40 +2294,48 @@ class SubSurface:
             return
 
     def parse_zip_file(self, file_data):
+        """Load a model zip, return False if the zip or one of its files is bad"""
         file_bytes = file_data.get("content")
         zip_file = zipfile.ZipFile(io.BytesIO(file_bytes))
         file_list = zip_file.namelist()
         dir_list = list(x for x in file_list if x.endswith('/'))
         if len(dir_list) > 1:
             print("Bad zip file")
-            return
+            return False
         else:
             if len(dir_list) == 0:
                 dir=''
             else:
                 dir=dir_list[0]
+        # Parsed data of each file found, None when the file is bad
+        parsed = {}
         grid_file = dir+"grid.csv"
         if grid_file in file_list:
-            grid_data = self.parse_grid_csv(zip_file.read(grid_file))
+            grid_data = parsed[grid_file] = self.parse_grid_csv(zip_file.read(grid_file))
             if grid_data:
                 self.update_grid(**grid_data, dirtying=False)
         stacks_file = dir+"stacks.csv"
         if stacks_file in file_list:
-            stack_data = self.parse_stacks_csv(zip_file.read(stacks_file))
+            parsed[stacks_file] = self.parse_stacks_csv(zip_file.read(stacks_file))
         surfaces_file = dir+"surfaces.csv"
         if surfaces_file in file_list:
-            surface_data = self.parse_surfaces_csv(zip_file.read(surfaces_file))
+            parsed[surfaces_file] = self.parse_surfaces_csv(zip_file.read(surfaces_file))
         points_file = dir+"points.csv"
         if points_file in file_list:
-            point_data = self.parse_points_csv(zip_file.read(points_file))
+            parsed[points_file] = self.parse_points_csv(zip_file.read(points_file))
         orientations_file = dir+"orientations.csv"
         if orientations_file in file_list:
-            orientation_data = self.parse_orientations_csv(zip_file.read(orientations_file))
+            parsed[orientations_file] = self.parse_orientations_csv(zip_file.read(orientations_file))
         topography_file = dir+"topography.zip"
         if topography_file in file_list:
-            topography_data = self.parse_topography_zip(zip_file.read(topography_file))
+            parsed[topography_file] = self.parse_topography_zip(zip_file.read(topography_file))
         self.dirty_state("Stack")
         self.dirty_state("Surface")
         self.dirty_state("Point")
         self.dirty_state("Orientation")
         self.dirty("grid", "topography")
+
+        bad_files = [name for name, data in parsed.items() if data is None]
+        if bad_files:
+            print(f"Bad model files: {', '.join(bad_files)}")
+        return not bad_files
@@ -0,0 +1,49 @@
+import os
+from importlib import metadata
+from pathlib import Path
+
+# Must be configured before theano is imported (through gempy)
+#
+# Only the C modules Theano compiles persist across processes. The compiled
+# interpolator function itself is rebuilt by every process (graph
+# optimization and linking of the cached modules, ~20s for fast_compile
+# against ~230s cold). Pickling that function does not avoid it: unpickling
+# links the same modules again, it saved ~1.5s of 22s for 40MB per profile.
+DEFAULT_THEANO_CACHE = Path.home() / ".cache" / "conceptual-modeler" / "theano"
+
+
+def _version(*packages):
+    for package in packages:
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return "unknown"
+
+
+def compiledir(root=None):
+    """Theano compiledir dedicated to a gempy/theano version
+
+    Theano keys the compiled modules on the graph itself, so interpolator
+    profiles (optimizer, dtype, outputs) safely share the same directory.
+    """
+    root = Path(
+        root or os.environ.get("CONCEPTUAL_MODELER_THEANO_CACHE", DEFAULT_THEANO_CACHE)
+    )
+    # GemPy 2.2 runs on the theano-pymc fork, which installs as theano
+    name = f"gempy-{_version('gempy')}_theano-{_version('theano', 'theano-pymc')}"
+    return root / name
+
+
+def configure(root=None):
+    """Point theano at a persistent compiledir unless one is already set"""
+    flags = os.environ.get("THEANO_FLAGS", "")
+    if "compiledir" in flags:
+        return None
+
+    directory = compiledir(root)
+    directory.mkdir(parents=True, exist_ok=True)
+    os.environ["THEANO_FLAGS"] = ",".join(
+        flag for flag in [flags, f"base_compiledir={directory}"] if flag
+    )
+    return directory
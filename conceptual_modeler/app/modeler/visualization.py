@@ -1,19 +1,13 @@
 from collections import defaultdict
 import numpy as np
 
-from parflow.tools.io import write_pfb
-from vtkmodules.numpy_interface import dataset_adapter as dsa
 
 from vtkmodules.vtkCommonCore import (
-    vtkFloatArray, 
     vtkLookupTable, 
-    vtkPoints,
 )
 from vtkmodules.vtkCommonDataModel import (
-    vtkCellArray,
     vtkImageData, 
     vtkPolyData,
-    vtkTriangle,
 )
 from vtkmodules.vtkFiltersCore import (
     vtkContourFilter,
@@ -21,9 +15,6 @@ from vtkmodules.vtkFiltersCore import (
     vtkGlyph3D,
     vtkThreshold,
 )
-from vtkmodules.vtkFiltersGeometry import (
-    vtkDataSetSurfaceFilter,
-)
 from vtkmodules.vtkFiltersModeling import (
     vtkOutlineFilter,
 )
@@ -31,7 +22,7 @@ from vtkmodules.vtkFiltersSources import (
     vtkArrowSource,
     vtkSphereSource,
 )
-from vtkmodules.vtkIOXML import vtkXMLImageDataWriter
+from vtkmodules.vtkImagingCore import vtkExtractVOI
 from vtkmodules.vtkRenderingCore import (
     vtkActor,
     vtkDataSetMapper,
@@ -48,6 +39,18 @@ from vtkmodules.vtkInteractionStyle import vtkInteractorStyleSwitch #noqa
 
 import vtkmodules.vtkRenderingOpenGL2 #noqa
 
+from .export import write_simulation_grid
+from .vtk_utils import (
+    DEFAULT_TOPOGRAPHY_MAX_POINTS,
+    array_digest,
+    lithology_volume,
+    skin_polydata,
+    to_vtk_array,
+    topography_grid,
+    triangle_polydata,
+    vertex_polydata,
+)
+
 CMOCEAN_TOPO = [[0.156102, 0.102608, 0.172722, 1.0],
                 [0.161488, 0.108633, 0.183442, 1.0],
                 [0.166812, 0.114599, 0.194259, 1.0],
@@ -358,10 +361,42 @@ def hextorgb(hcolor):
     return [r/255.0, g/255.0, b/255.0]
 
 def vector_magnitude(vector):
-    sum = 0
-    for i in range(len(vector)):
-        sum = vector[i]*vector[i] + sum    
-    return pow(sum,0.5)
+    """Norm of a vector, or of each row of an (n, 3) array"""
+    return np.linalg.norm(vector, axis=-1)
+
+def surface_points_polydata(point_list):
+    """point_list is the (n, 3) array of the X, Y, Z columns"""
+    return vertex_polydata(point_list)
+
+def surface_orientations_polydata(orientation_list):
+    """orientation_list is the (n, 6) array of the X, Y, Z, G_x, G_y, G_z columns"""
+    orientations = np.asarray(orientation_list, dtype=np.float64).reshape(-1, 6)
+    points_polydata = vertex_polydata(orientations[:, :3])
+    direction = np.asarray(orientations[:, 3:], dtype=np.float32)
+    point_data = points_polydata.GetPointData()
+    point_data.AddArray(to_vtk_array(direction, "direction"))
+    point_data.SetActiveVectors("direction")
+    point_data.AddArray(to_vtk_array(vector_magnitude(direction), "magnitude"))
+    point_data.SetActiveScalars("magnitude")
+    return points_polydata
+
+def topography_source(point_list, max_points=None):
+    """Topography shared by the surface and the contours
+
+    Regular rasters (random and DEM topographies) become a structured grid,
+    decimated to at most max_points, scattered points are triangulated
+    with vtkDelaunay2D.
+    """
+    topography = topography_grid(point_list, max_points)
+    if topography is not None:
+        return topography
+    point_list = np.asarray(point_list, dtype=np.float64).reshape(-1, 3)
+    polydata = vertex_polydata(point_list)
+    polydata.GetPointData().SetScalars(to_vtk_array(point_list[:, 2], "elevation"))
+    delaunay = vtkDelaunay2D()
+    delaunay.SetInputData(polydata)
+    delaunay.Update()
+    return delaunay
 
 class ViewView:
     def __init__(self, name="default"):
@@ -424,32 +459,12 @@ class ViewView:
         self._scene[name] = item
         return item
 
-    def add_topography_surface(self, point_list):
-        f = [0.0]
-        points = vtkPoints()
-        vertices = vtkCellArray()
-        field = vtkFloatArray()
-        field.SetName("elevation")
-        field.SetNumberOfComponents(1);
-        for p in point_list:
-            f[0] = p[2]
-            field.InsertNextTuple(f)
-            point_id = points.InsertNextPoint(p)
-            vertices.InsertNextCell(1)
-            vertices.InsertCellPoint(point_id)
-        polydata = vtkPolyData()
-        polydata.SetPoints(points)
-        polydata.SetVerts(vertices)
-        polydata.GetPointData().AddArray(field)
-        polydata.GetPointData().SetActiveScalars('elevation')
-        polydata.Modified()
-
-        delaunay = vtkDelaunay2D()
-        delaunay.SetInputData(polydata)
-        delaunay.Update()
-
-        mapper = vtkPolyDataMapper()
-        mapper.SetInputConnection(delaunay.GetOutputPort())
+    def add_topography_surface(self, topography):
+        mapper = vtkDataSetMapper()
+        if topography.IsA("vtkDataSet"):
+            mapper.SetInputData(topography)
+        else:
+            mapper.SetInputConnection(topography.GetOutputPort())
 
         lut = vtkLookupTable()
         lut.SetTableRange(0.0, 1.0)
@@ -473,41 +488,22 @@ class ViewView:
         name = "topography_surface"
         item = {
             "name": name,
-            "source": delaunay,
+            "source": topography,
             "mapper": mapper,
             "actor": actor,
         }
         self._scene[name] = item
         return item
 
-    def add_topography_contours(self, point_list):
-        f = [0.0]
-        points = vtkPoints()
-        vertices = vtkCellArray()
-        field = vtkFloatArray()
-        field.SetName("elevation")
-        field.SetNumberOfComponents(1);
-        for p in point_list:
-            f[0] = p[2]
-            field.InsertNextTuple(f)
-            point_id = points.InsertNextPoint(p)
-            vertices.InsertNextCell(1)
-            vertices.InsertCellPoint(point_id)
-        polydata = vtkPolyData()
-        polydata.SetPoints(points)
-        polydata.SetVerts(vertices)
-        polydata.GetPointData().AddArray(field)
-        polydata.GetPointData().SetActiveScalars('elevation')
-        polydata.Modified()
-
-        delaunay = vtkDelaunay2D()
-        delaunay.SetInputData(polydata)
-        delaunay.Update()
-
-        field_range = field.GetRange()
-
+    def add_topography_contours(self, topography):
         contour = vtkContourFilter()
-        contour.SetInputConnection(delaunay.GetOutputPort())
+        if topography.IsA("vtkDataSet"):
+            contour.SetInputData(topography)
+            field = topography.GetPointData().GetArray("elevation")
+        else:
+            contour.SetInputConnection(topography.GetOutputPort())
+            field = topography.GetOutput().GetPointData().GetArray("elevation")
+        field_range = field.GetRange()
         contour.GenerateValues(10, field_range)
         contour.Update()
 
@@ -541,16 +537,7 @@ class ViewView:
         return item
     
     def add_surface_points(self, surface, color, radius, point_list):
-        points = vtkPoints()
-        vertices = vtkCellArray()
-        for p in point_list:
-            point_id = points.InsertNextPoint(p)
-            vertices.InsertNextCell(1)
-            vertices.InsertCellPoint(point_id)
-        points_polydata = vtkPolyData()
-        points_polydata.SetPoints(points)
-        points_polydata.SetVerts(vertices)
-        points_polydata.Modified()
+        points_polydata = surface_points_polydata(point_list)
 
         sphereSource = vtkSphereSource()
         sphereSource.SetRadius(radius)
@@ -576,6 +563,7 @@ class ViewView:
         item = {
             "name": name,
             "source": glyph3D,
+            "glyph": sphereSource,
             "mapper": mapper,
             "actor": actor,
         }
@@ -583,35 +571,7 @@ class ViewView:
         return item
 
     def add_surface_orientations(self, surface, color, radius, orientation_list):
-        points = vtkPoints()
-        vertices = vtkCellArray()
-        direction = vtkFloatArray()
-        direction.SetName('direction')
-        direction.SetNumberOfComponents(3)
-        direction.SetNumberOfTuples(len(orientation_list))
-        magnitude = vtkFloatArray()
-        magnitude.SetName('magnitude')
-        magnitude.SetNumberOfTuples(len(orientation_list))
-        index = 0
-        for o in orientation_list:
-            p = [o[0], o[1], o[2]]
-            d = [o[3], o[4], o[5]]
-            point_id = points.InsertNextPoint(p)
-            vertices.InsertNextCell(1)
-            vertices.InsertCellPoint(point_id)
-            direction.SetTuple(index, d)
-            m = vector_magnitude(d)
-            magnitude.SetTuple1(index, m)
-            index += 1
-
-        points_polydata = vtkPolyData()
-        points_polydata.SetPoints(points)
-        points_polydata.SetVerts(vertices)
-        points_polydata.GetPointData().AddArray(direction)
-        points_polydata.GetPointData().SetActiveVectors('direction')
-        points_polydata.GetPointData().AddArray(magnitude)
-        points_polydata.GetPointData().SetActiveScalars('magnitude')
-        points_polydata.Modified()
+        points_polydata = surface_orientations_polydata(orientation_list)
 
         arrowSource = vtkArrowSource()
         arrowSource.SetTipRadius(0.5)
@@ -645,22 +605,71 @@ class ViewView:
         self._scene[name] = item
         return item
 
+    def add_formation_points(self, name, radius, points_polydata, lut):
+        sphereSource = vtkSphereSource()
+        sphereSource.SetRadius(radius)
+        sphereSource.Update()
+
+        glyph3D = vtkGlyph3D()
+        glyph3D.SetSourceConnection(sphereSource.GetOutputPort())
+        glyph3D.SetInputData(points_polydata)
+        return self.add_formation_glyphs(name, sphereSource, glyph3D, lut)
+
+    def add_formation_orientations(self, name, radius, points_polydata, lut):
+        arrowSource = vtkArrowSource()
+        arrowSource.SetTipRadius(0.5)
+        arrowSource.SetShaftRadius(0.25)
+        arrowSource.Update()
+
+        glyph3D = vtkGlyph3D()
+        glyph3D.SetSourceConnection(arrowSource.GetOutputPort())
+        glyph3D.SetInputData(points_polydata)
+        glyph3D.SetVectorModeToUseVector()
+        glyph3D.SetScaleFactor(radius*2.0)
+        return self.add_formation_glyphs(name, arrowSource, glyph3D, lut)
+
+    def add_formation_glyphs(self, name, glyph, glyph3D, lut):
+        # Glyphs of every formation in one actor, colored by their formation id
+        glyph3D.Update()
+
+        mapper = vtkPolyDataMapper()
+        mapper.SetInputConnection(glyph3D.GetOutputPort())
+        mapper.SetScalarModeToUsePointFieldData()
+        mapper.SelectColorArray("formation")
+        mapper.SetColorModeToMapScalars()
+        mapper.SetLookupTable(lut)
+        mapper.SetScalarRange(lut.GetTableRange())
+        mapper.ScalarVisibilityOn()
+        mapper.Update()
+
+        actor = vtkActor()
+        actor.SetMapper(mapper)
+        self.renderer.AddActor(actor)
+
+        item = {
+            "name": name,
+            "source": glyph3D,
+            "glyph": glyph,
+            "mapper": mapper,
+            "actor": actor,
+        }
+        self._scene[name] = item
+        return item
+
+    def update_formation_glyphs(self, name, radius, points_polydata, lut):
+        item = self.get(name)
+        if item["glyph"].IsA("vtkSphereSource"):
+            item["glyph"].SetRadius(radius)
+        else:
+            item["source"].SetScaleFactor(radius*2.0)
+        item["source"].SetInputData(points_polydata)
+        item["source"].Update()
+        item["mapper"].SetLookupTable(lut)
+        item["mapper"].SetScalarRange(lut.GetTableRange())
+        return item
+
     def add_surface(self, surface, color, vertices, simplices):
-        surface_points = vtkPoints()
-        surface_polydata = vtkPolyData()
-        surface_triangles = vtkCellArray()
-        for v in vertices:
-            surface_points.InsertNextPoint(v)
-        for s in simplices:
-            triangle = vtkTriangle()
-            triangle.GetPointIds().SetId(0, s[0])
-            triangle.GetPointIds().SetId(1, s[1])
-            triangle.GetPointIds().SetId(2, s[2])
-            surface_triangles.InsertNextCell(triangle)
-
-        surface_polydata.SetPoints(surface_points)
-        surface_polydata.SetPolys(surface_triangles)
-        surface_polydata.Modified()
+        surface_polydata = triangle_polydata(vertices, simplices)
 
         mapper = vtkPolyDataMapper()
         mapper.SetInputData(surface_polydata)
@@ -683,18 +692,9 @@ class ViewView:
         self._scene[name] = item
         return item
 
-    def add_skin(self, source, surface, color, valuerange):
-        thresholdfilter = vtkThreshold()
-        thresholdfilter.SetInputData(source)
-        thresholdfilter.ThresholdBetween(valuerange[0], valuerange[1])
-        thresholdfilter.Update()
-
-        surfacefilter = vtkDataSetSurfaceFilter()
-        surfacefilter.SetInputConnection(thresholdfilter.GetOutputPort())
-        surfacefilter.Update()
-
+    def add_skin(self, skin, surface, color):
         mapper = vtkPolyDataMapper()
-        mapper.SetInputData(surfacefilter.GetOutput())
+        mapper.SetInputData(skin)
         mapper.ScalarVisibilityOff()
         mapper.Update()
 
@@ -708,13 +708,47 @@ class ViewView:
         name = surface+"_skin"
         item = {
             "name": name,
-            "source": surfacefilter,
+            "source": skin,
             "mapper": mapper,
             "actor": actor,
         }
         self._scene[name] = item
         return item
 
+    def update_surface_points(self, surface, radius, point_list):
+        item = self.get(surface+"_points")
+        item["glyph"].SetRadius(radius)
+        item["source"].SetInputData(surface_points_polydata(point_list))
+        item["source"].Update()
+        return item
+
+    def update_surface_orientations(self, surface, radius, orientation_list):
+        item = self.get(surface+"_orientations")
+        item["source"].SetInputData(surface_orientations_polydata(orientation_list))
+        item["source"].SetScaleFactor(radius*2.0)
+        item["source"].Update()
+        return item
+
+    def update_surface(self, surface, vertices, simplices):
+        item = self.get(surface+"_surface")
+        item["source"] = triangle_polydata(vertices, simplices)
+        item["mapper"].SetInputData(item["source"])
+        item["mapper"].Update()
+        return item
+
+    def update_skin(self, surface, skin):
+        item = self.get(surface+"_skin")
+        item["source"] = skin
+        item["mapper"].SetInputData(skin)
+        item["mapper"].Update()
+        return item
+
+    def set_color(self, name, color):
+        item = self.get(name)
+        if item:
+            rgbcolor = hextorgb(color)
+            item["actor"].GetProperty().SetColor(rgbcolor[0],rgbcolor[1],rgbcolor[2])
+
     def add_cube_axes(self, source):
         bounds = source.GetBounds()
         self.axes.SetBounds( bounds[0], bounds[1], bounds[2], bounds[3], bounds[4], bounds[5])
@@ -749,19 +783,36 @@ class ViewView:
 
 
 class VtkViewer:
-    def __init__(self, app, subsurface):
+    def __init__(
+        self,
+        app,
+        subsurface,
+        sections_visible=False,
+        shared_glyphs=False,
+        topography_max_points=DEFAULT_TOPOGRAPHY_MAX_POINTS,
+    ):
         self._app = app
         self._subsurface = subsurface
+        self._topography_max_points = topography_max_points
+        # Points/orientations of all formations in one actor per kind
+        self._shared_glyphs = shared_glyphs
+        self._formation_glyphs = {}
+        self._formation_glyphs_visible = {"points": set(), "orientations": set()}
         self._current_actors = []
         self._computed = False
         self._temp_pipelines = []
+        # Surface pipelines kept alive across computes: {surface id: {kind: digest}}
+        self._surface_pipelines = {}
+        self._litho_values = None
+        self._litho_digest = None
+        self._skins = {}
+        self._skins_digest = None
         self._slice_x = 0
         self._slice_y = 0
         self._slice_z = 0
 
         self._grid = vtkImageData()
-        self._litho_field = vtkFloatArray()
-        self._litho_field.SetName("litho")
+        self._litho_field = to_vtk_array(np.zeros(0, dtype=np.float32), "litho")
         self._grid.GetCellData().SetScalars(self._litho_field)
         self._filter_threshold = vtkThreshold()
         self._filter_threshold.SetInputData(self._grid)
@@ -769,6 +820,17 @@ class VtkViewer:
         #  Outline
         self._filter_outline = vtkOutlineFilter()
         self._filter_outline.SetInputData(self._grid)
+        # Sections, one cell thick slabs of the litho cells at slice_x/y/z
+        self._filter_slices = {}
+        self._filter_slices_threshold = {}
+        for direction in "xyz":
+            voi = vtkExtractVOI()
+            voi.SetInputData(self._grid)
+            threshold = vtkThreshold()
+            threshold.SetInputConnection(voi.GetOutputPort())
+            threshold.ThresholdByUpper(0.0)
+            self._filter_slices[direction] = voi
+            self._filter_slices_threshold[direction] = threshold
 
         # View
         self.update_grid(dirtying=False)
@@ -781,6 +843,11 @@ class VtkViewer:
         self.set_representation("grid", Representation.SurfaceWithEdges)
         self.set_opacity("grid", 0.2)
         self.set_visibility("grid", False)
+        for direction in "xyz":
+            name = "slice_"+direction
+            self._view.add(name, self._filter_slices_threshold[direction])
+            self._current_actors.append(name)
+            self.set_visibility(name, sections_visible)
         self._view.add_cube_axes(self._grid)
         self._view.resetCamera()
 
@@ -888,6 +955,11 @@ class VtkViewer:
         pipeline_counter = self.add_topography_pipeline(topology_pipeline_id)
         pipeline_counter = self.add_topography_surface_pipeline(pipeline_counter, topology_pipeline_id)
         pipeline_counter = self.add_topography_contours_pipeline(pipeline_counter, topology_pipeline_id)
+        # Add sections
+        sections_pipeline_id = pipeline_counter
+        pipeline_counter = self.add_sections_pipeline(sections_pipeline_id)
+        for direction in "xyz":
+            pipeline_counter = self.add_slice_pipeline(pipeline_counter, direction, sections_pipeline_id)
         # Add surfaces except basement
         if self._computed:
             ordered_surfaces = self.get_ordered_surfaces()
@@ -960,6 +1032,32 @@ class VtkViewer:
         else:
             return uniqueid
 
+    def add_sections_pipeline(self, uniqueid):
+        sections_pipeline = {
+            "uniqueid": uniqueid,
+            "name": "sections", 
+            "color": "#607d8b", 
+            "pipeline": "sections",
+            "parent": 0,
+            "actions": ["collapsable"]
+        }
+        self.add_pipeline_parent(sections_pipeline)
+        return uniqueid + 1
+
+    def add_slice_pipeline(self, uniqueid, direction, parent):
+        slice_pipeline = {
+            "uniqueid": uniqueid,
+            "name": direction, 
+            "color": "#607d8b", 
+            "pipeline": "slice_"+direction,
+            "parent": parent
+        }
+        if slice_pipeline["pipeline"] in self._current_actors:
+            self.add_pipeline_child(slice_pipeline)
+            return uniqueid + 1
+        else:
+            return uniqueid
+
     def add_base_pipeline(self, uniqueid, surface):
         base_pipeline = {
             "uniqueid": uniqueid,
@@ -1052,9 +1150,30 @@ class VtkViewer:
                             })
 
     def get_pipeline_visibility(self, id, pipeline):
-        return self._app._pipeline_manager.get_visible(id, pipeline)
+        pipeline_manager = self._app._pipeline_manager
+        node = pipeline_manager.get_node(id)
+        if node is None or node["pipeline"] != pipeline:
+            # Not in the tree yet, report the actor as it is
+            return self.get_visibility(pipeline)
+        return pipeline_manager.get_visible(id, pipeline)
+
+    def get_visibility(self, name):
+        surface, _, kind = name.rpartition("_")
+        if self._shared_glyphs and kind in self._formation_glyphs_visible:
+            return surface in self._formation_glyphs_visible[kind]
+        item = self._view.get(name)
+        return bool(item and item.get("actor").GetVisibility())
     
     def set_visibility(self, name, on_off):
+        surface, _, kind = name.rpartition("_")
+        if self._shared_glyphs and kind in self._formation_glyphs_visible:
+            visible = self._formation_glyphs_visible[kind]
+            if on_off:
+                visible.add(surface)
+            else:
+                visible.discard(surface)
+            self.update_formation_glyphs(kind)
+            return 1
         item = self._view.get(name)
         if item:
             item.get("actor").SetVisibility(on_off)
@@ -1141,16 +1260,13 @@ class VtkViewer:
         current_actors = []
         current_actors.append("grid")
         current_actors.append("topography")
+        current_actors.extend(["slice_x", "slice_y", "slice_z"])
         
         if "topography_surface" in self._current_actors:
             current_actors.append("topography_surface")
         if "topography_contours" in self._current_actors:
             current_actors.append("topography_contours")
 
-        for name in self._current_actors:
-            if name not in ["grid", "topography", "topography_surface", "topography_contours"]:
-                self._view.remove(name)
-        
         self._current_actors = current_actors
 
         self.update_cube_axes()
@@ -1162,8 +1278,37 @@ class VtkViewer:
             self.update_surface()
             self.update_surface_points()
             self.update_surface_orientations()
-            if dirtying:
-                self.dirty("pipelines")
+
+        # Drop the pipelines that were not refreshed by this run
+        self.remove_stale_pipelines()
+
+        if computing and dirtying:
+            self.dirty("pipelines")
+
+    def update_pipeline(self, surface, kind, digest, build, refresh, opacity=None):
+        """Build a surface pipeline once, then only refresh it on new input"""
+        name = surface+"_"+kind
+        pipelines = self._surface_pipelines.setdefault(surface, {})
+        self._current_actors.append(name)
+        if self._view.get(name) is None:
+            build()
+            self.set_visibility(name, False)
+            if opacity is not None:
+                self.set_opacity(name, opacity)
+        elif pipelines.get(kind) != digest:
+            refresh()
+        pipelines[kind] = digest
+
+    def remove_stale_pipelines(self):
+        for surface in list(self._surface_pipelines):
+            pipelines = self._surface_pipelines[surface]
+            for kind in list(pipelines):
+                name = surface+"_"+kind
+                if name not in self._current_actors:
+                    self._view.remove(name)
+                    pipelines.pop(kind)
+            if not pipelines:
+                self._surface_pipelines.pop(surface)
 
     def update_grid(self, dirtying=True):
         grid = self._subsurface._state_handler.grid
@@ -1188,95 +1333,66 @@ class VtkViewer:
                 extent[2],
                 extent[4],
             )
-            self._litho_field.SetNumberOfTuples(self._grid.GetNumberOfCells())
-            self._litho_field.Fill(0)
+            self.set_litho_values(np.zeros(self._grid.GetNumberOfCells(), dtype=np.float32))
 
             # Update slice origin
             self._slice_x = int(resolution[0] * 0.5)
             self._slice_y = int(resolution[1] * 0.5)
             self._slice_z = int(resolution[2] * 0.5)
+            self.update_slices()
 
             if dirtying:
                 self.dirty("slice_x", "slice_y", "slice_z")
             return 1
 
+    def set_slices(self, slice_x, slice_y, slice_z):
+        slices = (int(slice_x), int(slice_y), int(slice_z))
+        if slices == (self._slice_x, self._slice_y, self._slice_z):
+            return 0
+        self._slice_x, self._slice_y, self._slice_z = slices
+        self.update_slices()
+        # Only worth a render when a section is shown
+        for direction in "xyz":
+            if self._view.get("slice_"+direction)["actor"].GetVisibility():
+                return 1
+        return 0
+
+    def update_slices(self):
+        resolutions = self.resolutions
+        slices = (self._slice_x, self._slice_y, self._slice_z)
+        for axis, direction in enumerate("xyz"):
+            # VOI in point indices, [i, i + 1] selects the cells of section i
+            index = min(max(slices[axis], 0), resolutions[axis] - 1)
+            voi = [0, resolutions[0], 0, resolutions[1], 0, resolutions[2]]
+            voi[2 * axis:2 * axis + 2] = [index, index + 1]
+            self._filter_slices[direction].SetVOI(voi)
+
+    def set_litho_values(self, values):
+        # Hand the NumPy buffer to VTK as is, the array keeps it alive
+        self._litho_values = values
+        self._litho_digest = array_digest(values)
+        self._litho_field = to_vtk_array(values, "litho")
+        self._grid.GetCellData().SetScalars(self._litho_field)
+        self._grid.Modified()
+
     def update_lithography(self):
         litho = self._subsurface._geo_model.solutions.lith_block
         blank = self._subsurface._geo_model._grid.regular_grid.mask_topo
-        i_max, j_max, k_max = self.resolutions
-        if litho.size == i_max * j_max * k_max:
-            self._litho_field.Fill(0)
-            lithography = litho.reshape(i_max, j_max, k_max)
-            if blank.size == i_max * j_max * k_max:
-                blanking = blank.reshape(i_max, j_max, k_max)
-                index = 0
-                for k in range(k_max):
-                    for j in range(j_max):
-                        for i in range(i_max):
-                            if blanking[i, j, k]:
-                                self._litho_field.SetTuple1(index, -1)
-                            else:
-                                self._litho_field.SetTuple1(index, lithography[i, j, k])
-                            index += 1
-            else:
-                index = 0
-                for k in range(k_max):
-                    for j in range(j_max):
-                        for i in range(i_max):
-                            self._litho_field.SetTuple1(index, lithography[i, j, k])
-                            index += 1
+        resolutions = self.resolutions
+        if litho.size == np.prod(resolutions):
+            self.set_litho_values(lithology_volume(litho, blank, resolutions))
             self.update_lut()
-            self._litho_field.Modified()
             self._filter_threshold.Update()
             self.field_ready = True
 
     def save_simulation_grid(self):
-        '''
-        Move all layers up so that the surface alligns with the top of the domain.
-        The new array is litho_top.
-        '''
-        dims = self._grid.GetDimensions()
-        print(">>> VISUALIZATiON: Converting grid...")
-        grid = dsa.WrapDataObject(self._grid)
-        # we have one less cells than points along one dimension
-        dims = [i - 1 for i in dims]
-        litho = grid.CellData['litho'].reshape(dims, order='F')
-        height = np.tile(np.arange(dims[2]).transpose(), (dims[0], dims[1], 1))
-        air2d = np.count_nonzero(litho == -1, axis=2)
-        air = np.tile(air2d.reshape(dims[0], dims[1], 1), (1, 1, dims[2]))
-        # shift height up so that the surface is at the top
-        height_top = np.mod(height - air, dims[2])
-        # shift litho so that the surface is at the top
-        xi,yi,_ = np.indices((dims[0],dims[1],dims[2]))
-        litho_top = litho[xi, yi, height_top]
-        # compute DEM
-        dem = height_top[:,:,dims[2] - 1]
-        min_dem = np.amin(dem)
-        dem = dem - min_dem
-        print('dem shape: {}'.format(dem.shape))
-        disp = np.tile(dem, (1, 1, dims[2]))
-
+        dims = [i - 1 for i in self._grid.GetDimensions()]
         print(">>> VISUALIZATiON: Saving grid...")
-        dx, dy, dz = self._grid.GetSpacing()
-        litho_top_float64 = litho_top.astype(dtype=np.float64)
-        write_pfb('grid.pfb', litho_top_float64, dx=dx, dy=dy, dz=dz, z_first=False)
-
-        dem_float64 = dem.reshape(dims[0], dims[1], 1).astype(dtype=np.float64)
-        print('dem shape: {}'.format(dem_float64.shape))
-        write_pfb('dem.pfb', dem_float64, dx=dx, dy=dy, dz=dz, z_first=False)
-
-        # add additional fields to dataset
-        # grid.CellData.append(litho_top.reshape(
-        #     (dims[0]*dims[1]*dims[2],), order='F'), 'litho_top')
-        # grid.CellData.append(disp.reshape(
-        #     (dims[0]*dims[1]*dims[2],), order='F'), 'disp')
-        # writer = vtkXMLImageDataWriter()
-        # writer.SetFileName("grid.vti")
-        # writer.SetInputDataObject(self._grid)
-        # writer.Write()
+        # we have one less cells than points along one dimension
+        litho = self._litho_values.reshape(dims, order='F')
+        write_simulation_grid(litho, self._grid.GetSpacing())
 
     def update_lut(self):
-        item = self._view.get("grid")
         colors = self._subsurface._geo_model.surfaces.colors.colordict
         surfaces = self.get_ordered_surfaces()
         scalarMin = 0.0
@@ -1290,12 +1406,15 @@ class VtkViewer:
         for i in range(1,len(surfaces) + 1):
             rgbcolor = hextorgb(colors[surfaces[i-1]])
             lut.SetTableValue(i, rgbcolor[0], rgbcolor[1], rgbcolor[2], 1.0)
-        item["mapper"].SetScalarRange(scalarMin, scalarMax)
-        item["mapper"].SetLookupTable(lut)
-        item["mapper"].SetScalarModeToUseCellData()
-        item["mapper"].SetColorModeToMapScalars()
-        item["mapper"].ScalarVisibilityOn()
-        item["mapper"].Update()
+        # The sections share the grid colors
+        for name in ["grid", "slice_x", "slice_y", "slice_z"]:
+            item = self._view.get(name)
+            item["mapper"].SetScalarRange(scalarMin, scalarMax)
+            item["mapper"].SetLookupTable(lut)
+            item["mapper"].SetScalarModeToUseCellData()
+            item["mapper"].SetColorModeToMapScalars()
+            item["mapper"].ScalarVisibilityOn()
+            item["mapper"].Update()
 
     def update_cube_axes(self):
         self._view.update_cube_axes(self._grid)
@@ -1303,16 +1422,20 @@ class VtkViewer:
     def update_topography(self, dirtying=True):
         self._view.remove("topography_surface")
         self._view.remove("topography_contours")
-        points = self._subsurface._geo_model._grid.topography.values
+        # GemPy keeps the full resolution DEM, the view gets a lighter one
+        points = self._subsurface.topography_overview
+        if points is None:
+            points = self._subsurface._geo_model._grid.topography.values
+        topography = topography_source(points, self._topography_max_points)
         name = "topography_surface"
         if "topography_contours" not in self._current_actors:
             self._current_actors.append(name)
-        self._view.add_topography_surface(points)
+        self._view.add_topography_surface(topography)
         self.set_visibility(name, False)
         name = "topography_contours"
         if "topography_contours" not in self._current_actors:
             self._current_actors.append(name)
-        self._view.add_topography_contours(points)
+        self._view.add_topography_contours(topography)
         self.set_visibility(name, False)
         if dirtying:
             self.dirty("pipelines")
@@ -1323,16 +1446,24 @@ class VtkViewer:
         surfaces = self.get_ordered_surfaces()
         # remove basement from list
         surfaces.remove('Surface_1')
+        if self._shared_glyphs:
+            points = self._subsurface._geo_model._surface_points.df
+            self.set_formation_glyphs("points", surfaces, points, ["X", "Y", "Z"], radius)
+            return
         for surface in surfaces:
             surface_filter = self._subsurface._geo_model._surface_points.df.surface == surface
             points = self._subsurface._geo_model._surface_points.df[surface_filter][["X", "Y", "Z"]].values
             surface_filter = self._subsurface._geo_model._surfaces.df.surface == surface
             the_surface_df = self._subsurface._geo_model._surfaces.df[surface_filter]
             color = the_surface_df.color.tolist()[0]
-            name = surface+"_points"
-            self._current_actors.append(name)
-            self._view.add_surface_points(surface, color, radius, points)
-            self.set_visibility(name, False)
+            self.update_pipeline(
+                surface,
+                "points",
+                array_digest(points, radius),
+                lambda: self._view.add_surface_points(surface, color, radius, points),
+                lambda: self._view.update_surface_points(surface, radius, points),
+            )
+            self._view.set_color(surface+"_points", color)
 
     def update_surface_orientations(self):
         spacing = self._grid.GetSpacing()
@@ -1340,16 +1471,77 @@ class VtkViewer:
         surfaces = self.get_ordered_surfaces()
         # remove basement from list
         surfaces.remove('Surface_1')
+        if self._shared_glyphs:
+            orientations = self._subsurface._geo_model._orientations.df
+            columns = ["X", "Y", "Z", "G_x", "G_y", "G_z"]
+            self.set_formation_glyphs("orientations", surfaces, orientations, columns, radius)
+            return
         for surface in surfaces:
             surface_filter = self._subsurface._geo_model._orientations.df.surface == surface
             orientations = self._subsurface._geo_model._orientations.df[surface_filter][["X", "Y", "Z", "G_x", "G_y", "G_z"]].values
             surface_filter = self._subsurface._geo_model._surfaces.df.surface == surface
             the_surface_df = self._subsurface._geo_model._surfaces.df[surface_filter]
             color = the_surface_df.color.tolist()[0]
-            name = surface+"_orientations"
-            self._current_actors.append(name)
-            self._view.add_surface_orientations(surface, color, radius, orientations)
-            self.set_visibility(name, False)
+            self.update_pipeline(
+                surface,
+                "orientations",
+                array_digest(orientations, radius),
+                lambda: self._view.add_surface_orientations(surface, color, radius, orientations),
+                lambda: self._view.update_surface_orientations(surface, radius, orientations),
+            )
+            self._view.set_color(surface+"_orientations", color)
+
+    def set_formation_glyphs(self, kind, surfaces, df, columns, radius):
+        surfaces_df = self._subsurface._geo_model._surfaces.df
+        colors = dict(zip(surfaces_df.surface, surfaces_df.color))
+        formation = df.surface.map({surface: i for i, surface in enumerate(surfaces)})
+        self._formation_glyphs[kind] = {
+            "surfaces": surfaces,
+            "colors": [colors[surface] for surface in surfaces],
+            "formation": formation.fillna(-1).to_numpy(dtype=np.int32),
+            "values": df[columns].to_numpy(dtype=np.float64),
+            "radius": radius,
+        }
+        # The per formation pipelines only drive the selection
+        for surface in surfaces:
+            self._current_actors.append(surface+"_"+kind)
+        self.update_formation_glyphs(kind)
+
+    def update_formation_glyphs(self, kind):
+        glyphs = self._formation_glyphs.get(kind)
+        if glyphs is None:
+            return
+        surfaces = glyphs["surfaces"]
+        selection = [
+            i for i, surface in enumerate(surfaces)
+            if surface in self._formation_glyphs_visible[kind]
+        ]
+        mask = np.isin(glyphs["formation"], selection)
+        if kind == "points":
+            points_polydata = surface_points_polydata(glyphs["values"][mask])
+        else:
+            points_polydata = surface_orientations_polydata(glyphs["values"][mask])
+        points_polydata.GetPointData().AddArray(
+            to_vtk_array(glyphs["formation"][mask], "formation")
+        )
+
+        lut = vtkLookupTable()
+        lut.SetTableRange(0.0, max(len(surfaces) - 1, 1))
+        lut.SetNumberOfTableValues(max(len(surfaces), 1))
+        lut.Build()
+        for i, color in enumerate(glyphs["colors"]):
+            rgbcolor = hextorgb(color)
+            lut.SetTableValue(i, rgbcolor[0], rgbcolor[1], rgbcolor[2], 1.0)
+
+        name = "formations_"+kind
+        radius = glyphs["radius"]
+        if self._view.get(name) is None:
+            if kind == "points":
+                self._view.add_formation_points(name, radius, points_polydata, lut)
+            else:
+                self._view.add_formation_orientations(name, radius, points_polydata, lut)
+        else:
+            self._view.update_formation_glyphs(name, radius, points_polydata, lut)
 
     def update_surface(self):
         surfaces = self.get_ordered_surfaces()
@@ -1358,16 +1550,31 @@ class VtkViewer:
         for surface in surfaces:
             surface_filter = self._subsurface._geo_model._surfaces.df.surface == surface
             the_surface_df = self._subsurface._geo_model._surfaces.df[surface_filter]
-            vertices = the_surface_df.vertices.values.tolist()[0]
-            simplices = the_surface_df.edges.values.tolist()[0]
+            vertices = np.ascontiguousarray(the_surface_df.vertices.values[0])
+            simplices = np.ascontiguousarray(the_surface_df.edges.values[0])
             color = the_surface_df.color.tolist()[0]
-            name = surface+"_surface"
-            self._current_actors.append(name)
-            self._view.add_surface(surface, color, vertices, simplices)
-            self.set_visibility(name, False)
-            self.set_opacity(name, 0.2)
+            self.update_pipeline(
+                surface,
+                "surface",
+                array_digest(vertices, simplices),
+                lambda: self._view.add_surface(surface, color, vertices, simplices),
+                lambda: self._view.update_surface(surface, vertices, simplices),
+                opacity=0.2,
+            )
+            self._view.set_color(surface+"_surface", color)
+
+    def update_skins(self):
+        # All formation skins come out of a single pass over the lithology
+        if self._skins_digest != self._litho_digest:
+            volume = self._litho_values.reshape(self.resolutions, order="F")
+            self._skins = skin_polydata(
+                volume, self._grid.GetOrigin(), self._grid.GetSpacing()
+            )
+            self._skins_digest = self._litho_digest
+        return self._skins
 
     def update_skin(self):
+        skins = self.update_skins()
         surfaces = self.get_ordered_surfaces()
         for surface in surfaces:
             surface_object = self._subsurface._state_handler.find_surface_by_id(surface)
@@ -1376,9 +1583,13 @@ class VtkViewer:
                 the_surface_df = self._subsurface._geo_model._surfaces.df[surface_filter]
                 value = the_surface_df.id.tolist()[0]
                 color = the_surface_df.color.tolist()[0]
-                valuerange = [float(value) - 0.5, float(value) + 0.5]
-                name = surface+"_skin"
-                self._current_actors.append(name)
-                self._view.add_skin(self._grid, surface, color, valuerange)
-                self.set_visibility(name, False)
-                self.set_opacity(name, 0.2)
+                skin = skins.get(int(value), vtkPolyData())
+                self.update_pipeline(
+                    surface,
+                    "skin",
+                    (self._litho_digest, value),
+                    lambda: self._view.add_skin(skin, surface, color),
+                    lambda: self._view.update_skin(surface, skin),
+                    opacity=0.2,
+                )
+                self._view.set_color(surface+"_skin", color)
@@ -0,0 +1,220 @@
+import hashlib
+
+import numpy as np
+
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonCore import vtkIdTypeArray, vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData, vtkStructuredGrid
+
+# NumPy dtype matching vtkIdType for this VTK build
+ID_TYPE = np.int64 if vtkIdTypeArray().GetDataTypeSize() == 8 else np.int32
+
+# Vertex budget of the topography shown in the 3D view
+DEFAULT_TOPOGRAPHY_MAX_POINTS = 250000
+
+# -----------------------------------------------------------------------------
+# NumPy <-> VTK helpers
+# -----------------------------------------------------------------------------
+
+
+def to_vtk_array(values, name=None):
+    """Wrap a NumPy array as a VTK array without copying it"""
+    values = np.ascontiguousarray(values)
+    array = numpy_support.numpy_to_vtk(values, deep=0)
+    if name:
+        array.SetName(name)
+    return array
+
+
+def lithology_volume(lith_block, mask_topo, resolution):
+    """Return the lithology block as float32 cell values in VTK order
+
+    GemPy stores the regular grid with z varying fastest while VTK expects x
+    to vary fastest. Cells above the topography are blanked to -1.
+    """
+    nx, ny, nz = resolution
+    volume = np.asarray(lith_block, dtype=np.float32).reshape(nx, ny, nz)
+    if mask_topo is not None and np.size(mask_topo) == volume.size:
+        blanking = np.asarray(mask_topo, dtype=bool).reshape(nx, ny, nz)
+        volume = np.where(blanking, np.float32(-1), volume)
+    return np.ravel(volume, order="F")
+
+
+def to_vtk_points(coordinates):
+    """Wrap an (n, 3) coordinate array as vtkPoints"""
+    points = vtkPoints()
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+    points.SetData(to_vtk_array(coordinates))
+    return points
+
+
+def to_vtk_cells(connectivity, cell_size):
+    """Build a vtkCellArray of fixed size cells from an (n, cell_size) array"""
+    connectivity = np.ascontiguousarray(connectivity, dtype=ID_TYPE).reshape(-1)
+    offsets = np.arange(0, connectivity.size + 1, cell_size, dtype=ID_TYPE)
+    # vtkCellArray re-wraps vtkIdTypeArray memory without keeping the array
+    # alive, so the (cheap) copy is required here
+    cells = vtkCellArray()
+    cells.SetData(
+        numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=1),
+        numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=1),
+    )
+    return cells
+
+
+def triangle_polydata(vertices, simplices):
+    """Build a triangle mesh from GemPy vertices/edges arrays in one shot"""
+    polydata = vtkPolyData()
+    polydata.SetPoints(to_vtk_points(vertices))
+    polydata.SetPolys(to_vtk_cells(simplices, 3))
+    return polydata
+
+
+def vertex_polydata(coordinates):
+    """Build a point cloud with one vertex cell per point in one shot"""
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+    polydata = vtkPolyData()
+    polydata.SetPoints(to_vtk_points(coordinates))
+    polydata.SetVerts(to_vtk_cells(np.arange(len(coordinates)), 1))
+    return polydata
+
+
+def raster_points(values):
+    """Order topography points as an (ny, nx, 3) raster, None if they are not one
+
+    GemPy rasters come with y varying fastest (values_2d.reshape(-1, 3)),
+    which is checked first; any other complete raster is sorted out with
+    np.unique.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1, 3)
+    n = len(values)
+    changes = np.flatnonzero(values[1:, 0] != values[0, 0])
+    ny = changes[0] + 1 if changes.size else n
+    if 1 < ny < n and n % ny == 0:
+        raster = values.reshape(-1, ny, 3)
+        if (raster[:, :, 0] == raster[:, :1, 0]).all() and (
+            raster[:, :, 1] == raster[:1, :, 1]
+        ).all():
+            return raster.transpose(1, 0, 2)
+
+    x, i = np.unique(values[:, 0], return_inverse=True)
+    y, j = np.unique(values[:, 1], return_inverse=True)
+    if x.size < 2 or y.size < 2 or x.size * y.size != n:
+        return None
+    index = j.reshape(-1) * x.size + i.reshape(-1)
+    filled = np.zeros(n, dtype=bool)
+    filled[index] = True
+    if not filled.all():
+        return None
+    raster = np.empty_like(values)
+    raster[index] = values
+    return raster.reshape(y.size, x.size, 3)
+
+
+def decimate_raster(raster, max_points):
+    """Subsample an (ny, nx, 3) raster with a constant stride to fit max_points
+
+    The last row and column are kept so that the extent does not shrink.
+    """
+    ny, nx, _ = raster.shape
+    stride = max(1, int(np.sqrt(ny * nx / max_points)))
+    while True:
+        rows = np.unique(np.append(np.arange(0, ny, stride), ny - 1))
+        columns = np.unique(np.append(np.arange(0, nx, stride), nx - 1))
+        if rows.size * columns.size <= max_points or stride >= max(nx, ny):
+            return raster[np.ix_(rows, columns)]
+        stride += 1
+
+
+def topography_grid(values, max_points=None):
+    """Build the topography as a vtkStructuredGrid with an elevation array
+
+    values are topography points or an (ny, nx, 3) raster, decimated down to
+    max_points. Returns None when the points do not form a regular raster.
+    """
+    raster = values if np.ndim(values) == 3 else raster_points(values)
+    if raster is None:
+        return None
+    if max_points and raster.shape[0] * raster.shape[1] > max_points:
+        raster = decimate_raster(raster, max_points)
+    ny, nx, _ = raster.shape
+    # x varies fastest in VTK structured points
+    points = np.ascontiguousarray(raster).reshape(-1, 3)
+    grid = vtkStructuredGrid()
+    grid.SetDimensions(nx, ny, 1)
+    grid.SetPoints(to_vtk_points(points))
+    grid.GetPointData().SetScalars(to_vtk_array(points[:, 2], "elevation"))
+    return grid
+
+
+def array_digest(*arrays):
+    """Content hash of the given arrays, used to detect unchanged inputs"""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+def skin_polydata(volume, origin, spacing):
+    """Extract the boundary surface of every formation in a single pass
+
+    volume is an (nx, ny, nz) array of cell labels where negative values are
+    blanked cells. Every face separating two different labels (or a label from
+    the outside of the grid) is classified once and assigned, with an outward
+    normal, to the formation(s) on either side. Returns {label: vtkPolyData}.
+    """
+    labels = np.rint(volume).astype(np.int32)
+    nx, ny, nz = labels.shape
+    padded = np.pad(labels, 1, constant_values=-1)
+    strides = np.array([1, nx + 1, (nx + 1) * (ny + 1)], dtype=ID_TYPE)
+
+    face_labels = []
+    face_quads = []
+    for axis in range(3):
+        inner = [slice(1, -1)] * 3
+        lower, upper = list(inner), list(inner)
+        lower[axis] = slice(None, -1)
+        upper[axis] = slice(1, None)
+        lower_labels = padded[tuple(lower)]
+        upper_labels = padded[tuple(upper)]
+        ijk = np.nonzero(lower_labels != upper_labels)
+
+        # Quad spanned by the two other axes, counter-clockwise around +axis
+        d1 = strides[(axis + 1) % 3]
+        d2 = strides[(axis + 2) % 3]
+        base = sum(ijk[i].astype(ID_TYPE) * strides[i] for i in range(3))
+        quads = np.stack([base, base + d1, base + d1 + d2, base + d2], axis=1)
+
+        below = lower_labels[ijk]
+        above = upper_labels[ijk]
+        face_labels.extend([below[below >= 0], above[above >= 0]])
+        face_quads.extend([quads[below >= 0], quads[above >= 0][:, ::-1]])
+
+    face_labels = np.concatenate(face_labels)
+    face_quads = np.concatenate(face_quads)
+    order = np.argsort(face_labels, kind="stable")
+    face_labels = face_labels[order]
+    face_quads = face_quads[order]
+    values, starts = np.unique(face_labels, return_index=True)
+    ends = np.append(starts[1:], face_labels.size)
+
+    origin = np.asarray(origin, dtype=np.float64)
+    spacing = np.asarray(spacing, dtype=np.float64)
+    skins = {}
+    for value, start, end in zip(values, starts, ends):
+        point_ids, connectivity = np.unique(face_quads[start:end], return_inverse=True)
+        ijk = np.stack(
+            [
+                point_ids % (nx + 1),
+                (point_ids // (nx + 1)) % (ny + 1),
+                point_ids // ((nx + 1) * (ny + 1)),
+            ],
+            axis=1,
+        )
+        polydata = vtkPolyData()
+        polydata.SetPoints(to_vtk_points(origin + ijk * spacing))
+        polydata.SetPolys(to_vtk_cells(connectivity.reshape(-1, 4), 4))
+        skins[int(value)] = polydata
+    return skins
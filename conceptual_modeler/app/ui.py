@@ -13,6 +13,20 @@ PIPELINE_ICON_MANAGER.url("collapsable", "./icons/chevron-down.svg")
 
 PIPELINE_ICONS = PIPELINE_ICON_MANAGER.assets
 
+
+class SectionFigure(matplotlib.Figure):
+    """matplotlib.Figure that can also be given an already serialized figure
+
+    update(spec=...) takes the output of to_data, such as the sections the
+    engine keeps in its slice cache, and skips the mpld3 serialization.
+    """
+
+    def update(self, figure=None, spec=None, **kwargs):
+        if spec is None:
+            return super().update(figure, **kwargs)
+        self.server.state[self.key] = spec
+
+
 def initialize(server):
     state, ctrl = server.state, server.controller
 
@@ -35,10 +49,28 @@ def initialize(server):
             create_drawer(drawer, ctrl)
         with layout.content as content:
             create_content(content, state, ctrl)
+            state_patch_listener()
 
         # Footer
         # layout.footer.hide()
 
+def state_patch_listener():
+    # Apply the points/orientations patches of ApplicationLogic.patch_state,
+    # the lists are client only so the result is not sent back
+    trame.ClientStateChange(
+        value="state_patch",
+        immediate=True,
+        change=(
+            "$event && set($event.key, $event.ops.reduce((items, op) =>"
+            " op.op === 'insert'"
+            " ? items.slice(0, op.index).concat([op.item], items.slice(op.index))"
+            " : op.op === 'remove'"
+            " ? items.filter((item) => item.id !== op.id)"
+            " : items.map((item) => item.id === op.id ? op.item : item),"
+            " get($event.key) || []))"
+        ),
+    )
+
 # -----------------------------------------------------------------------------
 # UI Toolbar
 # -----------------------------------------------------------------------------
@@ -151,6 +183,15 @@ def run_button():
         dense=True,
         disabled=("run_button", False),
     )
+    vuetify.VProgressCircular(
+        v_show="compute_status === 'running' || compute_status === 'queued' || compute_status === 'rendering'",
+        value=("compute_progress", 0),
+        indeterminate=("compute_status === 'running'",),
+        color="success",
+        size=20,
+        width=2,
+        classes="mx-1",
+    )
 
 # -----------------------------------------------------------------------------
 # Demo Button
@@ -993,6 +1034,71 @@ def surfaces_card_actions(ctrl):
         ):
             vuetify.VIcon("mdi-check")
 
+# -----------------------------------------------------------------------------
+# Points and orientations lists, only a page is sent by the server
+# -----------------------------------------------------------------------------
+
+def list_view_toolbar(name, columns):
+    with vuetify.VRow(
+        classes="py-1 px-2",
+        dense=True,
+        align="center",
+    ):
+        with vuetify.VCol(cols="5"):
+            vuetify.VTextField(
+                v_model=(f"{name}Filter",),
+                prepend_inner_icon="mdi-magnify",
+                label="Filter",
+                clearable=True,
+                dense=True,
+                hide_details=True,
+            )
+        with vuetify.VCol(cols="3"):
+            vuetify.VSelect(
+                v_model=(f"{name}Sort",),
+                items=(f"{name}_columns", columns),
+                label="Sort",
+                clearable=True,
+                dense=True,
+                hide_details=True,
+            )
+        with vuetify.VCol(cols="1"):
+            with vuetify.VBtn(
+                icon=True,
+                x_small=True,
+                disabled=(f"!{name}Sort",),
+                click=f"{name}SortDesc = !{name}SortDesc",
+            ):
+                vuetify.VIcon(
+                    v_text=f"{name}SortDesc ? 'mdi-sort-descending' : 'mdi-sort-ascending'",
+                    __properties=["v_text"],
+                )
+        with vuetify.VCol(cols="3"):
+            vuetify.VSelect(
+                v_model=(f"{name}PageSize",),
+                items=(
+                    "list_page_sizes",
+                    [
+                        {"text": "50", "value": 50},
+                        {"text": "100", "value": 100},
+                        {"text": "500", "value": 500},
+                        {"text": "All", "value": -1},
+                    ],
+                ),
+                label="Rows",
+                dense=True,
+                hide_details=True,
+            )
+
+def list_view_pagination(name):
+    vuetify.VPagination(
+        v_model=(f"{name}Page",),
+        length=(f"Math.max(1, Math.ceil({name}Total / {name}PageSize))",),
+        v_show=f"{name}PageSize > 0 && {name}Total > {name}PageSize",
+        total_visible=5,
+        classes="py-1",
+    )
+
 # -----------------------------------------------------------------------------
 # Workflow Points Card
 # -----------------------------------------------------------------------------
@@ -1015,13 +1121,14 @@ def points_card(ctrl):
             points_card_actions(ctrl)
 
 def points_card_text(ctrl):
+    list_view_toolbar("points", ["x", "y", "z"])
     with vuetify.VList(
         classes="pa-0",
         dense=True,
         hide_details=True,
     ):
         vuetify.VSubheader(
-            "X, Y, Z",
+            "X, Y, Z ({{ pointsTotal }})",
             classes="d-flex justify-center",
         )
         with vuetify.VListItem(
@@ -1052,6 +1159,7 @@ def points_card_text(ctrl):
                     __properties=["v_text"],
                     x_small=True,
                 )
+    list_view_pagination("points")
 
 def points_card_actions(ctrl):
     with vuetify.VRow(
@@ -1144,13 +1252,14 @@ def orientations_card(ctrl):
             orientations_card_actions(ctrl)
 
 def orientations_card_text(ctrl):
+    list_view_toolbar("orientations", ["x", "y", "z", "gx", "gy", "gz"])
     with vuetify.VList(
         classes="pa-0",
         dense=True,
         hide_details=True,
     ):
         vuetify.VSubheader(
-            "X, Y, Z & GX, GY, GZ",
+            "X, Y, Z & GX, GY, GZ ({{ orientationsTotal }})",
             classes="d-flex justify-center",
         )
         with vuetify.VListItem(
@@ -1181,6 +1290,7 @@ def orientations_card_text(ctrl):
                     __properties=["v_text"],
                     x_small=True,
                 )
+    list_view_pagination("orientations")
 
 def orientations_card_actions(ctrl):
     with vuetify.VRow(
@@ -1285,6 +1395,9 @@ def orientations_card_actions(ctrl):
 # -----------------------------------------------------------------------------
 
 def create_content(content, state, ctrl):
+    # In vtk mode the sections are only shown as slices of the 3D view
+    sections_2d = state.sections_mode != "vtk"
+    split_view = "viewLayout !== 'singleView'" if sections_2d else "false"
     with content:
         with vuetify.VContainer(
             fluid=True,
@@ -1294,19 +1407,25 @@ def create_content(content, state, ctrl):
             with vuetify.VRow(
                 no_gutters=True,
                 classes="ma-0",
-                style=("{ height: viewLayout !== 'singleView' ? '50%' : '100%' }",),
+                style=(f"{{ height: {split_view} ? '50%' : '100%' }}",),
             ):
                 with vuetify.VCol(
-                    v_show="viewLayout !== 'singleView'",
+                    v_show=split_view,
                     style="position: relative",
                 ):
                     with trame.SizeObserver("x_figure_size"):
-                        html_viewX = matplotlib.Figure(
-                            figure=ctrl.update_xfig(),
-                            style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
-                        )
-                        state.VIEW_FIGX = True
-                        ctrl.view_x_update = html_viewX.update
+                        if state.sections_mode == "image":
+                            html.Img(
+                                src=("x_section_image", ""),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                        elif sections_2d:
+                            html_viewX = SectionFigure(
+                                figure=ctrl.update_xfig(),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                            ctrl.view_x_update = html_viewX.update
+                        state.VIEW_FIGX = sections_2d
                     vuetify.VSlider(
                         label="X",
                         style="position: absolute;z-index: 1;left: 10px;right: 10px;bottom: 0;",
@@ -1320,31 +1439,55 @@ def create_content(content, state, ctrl):
                         thumb_size="24",
                         thumb_color="blue-grey",
                     )
-                with vuetify.VCol(classes="pa-0 fill-height"):
+                with vuetify.VCol(classes="pa-0 fill-height", style="position: relative"):
                     html_view3D = vtk.VtkRemoteLocalView(
                         ctrl.getRenderWindow("view3D"),
                         mode="local",
                         namespace="view3D",
                     )
                     state.VIEW_3D = True
+                    if not sections_2d:
+                        with html.Div(
+                            style="position: absolute;z-index: 1;left: 10px;right: 10px;bottom: 0;",
+                        ):
+                            for direction, color in (("x", "red"), ("y", "yellow"), ("z", "green")):
+                                vuetify.VSlider(
+                                    label=direction.upper(),
+                                    dense=True,
+                                    hide_details=True,
+                                    color=color,
+                                    track_color=color,
+                                    min=0,
+                                    max=(f"slider_{direction}_max", 9),
+                                    v_model=(f"slice_{direction}", 5),
+                                    thumb_label=True,
+                                    thumb_size="24",
+                                    thumb_color="blue-grey",
+                                )
                     ctrl.view_3D_update = html_view3D.update
                     ctrl.view_3D_reset_camera = html_view3D.reset_camera
             with vuetify.VRow(
                 no_gutters=True,
                 classes="ma-0",
-                style=("{ height: viewLayout !== 'singleView' ? '50%' : '100%' }",),
+                style=(f"{{ height: {split_view} ? '50%' : '100%' }}",),
             ):
                 with vuetify.VCol(
-                    v_show="viewLayout !== 'singleView'",
+                    v_show=split_view,
                     style="position: relative;",
                 ):
                     with trame.SizeObserver("y_figure_size"):
-                        html_viewY = matplotlib.Figure(
-                            figure=ctrl.update_yfig(),
-                            style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
-                        )
-                        state.VIEW_FIGY = True
-                        ctrl.view_y_update = html_viewY.update
+                        if state.sections_mode == "image":
+                            html.Img(
+                                src=("y_section_image", ""),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                        elif sections_2d:
+                            html_viewY = SectionFigure(
+                                figure=ctrl.update_yfig(),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                            ctrl.view_y_update = html_viewY.update
+                        state.VIEW_FIGY = sections_2d
                     vuetify.VSlider(
                         label="Y",
                         style="position: absolute;z-index: 1;left: 10px;right: 10px;bottom: 0;",
@@ -1360,16 +1503,22 @@ def create_content(content, state, ctrl):
                         thumb_color="blue-grey",
                     )
                 with vuetify.VCol(
-                    v_show="viewLayout !== 'singleView'",
+                    v_show=split_view,
                     style="position: relative",
                 ):
                     with trame.SizeObserver("z_figure_size"):
-                        html_viewZ = matplotlib.Figure(
-                            figure=ctrl.update_zfig(),
-                            style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
-                        )
-                        state.VIEW_FIGZ = True
-                        ctrl.view_z_update = html_viewZ.update
+                        if state.sections_mode == "image":
+                            html.Img(
+                                src=("z_section_image", ""),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                        elif sections_2d:
+                            html_viewZ = SectionFigure(
+                                figure=ctrl.update_zfig(),
+                                style="position: absolute;left: 50%;top: 0px;transform: translateX(-50%);",
+                            )
+                            ctrl.view_z_update = html_viewZ.update
+                        state.VIEW_FIGZ = sections_2d
                     vuetify.VSlider(
                         label="Z",
                         style="position: absolute;z-index: 1;left: 10px;right: 10px;bottom: 0;",
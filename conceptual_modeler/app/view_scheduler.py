@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+
+class ViewScheduler:
+    """Debounce view renders, only the latest request per view is rendered
+
+    Every request (re)arms a timer for its view. A request arriving while a
+    timer is pending replaces it and the earlier one is counted as skipped.
+    A steady stream of requests (slider drag) still renders every max_wait
+    seconds, counted from the first pending request. Renders read the
+    current state (slice index, figure size) when the timer fires, so they
+    always draw the latest values.
+    """
+
+    def __init__(self, state, name, delay=0.05, max_wait=0.25):
+        self._state = state
+        self._name = name
+        self._delay = delay
+        self._max_wait = max(delay, max_wait)
+        self._renders = {}
+        self._handles = {}
+        # Loop time of the first request not rendered yet, per view
+        self._pending_since = {}
+        self._metrics = {}
+        self._state[self._name] = {}
+
+    def register(self, view, render):
+        self._renders[view] = render
+        self._metrics[view] = {
+            "requested": 0,
+            "rendered": 0,
+            "skipped": 0,
+            "last_ms": None,
+        }
+
+    def request(self, *views):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        for view in views:
+            self._metrics[view]["requested"] += 1
+            since = self._pending_since.get(view)
+            if self.cancel(view):
+                self._metrics[view]["skipped"] += 1
+            if loop is None or self._delay <= 0:
+                self._render(view)
+            else:
+                now = loop.time()
+                if since is None:
+                    since = now
+                self._pending_since[view] = since
+                delay = min(self._delay, since + self._max_wait - now)
+                self._handles[view] = loop.call_later(max(delay, 0), self._render, view)
+
+    def cancel(self, view):
+        self._pending_since.pop(view, None)
+        handle = self._handles.pop(view, None)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def _render(self, view):
+        self._handles.pop(view, None)
+        self._pending_since.pop(view, None)
+        start = time.time()
+        with self._state:
+            self._renders[view]()
+            metrics = self._metrics[view]
+            metrics["rendered"] += 1
+            metrics["last_ms"] = round((time.time() - start) * 1000, 1)
+            self._state[self._name] = {
+                view: dict(values) for view, values in self._metrics.items()
+            }
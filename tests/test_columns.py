@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from conceptual_modeler.app.modeler.columns import ColumnStore
+
+
+def test_append_grows_and_shares_views():
+    store = ColumnStore(["x", "y", "z"], capacity=2)
+    for index in range(1, 6):
+        store.append(index, [index, 2 * index, 3 * index])
+
+    assert len(store) == 5
+    assert store.index.tolist() == [1, 2, 3, 4, 5]
+    assert store.column("y").tolist() == [2, 4, 6, 8, 10]
+    assert store.values.shape == (5, 3)
+    assert store.nbytes >= 5 * 4 * 8
+
+    # Views of the store, no copy
+    store.column("z")[0] = -1
+    assert store.values[0, 2] == -1
+
+
+def test_extend():
+    store = ColumnStore(["x", "y"])
+    store.append(1, [0, 0])
+    store.extend([3, 7, 8], np.arange(6).reshape(3, 2))
+    store.extend([], np.empty((0, 2)))
+
+    assert store.index.tolist() == [1, 3, 7, 8]
+    assert store.values[1:].tolist() == [[0, 1], [2, 3], [4, 5]]
+
+
+@pytest.mark.parametrize("index", [[5, 4], [2, 2], [3]])
+def test_extend_rejects_unordered_indices(index):
+    store = ColumnStore(["x"])
+    store.append(3, [0])
+    with pytest.raises(ValueError):
+        store.extend(index, np.zeros((len(index), 1)))
+    assert len(store) == 1
+
+
+def test_append_rejects_unordered_index():
+    store = ColumnStore(["x"])
+    store.append(3, [0])
+    with pytest.raises(ValueError):
+        store.append(3, [1])
+
+
+def test_find_and_delete():
+    store = ColumnStore(["x"])
+    store.extend([2, 4, 6, 8], [[20], [40], [60], [80]])
+
+    assert store.find(6) == 2
+    assert store.find(5) is None
+    assert store.find(9) is None
+
+    store.delete(store.find(4))
+    assert store.index.tolist() == [2, 6, 8]
+    assert store.column("x").tolist() == [20, 60, 80]
+    assert store.find(8) == 2
+
+    store.clear()
+    assert len(store) == 0
+    assert store.find(2) is None
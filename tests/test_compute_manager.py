@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from conceptual_modeler.app.compute_manager import ComputeManager
+
+
+class State(dict):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def test_edits_wait_for_the_run_in_flight():
+    model = []
+    seen = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        seen.append(list(model))
+
+    async def run():
+        manager = ComputeManager(State(), "compute", compute, lambda: None)
+        manager.request()
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+
+        manager.invalidate()
+        manager.edit(model.append, "point")
+        assert model == []
+
+        release.set()
+        while manager.running:
+            await asyncio.sleep(0.01)
+        return manager
+
+    manager = asyncio.run(run())
+    assert seen == [[]]
+    assert model == ["point"]
+    assert manager._state["compute_status"] == "cancelled"
+
+    manager.edit(model.append, "orientation")
+    assert model == ["point", "orientation"]
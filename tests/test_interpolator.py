@@ -0,0 +1,49 @@
+import pytest
+
+from conceptual_modeler.app.modeler.interpolator import (
+    DEFAULT_PROFILE,
+    INTERPOLATOR_PROFILES,
+    parse_profile,
+    profile_name,
+)
+
+
+def test_named_profiles():
+    assert parse_profile() == INTERPOLATOR_PROFILES[DEFAULT_PROFILE]
+    profile = parse_profile("fast_run_float32")
+    assert profile_name(profile) == "fast_run:float32:geology"
+
+    # Callers get their own output list
+    profile["output"].append("gravity")
+    assert INTERPOLATOR_PROFILES["fast_run_float32"]["output"] == ["geology"]
+
+
+def test_profile_spec():
+    profile = parse_profile("fast_run:float32:geology+gravity")
+    assert profile == {
+        "theano_optimizer": "fast_run",
+        "dtype": "float32",
+        "output": ["geology", "gravity"],
+    }
+    assert parse_profile(profile_name(profile)) == profile
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "fast",
+        "fast_run:float64",
+        "slow_run:float64:geology",
+        "fast_run:float16:geology",
+        "fast_run:float64:",
+        "fast_run:float64:geology+topology",
+    ],
+)
+def test_invalid_profile(text):
+    with pytest.raises(ValueError):
+        parse_profile(text)
+
+
+def test_profile_without_geology():
+    with pytest.raises(ValueError, match="lacks geology"):
+        parse_profile("fast_run:float64:gravity+magnetics")
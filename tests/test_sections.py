@@ -0,0 +1,82 @@
+import numpy as np
+
+from conceptual_modeler.app.modeler.sections import SectionRenderer, SliceCache
+
+
+def test_slice_cache_evicts_least_recently_used():
+    cache = SliceCache(max_bytes=300)
+    for index in range(3):
+        cache.put(("x", "rgba", index), np.zeros(100, dtype=np.uint8))
+    assert len(cache) == 3
+    assert cache.nbytes == 300
+
+    # Touch the oldest entry, the next put evicts the second one
+    assert cache.get(("x", "rgba", 0)) is not None
+    cache.put(("x", "png", 3), b"\0" * 100)
+
+    assert cache.get(("x", "rgba", 1)) is None
+    assert cache.get(("x", "rgba", 0)) is not None
+    assert cache.get(("x", "png", 3)) is not None
+    assert cache.nbytes == 300
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_slice_cache_replaces_and_skips_oversized_entries():
+    cache = SliceCache(max_bytes=100)
+    cache.put(("y", "png", 0), b"\0" * 60)
+    cache.put(("y", "png", 0), b"\0" * 40)
+    assert cache.nbytes == 40
+
+    # Larger than the whole cache, returned but not stored
+    value = b"\0" * 101
+    assert cache.put(("y", "png", 1), value) is value
+    assert len(cache) == 1
+    assert cache.nbytes == 40
+
+
+def test_slice_cache_invalidate():
+    cache = SliceCache(max_bytes=1000)
+    for direction in "xy":
+        for kind in ["rgba", "png"]:
+            cache.put((direction, kind, 0), b"\0" * 10)
+
+    cache.invalidate("x", kinds=["png"])
+    assert cache.get(("x", "png", 0)) is None
+    assert cache.get(("x", "rgba", 0)) is not None
+
+    cache.invalidate(kinds=["rgba"])
+    assert len(cache) == 1
+    assert cache.get(("y", "png", 0)) is not None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_render_spec_is_cached_until_the_figure_changes():
+    labels = np.zeros((4, 3, 2), dtype=int)
+    section = SectionRenderer("x", SliceCache())
+    section.set_model(labels, [0, 4, 0, 3, 0, 2], {0: "#015482"})
+    calls = []
+
+    def serialize(fig):
+        calls.append(fig)
+        return {"width": fig.get_figwidth()}
+
+    spec = section.render_spec(serialize, [1], (2, 1), 50)
+    assert section.render_spec(serialize, [1], (2, 1), 50) is spec
+    assert len(calls) == 1
+
+    section.render_spec(serialize, [2], (2, 1), 50)
+    assert section.render_spec(serialize, [1], (3, 1), 50) == {"width": 3}
+    section.reset()
+    section.render_spec(serialize, [1], (3, 1), 50)
+    assert len(calls) == 4
+
+
+def test_set_model_rounds_float_labels():
+    # GemPy's lith_block holds floats, 2.9999 is formation 3
+    labels = np.array([1.0, 2.9999, 3.0001, -1.0]).reshape(4, 1, 1)
+    section = SectionRenderer("y", SliceCache())
+    section.set_model(labels, [0, 4, 0, 1, 0, 1], {})
+    assert section.section(0).ravel().tolist() == [1, 3, 3, -1]
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from conceptual_modeler.app.modeler.solution_cache import SolutionCache
+
+
+def model_state(x=1.0, point_id="Point_1", selected=False):
+    return {
+        "stacks": [{"id": "Stack_1", "name": "Layers", "selected": selected}],
+        "points": [{"id": point_id, "x": x, "y": 2.0, "z": 3.0}],
+    }
+
+
+def test_key(tmp_path):
+    cache = SolutionCache(tmp_path)
+    topography = np.arange(6, dtype=float).reshape(2, 3)
+    key = cache.key(model_state(), topography)
+
+    # UI only keys are ignored
+    assert cache.key(model_state(point_id="Point_9", selected=True), topography) == key
+
+    assert cache.key(model_state(x=1.5), topography) != key
+    assert cache.key(model_state(), topography + 1) != key
+    assert cache.key(model_state(), topography.reshape(3, 2)) != key
+    assert cache.key(model_state(), None) != key
+
+
+def test_save_and_load(tmp_path):
+    cache = SolutionCache(tmp_path)
+    arrays = {"lith_block": np.arange(10, dtype=float)}
+
+    assert cache.load("missing") is None
+    assert cache.save("solution", arrays)
+    loaded = cache.load("solution")
+    np.testing.assert_array_equal(loaded["lith_block"], arrays["lith_block"])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = SolutionCache(tmp_path)
+    (tmp_path / "broken.npz").write_bytes(b"not a npz")
+
+    assert cache.load("broken") is None
+    assert not (tmp_path / "broken.npz").exists()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    rng = np.random.default_rng(0)
+    arrays = {"lith_block": rng.random(1000)}
+    cache = SolutionCache(tmp_path, max_bytes=1 << 20)
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.save(key, arrays)
+        os.utime(tmp_path / f"{key}.npz", (index, index))
+    size = (tmp_path / "a.npz").stat().st_size
+
+    # Room for two entries, a load refreshes "a" so "b" goes first
+    cache = SolutionCache(tmp_path, max_bytes=2 * size)
+    cache.load("a")
+    cache.evict()
+
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["a", "c"]
+
+    # Solutions larger than the cache are not stored
+    cache = SolutionCache(tmp_path, max_bytes=size // 2)
+    assert not cache.save("d", arrays)
+    assert not (tmp_path / "d.npz").exists()
@@ -0,0 +1,105 @@
+import numpy as np
+
+from conceptual_modeler.app.modeler.subsurface import (
+    apply_patch,
+    dem_overview,
+    dem_pixels,
+    read_csv_table,
+)
+
+
+class Band:
+    """Enough of a GDAL band for the DEM helpers"""
+
+    def __init__(self, z, overviews=()):
+        self._z = z
+        self._overviews = list(overviews)
+        self.YSize, self.XSize = z.shape
+
+    def ReadAsArray(self, xoff=0, yoff=0, xsize=None, ysize=None):
+        xsize = self.XSize if xsize is None else xsize
+        ysize = self.YSize if ysize is None else ysize
+        return self._z[yoff : yoff + ysize, xoff : xoff + xsize]
+
+    def GetOverviewCount(self):
+        return len(self._overviews)
+
+    def GetOverview(self, i):
+        return self._overviews[i]
+
+
+class Dataset:
+    def __init__(self, band, geo_transform):
+        self._band = band
+        self._geo_transform = geo_transform
+        self.RasterYSize, self.RasterXSize = band.YSize, band.XSize
+
+    def GetGeoTransform(self):
+        return self._geo_transform
+
+    def GetRasterBand(self, i):
+        return self._band
+
+
+def dem(overviews=True):
+    # 40x20 pixels of 10m, north up, over [0, 400] x [0, 200]
+    z = np.arange(800, dtype=np.float32).reshape(20, 40)
+    levels = [Band(z[::2, ::2]), Band(z[::4, ::4])] if overviews else []
+    return Dataset(Band(z, levels), (0.0, 10.0, 0.0, 200.0, 0.0, -10.0))
+
+
+def test_dem_pixels():
+    dataset = dem()
+    x, y, columns, rows = dem_pixels(
+        dataset, dataset.GetRasterBand(1), [100, 200, 50, 100]
+    )
+    assert x.tolist() == [105, 115, 125, 135, 145, 155, 165, 175, 185, 195]
+    assert y.tolist() == [95, 85, 75, 65, 55]
+    assert columns.tolist() == list(range(10, 20))
+    assert rows.tolist() == list(range(10, 15))
+
+    # Overview pixels cover twice the area
+    x, y, _, _ = dem_pixels(
+        dataset, dataset.GetRasterBand(1).GetOverview(0), [0, 400, 0, 200]
+    )
+    assert x[:2].tolist() == [10, 30]
+    assert y[:2].tolist() == [190, 170]
+
+
+def test_dem_overview_prefers_full_resolution():
+    raster = dem_overview(dem(), [0, 400, 0, 200], max_points=800)
+    assert raster.shape == (20, 40, 3)
+    # y increasing, z of the southern row first
+    assert raster[0, 0].tolist() == [5, 5, 760]
+    assert raster[-1, -1].tolist() == [395, 195, 39]
+
+
+def test_dem_overview_budget():
+    dataset = dem()
+    assert dem_overview(dataset, [0, 400, 0, 200], max_points=200).shape == (10, 20, 3)
+    assert dem_overview(dataset, [0, 400, 0, 200], max_points=50).shape == (5, 10, 3)
+    assert dem_overview(dataset, [0, 400, 0, 200], max_points=10) is None
+    assert dem_overview(dem(overviews=False), [0, 400, 0, 200], max_points=200) is None
+
+
+def test_apply_patch():
+    items = [{"id": "Point_1", "x": 0}, {"id": "Point_2", "x": 1}]
+    ops = [
+        {"op": "insert", "index": 0, "item": {"id": "Point_3", "x": 2}},
+        {"op": "update", "id": "Point_1", "item": {"id": "Point_1", "x": 5}},
+        {"op": "remove", "id": "Point_2"},
+        {"op": "remove", "id": "Point_9"},
+    ]
+    assert apply_patch(items, ops) == [
+        {"id": "Point_3", "x": 2},
+        {"id": "Point_1", "x": 5},
+    ]
+
+
+def test_read_csv_table():
+    table = read_csv_table(b"X,Y,Z,formation\n1,2,3,001\n4,5,6,\n")
+    assert table["X"].tolist() == [1, 4]
+    # Formation names stay strings, empty cells are not NaN
+    assert table["formation"].tolist() == ["001", ""]
+
+    assert read_csv_table(b"").empty
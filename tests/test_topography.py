@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from conceptual_modeler.app.modeler.subsurface import SubSurface, dem_values
+
+
+class App:
+    def push_state(self, key, value):
+        pass
+
+    def patch_state(self, key, ops):
+        pass
+
+
+def test_saved_topography_round_trip(tmp_path):
+    subsurface = SubSurface(App(), figures=False)
+    geo_model = subsurface._geo_model
+    geo_model.set_topography(
+        source="random", fd=2.0, d_z=np.array([60, 90]), resolution=np.array([12, 8])
+    )
+    expected = geo_model._grid.topography.values_2d.copy()
+    path = tmp_path / "topography.npy"
+    geo_model._grid.topography.save(path)
+
+    geo_model.set_topography(
+        source="random", fd=2.0, d_z=np.array([10, 20]), resolution=np.array([5, 5])
+    )
+    assert subsurface.load_topography("saved", path.read_bytes()) == 1
+
+    values = geo_model._grid.topography.values_2d
+    assert values.shape == (12, 8, 3)
+    np.testing.assert_array_equal(values, expected)
+    assert subsurface.topography_overview is None
+
+
+def reference_dem(gdal, path):
+    # 120x80 pixels of 25m, north up, over [1000, 4000] x [3000, 5000]
+    rng = np.random.default_rng(0)
+    dataset = gdal.GetDriverByName("GTiff").Create(
+        str(path), 120, 80, 1, gdal.GDT_Float32
+    )
+    dataset.SetGeoTransform([1000.0, 25.0, 0.0, 5000.0, 0.0, -25.0])
+    dataset.GetRasterBand(1).WriteArray(
+        rng.uniform(100, 500, (80, 120)).astype(np.float32)
+    )
+    dataset.FlushCache()
+    return dataset
+
+
+@pytest.mark.parametrize(
+    "extent",
+    [
+        # The whole DEM, GemPy does not crop it
+        [1000, 4000, 3000, 5000, 0, 1000],
+        # Not aligned on the DEM pixels, GemPy warps it
+        [1510, 3490, 3260, 4740, 0, 1000],
+    ],
+)
+def test_dem_values_match_gempy(tmp_path, monkeypatch, extent):
+    gdal = pytest.importorskip("osgeo.gdal")
+    from gempy.core.grid_modules.create_topography import LoadDEMGDAL
+
+    # GemPy writes its temp files in the working directory
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "dem.tif"
+    dataset = reference_dem(gdal, path)
+    extent = np.array(extent, dtype=float)
+
+    expected = LoadDEMGDAL(str(path), extent=extent).get_values()
+    values = dem_values(dataset, extent, "/vsimem/test_dem_cropped.tif")
+    gdal.Unlink("/vsimem/test_dem_cropped.tif")
+
+    assert values.shape == expected.shape
+    np.testing.assert_allclose(values, expected)
@@ -0,0 +1,66 @@
+import asyncio
+
+from conceptual_modeler.app.view_scheduler import ViewScheduler
+
+
+class State(dict):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def scheduler(**kwargs):
+    renders = []
+    views = ViewScheduler(State(), "view_metrics", **kwargs)
+    views.register("x", lambda: renders.append("x"))
+    views.register("y", lambda: renders.append("y"))
+    return views, renders
+
+
+def test_requests_are_coalesced():
+    async def run():
+        views, renders = scheduler(delay=0.02, max_wait=1)
+        for _ in range(5):
+            views.request("x", "y")
+        views.request("x")
+        await asyncio.sleep(0.1)
+        return views, renders
+
+    views, renders = asyncio.run(run())
+    assert sorted(renders) == ["x", "y"]
+    metrics = views._state["view_metrics"]
+    assert metrics["x"]["requested"] == 6
+    assert metrics["x"]["skipped"] == 5
+    assert metrics["x"]["rendered"] == 1
+    assert metrics["y"]["requested"] == 5
+    assert metrics["y"]["skipped"] == 4
+    assert metrics["y"]["rendered"] == 1
+
+
+def test_steady_requests_render_after_max_wait():
+    async def run():
+        views, renders = scheduler(delay=0.05, max_wait=0.1)
+        # Each request lands before the debounce delay of the previous one
+        for _ in range(25):
+            views.request("x")
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        return views, renders
+
+    views, renders = asyncio.run(run())
+    metrics = views._state["view_metrics"]["x"]
+    # A pure trailing debounce would render once, at the end
+    assert metrics["rendered"] >= 2
+    assert metrics["requested"] == 25
+    assert metrics["rendered"] + metrics["skipped"] == 25
+    assert len(renders) == metrics["rendered"]
+
+
+def test_renders_immediately_without_loop():
+    views, renders = scheduler(delay=0.05)
+    views.request("x")
+    views.request("x")
+    assert renders == ["x", "x"]
+    assert views._state["view_metrics"]["x"]["skipped"] == 0